@@ -0,0 +1,383 @@
+import gzip
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# =============================================================
+# Client HTTP partagé vers l'API Flask
+# =============================================================
+
+DEFAULT_CONNECT_TIMEOUT = 3.05  # s, établissement de la connexion TCP
+DEFAULT_READ_TIMEOUT = 30.0     # s, attente de la réponse du modèle
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.3           # s, 0.3, 0.6, 1.2… entre deux tentatives
+RETRY_STATUSES = (502, 503, 504)
+DEFAULT_HEALTH_INTERVAL = 10.0  # s, entre deux vérifications de l'état des endpoints
+DEFAULT_HEALTH_TIMEOUT = 2.0    # s
+DEFAULT_HEALTH_PATH = "/health"
+EWMA_WEIGHT = 0.3               # poids de la dernière mesure dans la latence moyenne
+GZIP_LEVEL = 5                  # compromis taille / temps CPU pour des corps de quelques Ko
+
+
+def encode_json_body(payload, gzip_min_bytes=None):
+    """Corps JSON d'une requête, compressé en gzip s'il dépasse `gzip_min_bytes`.
+
+    En dessous du seuil (ou si `gzip_min_bytes` vaut None), le corps part tel
+    quel : l'en-tête gzip coûterait plus qu'il ne ferait gagner.
+
+    Returns:
+        tuple: (octets du corps, en-têtes HTTP).
+    """
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if gzip_min_bytes is not None and len(data) >= gzip_min_bytes:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return data, headers
+
+
+def parse_endpoints(value):
+    """URLs `/predict` à partir d'une liste ou d'une chaîne séparée par des virgules.
+
+    Returns:
+        tuple: URLs sans doublons, dans l'ordre d'origine.
+    """
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(dict.fromkeys(url.strip() for url in value if url and url.strip()))
+
+
+def health_url(predict_url, path=DEFAULT_HEALTH_PATH):
+    """URL de vérification d'état sur le même hôte que `predict_url`."""
+    parts = urlsplit(predict_url)
+    return urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+
+
+class CircuitOpenError(Exception):
+    """Levée quand le disjoncteur est ouvert : l'API est considérée indisponible."""
+
+
+class CircuitBreaker:
+    """Disjoncteur simple (fermé → ouvert → semi-ouvert), partagé entre threads.
+
+    Après `failure_threshold` échecs consécutifs, les appels échouent
+    immédiatement pendant `reset_timeout` secondes. Passé ce délai, un seul
+    appel d'essai est autorisé : son succès referme le circuit, son échec le
+    rouvre pour un nouveau délai.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """Autorise l'appel ou lève `CircuitOpenError`."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            remaining = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+            raise CircuitOpenError(f"API indisponible (circuit ouvert, nouvel essai dans {remaining:.0f} s)")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class ApiClient:
+    """Client HTTP réutilisable : connexions keep-alive, timeouts, retries et disjoncteur.
+
+    Une seule instance est partagée par processus (voir `get_prediction_backend` dans
+    `main.py`), de sorte que toutes les sessions Streamlit réutilisent le même
+    pool de connexions.
+
+    Args:
+        url (str): URL de l'endpoint `/predict`.
+        connect_timeout (float): Timeout de connexion, en secondes.
+        read_timeout (float): Timeout de lecture de la réponse, en secondes.
+        pool_size (int): Nombre maximal de connexions conservées vers l'hôte.
+        retries (int): Nombre maximal de nouvelles tentatives.
+        backoff_factor (float): Facteur d'attente exponentielle entre tentatives.
+        breaker (CircuitBreaker): Disjoncteur à utiliser (un nouveau par défaut).
+    """
+
+    def __init__(self, url, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF,
+                 breaker=None):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        # La prédiction est idempotente : on autorise donc aussi les retries sur POST
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post_json(self, payload):
+        """Envoie `payload` en JSON et renvoie la réponse `requests`.
+
+        Les erreurs réseau et les réponses 5xx comptent comme des échecs pour
+        le disjoncteur ; les 4xx (requête invalide) non.
+
+        Raises:
+            CircuitOpenError: Si le disjoncteur est ouvert.
+            requests.RequestException: En cas d'erreur réseau ou de timeout.
+        """
+        return self.post_body(*encode_json_body(payload))
+
+    def post_body(self, data, headers):
+        """Comme `post_json`, pour un corps déjà encodé (voir `encode_json_body`)."""
+        self.breaker.before_call()
+        try:
+            response = self.session.post(self.url, data=data, headers=headers, timeout=self.timeout)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class Endpoint:
+    """État d'un endpoint du répartiteur : requêtes en cours, latence moyenne, disponibilité."""
+
+    def __init__(self, url, breaker):
+        self.url = url
+        self.breaker = breaker
+        self.outstanding = 0
+        self.ewma = None  # s, None tant qu'aucune réponse n'a été mesurée
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+
+    def cost(self):
+        """Coût estimé d'un nouvel appel : latence moyenne × (requêtes en cours + 1).
+
+        Un endpoint jamais mesuré coûte 0 : il est essayé en priorité.
+        """
+        return (self.outstanding + 1) * (self.ewma or 0.0)
+
+    def observe(self, seconds):
+        self.ewma = seconds if self.ewma is None else EWMA_WEIGHT * seconds + (1 - EWMA_WEIGHT) * self.ewma
+
+
+class LoadBalancedClient:
+    """Client HTTP réparti sur plusieurs instances de l'API, même interface que `ApiClient`.
+
+    Chaque appel part vers le moins coûteux de deux endpoints disponibles tirés
+    au hasard (`Endpoint.cost` : latence EWMA pondérée par les requêtes en cours). Un
+    endpoint est écarté quand son disjoncteur s'ouvre (échecs consécutifs)
+    ou quand la vérification d'état périodique échoue, et réadmis dès
+    qu'elle réussit à nouveau. Une erreur réseau ou une réponse 502/503/504
+    est retentée sur un autre endpoint.
+
+    La vérification d'état (`GET /health` par défaut) ne fait que marquer un
+    endpoint sain (réponse 2xx) ou non ; seuls les vrais appels `/predict`
+    alimentent les disjoncteurs. Si aucun endpoint n'est marqué sain (API
+    sans route `/health` par exemple), tous restent essayés, les disjoncteurs
+    écartant ceux qui échouent.
+
+    Args:
+        urls (iterable): URLs des endpoints `/predict`.
+        health_interval (float): Période des vérifications d'état, en secondes (0 : désactivées).
+        health_path (str): Chemin de la vérification d'état.
+        failure_threshold (int): Échecs consécutifs avant d'écarter un endpoint.
+        reset_timeout (float): Délai avant un appel d'essai vers un endpoint écarté.
+        Les autres arguments sont ceux de `ApiClient` ; `retries` compte ici les
+        nouvelles tentatives sur d'autres endpoints.
+    """
+
+    def __init__(self, urls, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, health_interval=DEFAULT_HEALTH_INTERVAL,
+                 health_timeout=DEFAULT_HEALTH_TIMEOUT, health_path=DEFAULT_HEALTH_PATH,
+                 failure_threshold=3, reset_timeout=30.0):
+        urls = parse_endpoints(urls)
+        if not urls:
+            raise ValueError("Aucun endpoint fourni")
+        self.url = ",".join(urls)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_attempts = retries + 1
+        self.health_timeout = health_timeout
+        self.health_path = health_path
+        self.endpoints = [
+            Endpoint(url, CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout))
+            for url in urls
+        ]
+        self._lock = threading.Lock()
+        # Pas de retry urllib3 : on réessaie plutôt sur un autre endpoint
+        adapter = HTTPAdapter(pool_connections=len(urls), pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stop = threading.Event()
+        self._health_thread = None
+        if health_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), daemon=True, name="api-health"
+            )
+            self._health_thread.start()
+
+    def _acquire(self, exclude):
+        """Réserve l'endpoint disponible le moins coûteux, ou None s'il n'y en a aucun."""
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.healthy and endpoint.url not in exclude]
+            if not any(endpoint.healthy for endpoint in self.endpoints):
+                candidates = [endpoint for endpoint in self.endpoints if endpoint.url not in exclude]
+            # « Power of two choices » : le moins coûteux de deux endpoints tirés au hasard,
+            # pour ne pas envoyer toutes les requêtes au même endpoint quand la charge est faible
+            random.shuffle(candidates)
+            if len(candidates) >= 2 and candidates[1].cost() < candidates[0].cost():
+                candidates[0], candidates[1] = candidates[1], candidates[0]
+            for endpoint in candidates:
+                try:
+                    endpoint.breaker.before_call()
+                except CircuitOpenError:
+                    continue
+                endpoint.outstanding += 1
+                endpoint.requests += 1
+                return endpoint
+        return None
+
+    def _release(self, endpoint, elapsed, failed):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if elapsed is not None:
+                endpoint.observe(elapsed)
+            if failed:
+                endpoint.failures += 1
+        if failed:
+            endpoint.breaker.record_failure()
+        else:
+            endpoint.breaker.record_success()
+
+    def post_json(self, payload):
+        """Envoie `payload` en JSON à l'endpoint choisi et renvoie la réponse `requests`.
+
+        Raises:
+            CircuitOpenError: Si aucun endpoint n'est disponible.
+            requests.RequestException: Si toutes les tentatives échouent sur une erreur réseau.
+        """
+        return self.post_body(*encode_json_body(payload))
+
+    def post_body(self, data, headers):
+        """Comme `post_json`, pour un corps déjà encodé (voir `encode_json_body`)."""
+        tried = set()
+        last_response = last_error = None
+        for _ in range(self.max_attempts):
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                break
+            tried.add(endpoint.url)
+            start = time.perf_counter()
+            try:
+                response = self.session.post(endpoint.url, data=data, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._release(endpoint, None, failed=True)
+                last_error = e
+                continue
+            self._release(endpoint, time.perf_counter() - start, failed=response.status_code >= 500)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            last_response = response
+        if last_response is not None:
+            return last_response
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError("API indisponible (aucun endpoint disponible)")
+
+    def check_health(self):
+        """Vérifie chaque endpoint : sain sur une réponse 2xx, écarté sinon.
+
+        Le disjoncteur n'est pas touché : un `/health` qui répond ne dit rien
+        d'un `/predict` qui renvoie des 5xx.
+        """
+        for endpoint in self.endpoints:
+            try:
+                response = self.session.get(health_url(endpoint.url, self.health_path), timeout=self.health_timeout)
+                alive = 200 <= response.status_code < 300
+            except requests.RequestException:
+                alive = False
+            with self._lock:
+                endpoint.healthy = alive
+
+    def _health_loop(self, interval):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(interval)
+
+    def stats(self):
+        """État de chaque endpoint (pour le panneau d'instrumentation)."""
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "healthy": endpoint.healthy,
+                    "circuit": endpoint.breaker.state,
+                    "outstanding": endpoint.outstanding,
+                    "ewma_ms": endpoint.ewma * 1e3 if endpoint.ewma is not None else None,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                }
+                for endpoint in self.endpoints
+            ]
+
+    def close(self):
+        self._stop.set()
+        self.session.close()
@@ -0,0 +1,255 @@
+import threading
+
+import numpy as np
+
+from api_client import ApiClient, LoadBalancedClient, encode_json_body, parse_endpoints
+from instrumentation import METRICS
+from utils import languages_frameworks, normalize_text
+
+# =============================================================
+# Backends de prédiction : API Flask (HTTP) ou modèles chargés en mémoire
+# =============================================================
+
+BACKEND_HTTP = "http"
+BACKEND_LOCAL = "local"
+# Mode compact (COMPACT_PAYLOAD) : texte prénormalisé et tronqué, corps gzip, top-k des scores
+DEFAULT_TOKEN_BUDGET = 256   # tokens titre + corps après normalisation (p90 du jeu de test : ~300)
+DEFAULT_TOP_K_SCORES = 20    # scores renvoyés par modèle ; doit rester ≥ au k des métriques
+GZIP_MIN_BYTES = 1024        # en dessous, le corps n'est pas compressé
+# Identité stable de l'API dans les clés de cache et le fichier de résultats de la Partie 3 :
+# ne dépend pas des URLs des instances (en ajouter, retirer ou réordonner ne perd rien)
+DEFAULT_API_SERVICE = "flask_app"
+
+
+class PredictionBackend:
+    """Interface commune des backends.
+
+    Les réponses suivent le format de l'API Flask : `{"scores": {tag: score}}`
+    en cas de succès, `{"error": message}` sinon (jamais d'exception).
+    """
+
+    #: Identifiant stable de la source des scores (nom du service, chemins des modèles…),
+    #: utilisé dans les clés de cache et le nom du fichier de résultats de la Partie 3
+    endpoint = ""
+    #: Vrai si `predict_multi` répond pour plusieurs modèles en un seul appel
+    supports_multi = False
+
+    def predict(self, title, body, threshold, model_type, true_tags=None):
+        raise NotImplementedError
+
+    def predict_multi(self, title, body, thresholds, true_tags=None):
+        """Prédictions pour chaque modèle de `thresholds` ({model_type: seuil})."""
+        return {
+            model_type: self.predict(title, body, threshold, model_type, true_tags=true_tags)
+            for model_type, threshold in thresholds.items()
+        }
+
+    def predict_batch(self, questions, model_type, threshold=0.0):
+        """Prédictions pour une liste de couples (titre, corps)."""
+        return [self.predict(title, body, threshold, model_type) for title, body in questions]
+
+
+def compact_text(title, body, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Titre et corps normalisés comme côté modèle, tronqués à `token_budget` tokens au total.
+
+    Le titre est gardé en entier : c'est le corps (blocs de code, traces…)
+    qui est tronqué.
+    """
+    title_tokens = normalize_text(title, languages_frameworks).split()
+    body_tokens = normalize_text(body, languages_frameworks).split()
+    body_tokens = body_tokens[:max(token_budget - len(title_tokens), 0)]
+    return " ".join(title_tokens), " ".join(body_tokens)
+
+
+class HttpBackend(PredictionBackend):
+    """Prédiction via l'API Flask (`/predict`).
+
+    En mode compact, le texte est normalisé et tronqué côté client
+    (`"normalized": true`), `true_tags` n'est pas envoyé (les métriques sont
+    recalculées ici), le corps est compressé en gzip au-delà de
+    `GZIP_MIN_BYTES` et seuls les `top_k` meilleurs scores sont demandés.
+    Le serveur doit accepter `Content-Encoding: gzip` et le champ `top_k`
+    (voir `stub_api.py`).
+
+    Le seuil reçu est transmis tel quel (`"threshold"`, ou `"thresholds"` en
+    multi-modèle). Les appels dont la réponse est mise en cache ou stockée
+    (dashboard, Partie 3, `bulk_eval.py`) passent `FETCH_THRESHOLD` (0.0) pour
+    recevoir tous les scores, le seuil de l'utilisateur étant appliqué côté client.
+
+    Args:
+        client (ApiClient): Client HTTP partagé.
+        multi_model (bool): L'API accepte `model_types` et renvoie `{"results": {...}}`.
+        compact (bool): Active le mode compact.
+        token_budget (int): Nombre maximal de tokens envoyés en mode compact.
+        top_k (int): Nombre de scores demandés par modèle en mode compact.
+        service (str): Nom stable de l'API (`API_SERVICE`), indépendant des URLs des instances.
+    """
+
+    def __init__(self, client, multi_model=False, compact=False, token_budget=DEFAULT_TOKEN_BUDGET,
+                 top_k=DEFAULT_TOP_K_SCORES, service=DEFAULT_API_SERVICE):
+        self.client = client
+        self.endpoint = f"http:{service}"
+        if compact:
+            # Scores tronqués au top-k : ne pas les mélanger aux scores complets (cache, Partie 3)
+            self.endpoint += f"|compact:{token_budget}:{top_k}"
+        self.supports_multi = multi_model
+        self.compact = compact
+        self.token_budget = token_budget
+        self.top_k = top_k
+        self.wire_mode = "compact" if compact else "raw"
+
+    def _text_fields(self, title, body, true_tags):
+        if not self.compact:
+            fields = {"title": title, "body": body}
+            if true_tags is not None:
+                fields["true_tags"] = true_tags
+            return fields
+        title, body = compact_text(title, body, self.token_budget)
+        return {"title": title, "body": body, "normalized": True, "top_k": self.top_k}
+
+    def _post(self, payload):
+        data, headers = encode_json_body(payload, GZIP_MIN_BYTES if self.compact else None)
+        with METRICS.timer("http_post", mode=self.wire_mode):
+            response = self.client.post_body(data, headers)
+        METRICS.increment("request_bytes", len(data), mode=self.wire_mode)
+        METRICS.increment("response_bytes", len(response.content), mode=self.wire_mode)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": response.json().get("error", "Erreur inconnue")}
+
+    def build_payload(self, title, body, threshold, model_type, true_tags=None):
+        """Corps JSON (avant encodage) d'une requête `/predict` pour un modèle."""
+        return {
+            **self._text_fields(title, body, true_tags),
+            "threshold": threshold,
+            "model_type": model_type
+        }
+
+    def predict(self, title, body, threshold, model_type, true_tags=None):
+        payload = self.build_payload(title, body, threshold, model_type, true_tags)
+        try:
+            return self._post(payload)
+        except Exception as e:
+            return {"error": str(e)}
+
+    def predict_multi(self, title, body, thresholds, true_tags=None):
+        """Une seule requête pour plusieurs modèles si l'API le permet."""
+        if not self.supports_multi:
+            return super().predict_multi(title, body, thresholds, true_tags=true_tags)
+        payload = {
+            **self._text_fields(title, body, true_tags),
+            "model_types": list(thresholds),
+            "thresholds": thresholds
+        }
+        try:
+            res = self._post(payload)
+        except Exception as e:
+            res = {"error": str(e)}
+        if "error" in res:
+            return {model_type: res for model_type in thresholds}
+        results = res.get("results", {})
+        return {
+            model_type: results.get(model_type, {"error": "Modèle absent de la réponse"})
+            for model_type in thresholds
+        }
+
+
+def save_model_artifact(path, vectorizer, model, tags, topic_tags=None):
+    """Enregistre un artefact utilisable par `InProcessBackend`.
+
+    Args:
+        path (str): Fichier de sortie (joblib).
+        vectorizer: Transformeur texte -> matrice (ex. TfidfVectorizer), entraîné.
+        model: Modèle entraîné : `predict_proba` (supervisé) ou `transform` (NMF).
+        tags (list): Nom des tags, dans l'ordre des colonnes de scores.
+        topic_tags (array-like): Pour un modèle à `transform`, matrice
+            (n_topics, n_tags) qui projette les poids des thèmes sur les tags.
+    """
+    import joblib
+
+    artifact = {"vectorizer": vectorizer, "model": model, "tags": list(tags)}
+    if topic_tags is not None:
+        artifact["topic_tags"] = np.asarray(topic_tags)
+    joblib.dump(artifact, path)
+
+
+class InProcessBackend(PredictionBackend):
+    """Prédiction dans le processus Streamlit, sans aller-retour réseau.
+
+    Chaque artefact (voir `save_model_artifact`) est chargé une seule fois, au
+    premier appel du modèle correspondant. Le texte est prétraité comme le
+    `title_body` du jeu de test (titre + corps) puis par `utils.normalize_text`.
+
+    Args:
+        artifacts (dict): {model_type: chemin de l'artefact joblib}.
+    """
+
+    def __init__(self, artifacts):
+        self.artifacts = dict(artifacts)
+        self.endpoint = "local:" + ",".join(f"{k}={v}" for k, v in sorted(self.artifacts.items()))
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _load(self, model_type):
+        with self._lock:
+            if model_type not in self._models:
+                if model_type not in self.artifacts:
+                    raise KeyError(f"Aucun artefact configuré pour le modèle '{model_type}'")
+                import joblib  # seul le backend local en a besoin : pas d'import au démarrage
+
+                self._models[model_type] = joblib.load(self.artifacts[model_type])
+            return self._models[model_type]
+
+    @staticmethod
+    def _score_matrix(artifact, X):
+        model = artifact["model"]
+        if "topic_tags" in artifact:
+            scores = np.asarray(model.transform(X)) @ artifact["topic_tags"]
+            # Normalisation par ligne pour rester dans [0, 1] comme des probabilités
+            row_max = scores.max(axis=1, keepdims=True)
+            return np.divide(scores, row_max, out=np.zeros_like(scores), where=row_max > 0)
+        probs = model.predict_proba(X)
+        if isinstance(probs, list):
+            # MultiOutputClassifier : une matrice (n, 2) par tag
+            probs = np.column_stack([p[:, -1] for p in probs])
+        return np.asarray(probs)
+
+    def score_texts(self, texts, model_type):
+        """Matrice de scores (n_textes, n_tags) pour des textes bruts titre + corps."""
+        artifact = self._load(model_type)
+        with METRICS.timer("normalize_text"):
+            normalized = [normalize_text(text, languages_frameworks) for text in texts]
+        with METRICS.timer("model_scoring", model=model_type):
+            return self._score_matrix(artifact, artifact["vectorizer"].transform(normalized))
+
+    def predict_batch(self, questions, model_type, threshold=0.0):
+        """Prédictions de plusieurs questions en une seule vectorisation."""
+        if not questions:
+            return []
+        try:
+            artifact = self._load(model_type)
+            scores = self.score_texts([f"{title} {body}" for title, body in questions], model_type)
+        except Exception as e:
+            return [{"error": str(e)} for _ in questions]
+        tags = artifact["tags"]
+        return [{"scores": dict(zip(tags, row.round(4).tolist()))} for row in scores]
+
+    def predict(self, title, body, threshold, model_type, true_tags=None):
+        return self.predict_batch([(title, body)], model_type, threshold)[0]
+
+
+def build_backend(kind, api_url=None, artifacts=None, multi_model=False, compact=False,
+                  service=DEFAULT_API_SERVICE):
+    """Construit le backend choisi par la configuration (`PREDICTION_BACKEND`).
+
+    `api_url` peut lister plusieurs endpoints (liste ou URLs séparées par des
+    virgules) : les requêtes sont alors réparties par `LoadBalancedClient`.
+    `service` identifie l'API dans les clés de cache, à la place de ces URLs.
+    """
+    if kind == BACKEND_LOCAL:
+        return InProcessBackend(artifacts or {})
+    if kind == BACKEND_HTTP:
+        urls = parse_endpoints(api_url)
+        client = LoadBalancedClient(urls) if len(urls) > 1 else ApiClient(urls[0] if urls else api_url)
+        return HttpBackend(client, multi_model=multi_model, compact=compact, service=service)
+    raise ValueError(f"Backend de prédiction inconnu : {kind!r} (attendu : '{BACKEND_HTTP}' ou '{BACKEND_LOCAL}')")
@@ -0,0 +1,79 @@
+# Benchmark de débit : normalize_text_reference (boucle de re.sub) vs normalize_text (à froid et à chaud)
+# Script à lancer depuis la racine du dépôt :
+
+# python3 benchmarks/bench_normalize.py --repeat 5
+
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (  # noqa: E402
+    TextNormalizer,
+    _get_normalizer,
+    languages_frameworks,
+    normalize_text,
+    normalize_text_reference,
+)
+
+DATA_PATH = "test_data.csv"
+
+
+def measure(func, texts, repeat):
+    """Meilleur temps (s) sur `repeat` passes complètes de `func` sur `texts`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_cold(text, repeat):
+    """Meilleur temps (s) du premier appel de `normalize_text` après `cache_clear()` (construction comprise)."""
+    best = float("inf")
+    for _ in range(repeat):
+        _get_normalizer.cache_clear()
+        start = time.perf_counter()
+        normalize_text(text, languages_frameworks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de normalize_text_reference et de normalize_text.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--column", default="title_body")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.data, usecols=[args.column])[args.column].fillna("").tolist()
+    n_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    # Vérification d'équivalence avant de mesurer
+    expected = [normalize_text_reference(text, languages_frameworks) for text in texts]
+    mismatches = sum(normalize_text(a, languages_frameworks) != b for a, b in zip(texts, expected))
+
+    t_cold = measure_cold(texts[0], args.repeat)
+    t_reference = measure(lambda xs: [normalize_text_reference(x, languages_frameworks) for x in xs], texts, args.repeat)
+    # Fonction appelée par le dashboard : tuple de la liste et lru_cache du normaliseur à chaque appel
+    t_warm = measure(lambda xs: [normalize_text(x, languages_frameworks) for x in xs], texts, args.repeat)
+    normalizer = TextNormalizer(languages_frameworks)
+    t_raw = measure(normalizer.normalize_many, texts, args.repeat)
+
+    print(f"{len(texts)} textes, {n_bytes / 1e6:.2f} Mo, premier appel de normalize_text (à froid) : "
+          f"{t_cold * 1e3:.1f} ms")
+    print(f"Sorties différentes de la référence : {mismatches}")
+    for name, elapsed in (("reference", t_reference), ("normalize_text", t_warm)):
+        print(f"{name:>15} : {elapsed:.3f} s  {len(texts) / elapsed:10.0f} textes/s  {n_bytes / elapsed / 1e6:7.2f} Mo/s")
+    print(f"Accélération : x{t_reference / t_warm:.1f}")
+    print(f"(TextNormalizer seul, sans lru_cache ni tuple : {t_raw:.3f} s, {len(texts) / t_raw:.0f} textes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# Générateur de charge : rejoue les questions de test_data.csv contre l'API /predict
+# Script à lancer depuis la racine du dépôt :
+
+# python3 benchmarks/load_test.py                                          # faux serveur local, paliers de débit
+# python3 benchmarks/load_test.py --stub-service-ms 50 --stub-workers 4 --qps 20 40 80 120
+# python3 benchmarks/load_test.py --mode closed --concurrency 1 4 16 64    # N utilisateurs en boucle
+# python3 benchmarks/load_test.py --url http://<ip>:5000/predict --qps 5 10 20 --duration 30
+
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api_client import ApiClient, CircuitBreaker  # noqa: E402
+from backends import HttpBackend  # noqa: E402
+from dataset import load_dataset  # noqa: E402
+from run_benchmarks import DATA_PATH, RESULTS_DIR, _git_commit  # noqa: E402
+
+MODEL_TYPES = ("catboost", "nmf")  # les modèles du dashboard (MODEL_LABELS dans main.py)
+THRESHOLD = 0.5
+DEFAULT_QPS = (5, 10, 20, 40, 80)
+DEFAULT_CONCURRENCY = (1, 2, 4, 8, 16)
+DEFAULT_DURATION = 10.0      # s par palier
+DEFAULT_MAX_INFLIGHT = 256   # requêtes simultanées au plus côté générateur (boucle ouverte)
+DEFAULT_SLO_MS = 1000.0      # p99 au-delà duquel le palier est considéré saturé
+MAX_ERROR_RATE = 0.01
+MIN_THROUGHPUT_RATIO = 0.9   # débit obtenu / débit visé en dessous duquel le serveur décroche
+MIN_SCALING_GAIN = 1.1       # boucle fermée : gain de débit minimal d'un palier au suivant
+
+# =============================================================
+# Envoi des requêtes (même corps que `call_api_predict` dans main.py)
+# =============================================================
+
+
+def load_questions(csv_path=DATA_PATH):
+    df = load_dataset(csv_path)
+    return list(zip(df["Title"], df["Body"], df["FilteredTags"].map(list)))
+
+
+def build_load_backend(url, pool_size, timeout):
+    """Backend HTTP sans retries ni disjoncteur : chaque échec doit être compté, pas masqué."""
+    client = ApiClient(url, read_timeout=timeout, pool_size=pool_size, retries=0,
+                       breaker=CircuitBreaker(failure_threshold=float("inf")))
+    return HttpBackend(client)
+
+
+class RequestLog:
+    """Résultats des requêtes d'un palier : (modèle, prévue, envoyée, terminée, succès).
+
+    Les instants sont des `time.perf_counter()`. En boucle ouverte, la latence
+    est mesurée depuis l'instant *prévu* d'envoi : une requête retardée parce
+    que le générateur attendait des réponses compte tout ce retard (pas
+    d'omission coordonnée).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def send(self, backend, question, model_type, scheduled=None):
+        title, body, true_tags = question
+        start = time.perf_counter()
+        res = backend.predict(title, body, THRESHOLD, model_type, true_tags=true_tags)
+        end = time.perf_counter()
+        with self._lock:
+            self.records.append((model_type, start if scheduled is None else scheduled, start, end, "error" not in res))
+
+
+def run_open_loop(backend, questions, qps, duration, max_inflight=DEFAULT_MAX_INFLIGHT, poisson=False, seed=0):
+    """Arrivées à débit fixe (ou poissonniennes), indépendantes des réponses du serveur."""
+    n_requests = max(1, int(qps * duration))
+    if poisson:
+        gaps = np.random.default_rng(seed).exponential(1 / qps, n_requests)
+        offsets = np.concatenate([[0.0], np.cumsum(gaps[:-1])])
+    else:
+        offsets = np.arange(n_requests) / qps
+    log = RequestLog()
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        t0 = time.perf_counter()
+        for i, offset in enumerate(offsets):
+            scheduled = t0 + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(log.send, backend, questions[i % len(questions)], MODEL_TYPES[i % len(MODEL_TYPES)],
+                            scheduled)
+    return log, t0
+
+
+def run_closed_loop(backend, questions, concurrency, duration):
+    """`concurrency` utilisateurs qui envoient une requête dès la réponse précédente reçue."""
+    log = RequestLog()
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+
+    def user():
+        while time.perf_counter() < deadline:
+            with counter_lock:
+                i = next(counter)
+            log.send(backend, questions[i % len(questions)], MODEL_TYPES[i % len(MODEL_TYPES)])
+
+    threads = [threading.Thread(target=user) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return log, t0
+
+# =============================================================
+# Résumé des paliers et point de saturation
+# =============================================================
+
+
+def summarize_records(records, t0):
+    """Débit, taux d'erreur et percentiles de latence (ms) d'un ensemble de requêtes."""
+    if not records:
+        return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_per_s": 0.0}
+    _, scheduled, start, end, ok = (np.array(column) for column in zip(*records))
+    latency = (end - scheduled) * 1e3
+    elapsed = end.max() - t0
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {
+        "requests": len(records),
+        "errors": int((~ok).sum()),
+        "error_rate": float((~ok).mean()),
+        "throughput_per_s": float(ok.sum() / elapsed),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latency.max()),
+        # Attente côté générateur (boucle ouverte) : si elle grandit, c'est lui qui sature
+        "client_queue_p99_ms": float(np.percentile((start - scheduled) * 1e3, 99)),
+    }
+
+
+def summarize_level(log, t0, mode, level):
+    summary = {"mode": mode, "level": level, **summarize_records(log.records, t0)}
+    summary["models"] = {
+        model_type: summarize_records([r for r in log.records if r[0] == model_type], t0)
+        for model_type in MODEL_TYPES
+    }
+    return summary
+
+
+def saturation_reason(summary, previous=None, slo_ms=DEFAULT_SLO_MS, max_error_rate=MAX_ERROR_RATE):
+    """Raison pour laquelle le palier est saturé, ou None s'il est tenu."""
+    if summary["error_rate"] > max_error_rate:
+        return f"taux d'erreur {summary['error_rate']:.1%} > {max_error_rate:.0%}"
+    if summary.get("p99_ms", 0.0) > slo_ms:
+        return f"p99 {summary['p99_ms']:.0f} ms > {slo_ms:.0f} ms"
+    if summary["mode"] == "open" and summary["throughput_per_s"] < MIN_THROUGHPUT_RATIO * summary["level"]:
+        return f"débit {summary['throughput_per_s']:.1f}/s < {MIN_THROUGHPUT_RATIO:.0%} du débit visé"
+    if (summary["mode"] == "closed" and previous is not None
+            and summary["throughput_per_s"] < MIN_SCALING_GAIN * previous["throughput_per_s"]):
+        return f"débit {summary['throughput_per_s']:.1f}/s : plus de gain avec la concurrence"
+    return None
+
+# =============================================================
+# Faux serveur dans un processus séparé (il ne partage pas le GIL du générateur)
+# =============================================================
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_process(service_ms, jitter_ms, workers, timeout=10.0):
+    """Lance `stub_api.py` dans un sous-processus ; renvoie (processus, URL de /predict)."""
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(ROOT, "stub_api.py"), "--port", str(port),
+           "--service-ms", str(service_ms), "--jitter-ms", str(jitter_ms)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    process = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5)
+            return process, f"http://127.0.0.1:{port}/predict"
+        except requests.RequestException:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Le faux serveur n'a pas démarré")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API /predict.")
+    parser.add_argument("--url", default=None, help="Endpoint /predict (faux serveur local par défaut)")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open",
+                        help="open : débit d'arrivée fixe ; closed : N utilisateurs en boucle")
+    parser.add_argument("--qps", type=float, nargs="+", default=DEFAULT_QPS, help="Paliers de débit (open)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help="Paliers d'utilisateurs simultanés (closed)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Durée de chaque palier (s)")
+    parser.add_argument("--poisson", action="store_true", help="Arrivées poissonniennes plutôt que régulières")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout de lecture (s)")
+    parser.add_argument("--slo-ms", type=float, default=DEFAULT_SLO_MS, help="p99 maximal d'un palier tenu")
+    parser.add_argument("--keep-going", action="store_true", help="Continuer après le premier palier saturé")
+    parser.add_argument("--stub-service-ms", type=float, default=20.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--stub-workers", type=int, default=4)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default=None, help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    questions = load_questions(args.data)
+    stub = None
+    url = args.url
+    if url is None:
+        stub, url = start_stub_process(args.stub_service_ms, args.stub_jitter_ms, args.stub_workers)
+        print(f"Faux serveur : {url} (service {args.stub_service_ms:g} ± {args.stub_jitter_ms:g} ms, "
+              f"{args.stub_workers} workers)")
+    levels = args.qps if args.mode == "open" else args.concurrency
+    pool_size = args.max_inflight if args.mode == "open" else max(levels)
+    backend = build_load_backend(url, pool_size, args.timeout)
+
+    results, saturation, previous = [], None, None
+    try:
+        for i in range(len(MODEL_TYPES) * 2):  # connexions ouvertes avant la mesure
+            backend.predict(*questions[i][:2], THRESHOLD, MODEL_TYPES[i % len(MODEL_TYPES)])
+        for level in levels:
+            if args.mode == "open":
+                log, t0 = run_open_loop(backend, questions, level, args.duration, args.max_inflight, args.poisson)
+            else:
+                log, t0 = run_closed_loop(backend, questions, level, args.duration)
+            summary = summarize_level(log, t0, args.mode, level)
+            reason = saturation_reason(summary, previous, args.slo_ms)
+            summary["saturated"] = reason
+            results.append(summary)
+            unit = "req/s visées" if args.mode == "open" else "utilisateurs"
+            print(f"  {level:>7g} {unit:<13} {summary['throughput_per_s']:8.1f} req/s  "
+                  f"p50 {summary['p50_ms']:8.1f} ms  p95 {summary['p95_ms']:8.1f} ms  p99 {summary['p99_ms']:8.1f} ms  "
+                  f"erreurs {summary['error_rate']:6.1%}" + (f"  <-- saturé : {reason}" if reason else ""))
+            if reason and saturation is None:
+                saturation = level
+                if not args.keep_going:
+                    break
+            previous = summary
+    finally:
+        backend.client.close()
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    sustained = [r for r in results if not r["saturated"]]
+    best = max(sustained, key=lambda r: r["throughput_per_s"]) if sustained else None
+    if best is not None:
+        print(f"Débit maximal tenu : {best['throughput_per_s']:.1f} req/s "
+              f"(palier {best['level']:g}, p99 {best['p99_ms']:.0f} ms)")
+    print("Saturation : " + (f"palier {saturation:g}" if saturation is not None else "non atteinte"))
+
+    commit = _git_commit()
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": url if stub is None else "stub",
+        "mode": args.mode,
+        "duration_s": args.duration,
+        "poisson": args.poisson,
+        "slo_ms": args.slo_ms,
+    }
+    if stub is not None:
+        meta["stub"] = {"service_ms": args.stub_service_ms, "jitter_ms": args.stub_jitter_ms,
+                        "workers": args.stub_workers}
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"load_{stamp}_{commit}.json")
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "levels": results, "saturation_level": saturation,
+                   "max_sustained_throughput_per_s": best["throughput_per_s"] if best else None}, f, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Profil du démarrage à froid du dashboard : temps d'import par module et temps jusqu'au premier rendu
+# Script à lancer depuis la racine du dépôt :
+
+# python3 benchmarks/profile_startup.py                       # écrit benchmarks/results/startup_<date>_<commit>.json
+# python3 benchmarks/profile_startup.py --runs 5 --top 25
+# python3 benchmarks/profile_startup.py --conda-env streamlit_env   # + surcoût de `conda run`
+
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run_benchmarks import RESULTS_DIR, _git_commit  # noqa: E402
+
+MAIN_PATH = os.path.join(ROOT, "main.py")
+
+# Premier rendu : script main.py exécuté une fois par AppTest, contre le faux serveur
+# local (la latence réseau de l'API ne doit pas entrer dans la mesure)
+FIRST_RENDER_CHILD = """
+import os, sys, time
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+from stub_api import start_stub_server
+server, url = start_stub_server()
+os.environ["API_URL"] = url
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({main!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+script_s = time.perf_counter() - start
+errors = [str(e.value) for e in app.exception]
+print("@@" + repr((script_s, errors)))
+"""
+
+
+def dashboard_imports(main_path=MAIN_PATH):
+    """Modules importés au niveau supérieur de main.py, dans l'ordre."""
+    with open(main_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_profile(modules):
+    """Temps d'import (`python -X importtime`) : total et cumul par paquet de premier niveau.
+
+    Returns:
+        tuple: (durée totale en s, {paquet: durée cumulée en s}).
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    per_package = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            continue  # import imbriqué : déjà compté dans le cumul de son parent
+        package = name.strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0.0) + int(cumulative) / 1e6
+    return sum(per_package.values()), per_package
+
+
+def first_render():
+    """Durée (s) du lancement de l'interpréteur jusqu'à la fin du premier rendu, et du seul script."""
+    child = FIRST_RENDER_CHILD.format(root=ROOT, main=MAIN_PATH)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", child], cwd=ROOT, capture_output=True, text=True)
+    total_s = time.perf_counter() - start
+    marker = [line for line in completed.stdout.splitlines() if line.startswith("@@")]
+    if completed.returncode != 0 or not marker:
+        raise RuntimeError(f"Échec du premier rendu :\n{completed.stderr[-2000:]}")
+    script_s, errors = ast.literal_eval(marker[0][2:])
+    if errors:
+        raise RuntimeError(f"Exception dans main.py : {errors}")
+    return total_s, script_s
+
+
+def conda_run_overhead(env_name, runs):
+    """Surcoût (s) de `conda run -n env python -c pass` par rapport à l'interpréteur direct."""
+    def best(cmd):
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, capture_output=True, check=True)
+            durations.append(time.perf_counter() - start)
+        return min(durations)
+
+    direct = best([sys.executable, "-c", "pass"])
+    wrapped = best(["conda", "run", "-n", env_name, "python", "-c", "pass"])
+    return wrapped - direct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil du démarrage à froid du dashboard.")
+    parser.add_argument("--runs", type=int, default=3, help="Démarrages mesurés (on garde la médiane)")
+    parser.add_argument("--top", type=int, default=15, help="Paquets affichés")
+    parser.add_argument("--conda-env", default=None, help="Mesure aussi le surcoût de `conda run -n ENV`")
+    parser.add_argument("--output", default=None, help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    modules = dashboard_imports()
+    profiles = [import_profile(modules) for _ in range(args.runs)]
+    import_total = float(np.median([total for total, _ in profiles]))
+    packages = {
+        package: float(np.median([per_package.get(package, 0.0) for _, per_package in profiles]))
+        for package in profiles[0][1]
+    }
+    print(f"Imports de main.py ({', '.join(modules)}) : {import_total * 1e3:.0f} ms")
+    for package, seconds in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"  {package:<30} {seconds * 1e3:9.1f} ms")
+
+    renders = [first_render() for _ in range(args.runs)]
+    total_s = float(np.median([total for total, _ in renders]))
+    script_s = float(np.median([script for _, script in renders]))
+    print(f"Premier rendu : {total_s * 1e3:.0f} ms depuis le lancement de Python "
+          f"(dont exécution de main.py : {script_s * 1e3:.0f} ms)")
+
+    results = {"imports_ms": import_total * 1e3, "first_render_ms": total_s * 1e3, "first_script_run_ms": script_s * 1e3,
+               "packages_ms": {package: seconds * 1e3 for package, seconds in packages.items()}}
+    if args.conda_env:
+        overhead = conda_run_overhead(args.conda_env, args.runs)
+        results["conda_run_overhead_ms"] = overhead * 1e3
+        print(f"Surcoût de `conda run -n {args.conda_env}` : {overhead * 1e3:.0f} ms")
+
+    commit = _git_commit()
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"startup_{stamp}_{commit}.json")
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+
+if __name__ == "__main__":
+    main()
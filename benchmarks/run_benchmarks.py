@@ -0,0 +1,363 @@
+# Suite de benchmarks des chemins critiques du dashboard, résultats en JSON
+# Script à lancer depuis la racine du dépôt :
+
+# python3 benchmarks/run_benchmarks.py                       # tout, écrit benchmarks/results/<date>_<commit>.json
+# python3 benchmarks/run_benchmarks.py --only normalize --repeat 20
+# python3 benchmarks/run_benchmarks.py --compare ancien.json nouveau.json
+
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api_client import ApiClient, encode_json_body  # noqa: E402
+from backends import GZIP_MIN_BYTES, HttpBackend  # noqa: E402
+from dataset import load_dataset, load_shared_dataset  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from similarity import load_similarity_index  # noqa: E402
+from stub_api import start_stub_server  # noqa: E402
+from utils import (  # noqa: E402
+    TagVocabulary,
+    TextNormalizer,
+    _get_normalizer,
+    compute_metrics,
+    compute_row_scores,
+    coverage_score_true_pred,
+    coverage_score_true_pred_reference,
+    languages_frameworks,
+    normalize_text,
+    precision_at_k_true_pred,
+    precision_at_k_true_pred_reference,
+    tag_list_metrics,
+)
+
+DATA_PATH = os.path.join(ROOT, "test_data.csv")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+REGRESSION_TOLERANCE = 0.10  # +10 % sur le p50 = régression
+LOOP_MAX_CELLS = 1_000_000  # taille max. des matrices pour compute_metrics sans balayage
+
+# =============================================================
+# Mesure et résumé
+# =============================================================
+
+
+def run_samples(func, repeat, warmup=1):
+    """Durées (s) de `repeat` appels de `func`, après `warmup` appels non mesurés."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples, items_per_call=1):
+    """Percentiles (ms) et débit (éléments/s) d'une série de durées."""
+    samples = np.asarray(samples)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "calls": len(samples),
+        "items_per_call": items_per_call,
+        "mean_ms": samples.mean() * 1e3,
+        "min_ms": samples.min() * 1e3,
+        "p50_ms": p50 * 1e3,
+        "p95_ms": p95 * 1e3,
+        "p99_ms": p99 * 1e3,
+        "max_ms": samples.max() * 1e3,
+        "throughput_per_s": items_per_call * len(samples) / samples.sum(),
+    }
+
+
+# =============================================================
+# Benchmarks : chacun renvoie {nom: résumé}
+# =============================================================
+
+
+def bench_normalize(df, repeat):
+    # `normalize_text` tel que l'appelle le dashboard (conversion en tuple, lru_cache du normaliseur) :
+    # à froid juste après `cache_clear()` (construction comprise), puis à chaud
+    texts = df["Title"].str.cat(df["Body"], sep=" ").tolist()
+
+    def cold():
+        _get_normalizer.cache_clear()
+        normalize_text(texts[0], languages_frameworks)
+
+    normalizer = TextNormalizer(languages_frameworks)
+    results = {
+        "normalize_text/title_body": summarize(
+            run_samples(lambda: [normalize_text(text, languages_frameworks) for text in texts], repeat), len(texts)
+        ),
+        "normalize_text/cold": summarize(run_samples(cold, max(1, repeat // 5), warmup=0), 1),
+        # Normaliseur seul, sans la couche `normalize_text` (référence secondaire)
+        "normalize_text/raw_normalizer": summarize(
+            run_samples(lambda: normalizer.normalize_many(texts), repeat), len(texts)
+        ),
+    }
+    return results
+
+
+def bench_compute_metrics(df, repeat, sizes=((500, 50), (2000, 200), (5000, 500)), n_thresholds=20):
+    rng = np.random.default_rng(0)
+    thresholds = list(np.linspace(0.05, 0.95, n_thresholds))
+    results = {}
+    for n_samples, n_labels in sizes:
+        y_true = (rng.random((n_samples, n_labels)) < 0.02).astype(int)
+        y_probs = rng.random((n_samples, n_labels))
+        label = f"{n_samples}x{n_labels}"
+        # La boucle par seuil est lente : peu de répétitions, et pas sur la plus grande matrice
+        if n_samples * n_labels <= LOOP_MAX_CELLS:
+            results[f"compute_metrics/loop/{label}"] = summarize(
+                run_samples(lambda: compute_metrics(y_true, y_probs, thresholds), max(1, repeat // 5), warmup=0),
+                n_thresholds,
+            )
+        results[f"compute_metrics/sweep/{label}"] = summarize(
+            run_samples(lambda: compute_metrics(y_true, y_probs, thresholds, sweep=True), repeat),
+            n_thresholds,
+        )
+    return results
+
+
+def bench_list_metrics(df, repeat, replicate=50):
+    # Jeu de test répliqué : à 100 lignes, le coût fixe des matrices CSR masque le gain
+    y_true = [list(tags) for tags in df["FilteredTags"]] * replicate
+    y_pred = [list(tags) for tags in df["TagsList"]] * replicate
+    vocabulary = TagVocabulary(y_true, y_pred)
+
+    def reference():
+        coverage_score_true_pred_reference(y_true, y_pred)
+        precision_at_k_true_pred_reference(y_true, y_pred, k=5)
+        [compute_row_scores(true_tags, pred_tags, k=5) for true_tags, pred_tags in zip(y_true, y_pred)]
+
+    return {
+        "list_metrics/coverage_score_true_pred": summarize(
+            run_samples(lambda: coverage_score_true_pred(y_true, y_pred, vocabulary=vocabulary), repeat), len(y_true)
+        ),
+        "list_metrics/precision_at_k_true_pred": summarize(
+            run_samples(lambda: precision_at_k_true_pred(y_true, y_pred, k=5, vocabulary=vocabulary), repeat),
+            len(y_true),
+        ),
+        "list_metrics/all/reference": summarize(run_samples(reference, repeat), len(y_true)),
+        "list_metrics/all/tag_vocabulary": summarize(
+            run_samples(lambda: tag_list_metrics(y_true, y_pred, k=5, vocabulary=vocabulary), repeat), len(y_true)
+        ),
+    }
+
+
+def bench_api_predict(df, repeat):
+    """Latence de bout en bout d'un appel de prédiction contre le faux serveur local.
+
+    Passe par `HttpBackend.predict`, le chemin utilisé par `main.call_api_predict`.
+    """
+    server, url = start_stub_server()
+    try:
+        backend = HttpBackend(ApiClient(url))
+        rows = df[["Title", "Body"]].itertuples(index=False)
+        questions = [(title, body) for title, body in rows]
+        n_calls = max(repeat, 50)
+        position = {"i": 0}
+
+        def one_call():
+            title, body = questions[position["i"] % len(questions)]
+            position["i"] += 1
+            res = backend.predict(title, body, 0.5, "catboost")
+            if "error" in res:
+                raise RuntimeError(res["error"])
+
+        return {"call_api_predict/stub": summarize(run_samples(one_call, n_calls, warmup=5), 1)}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_payload(df, repeat, n_largest=20):
+    """Taille des requêtes et latence contre le faux serveur, en mode brut et compact.
+
+    Mesuré sur les `n_largest` questions au corps le plus long, là où le
+    mode compact doit faire gagner le plus d'octets.
+    """
+    server, url = start_stub_server()
+    try:
+        largest = df.assign(size=df["Body"].str.len()).nlargest(n_largest, "size")
+        questions = list(zip(largest["Title"], largest["Body"], largest["FilteredTags"].map(list)))
+        results = {}
+        for mode, compact in (("raw", False), ("compact", True)):
+            backend = HttpBackend(ApiClient(url), compact=compact)
+            request_bytes = []
+            for title, body, true_tags in questions:
+                payload = backend.build_payload(title, body, 0.5, "catboost", true_tags)
+                request_bytes.append(len(encode_json_body(payload, GZIP_MIN_BYTES if compact else None)[0]))
+            position = {"i": 0}
+
+            def one_call():
+                title, body, true_tags = questions[position["i"] % len(questions)]
+                position["i"] += 1
+                res = backend.predict(title, body, 0.5, "catboost", true_tags=true_tags)
+                if "error" in res:
+                    raise RuntimeError(res["error"])
+
+            summary = summarize(run_samples(one_call, max(repeat, len(questions)), warmup=2), 1)
+            summary["request_bytes_mean"] = float(np.mean(request_bytes))
+            summary["request_bytes_max"] = int(np.max(request_bytes))
+            results[f"payload/{mode}"] = summary
+            print(f"  payload/{mode:<37} requête moyenne {summary['request_bytes_mean']:9.0f} o, "
+                  f"max {summary['request_bytes_max']} o")
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_similarity(df, repeat):
+    index = load_similarity_index(DATA_PATH)
+    questions = list(zip(df["Title"], df["Body"]))
+    position = {"i": 0}
+
+    def by_row():
+        index.similar_to_row(position["i"] % len(index))
+        position["i"] += 1
+
+    def by_text():
+        title, body = questions[position["i"] % len(questions)]
+        index.similar_to_text(title, body)
+        position["i"] += 1
+
+    n_calls = max(repeat, 50)
+    return {
+        "similarity/row": summarize(run_samples(by_row, n_calls), 1),
+        "similarity/text": summarize(run_samples(by_text, n_calls), 1),
+    }
+
+
+def bench_search(df, repeat, replicate=100, queries=("tag:c++ sse", "python list", "tag:python", "how to the")):
+    # Jeu de test répliqué (10 000 questions) : la taille visée par le sélecteur
+    big = pd.concat([df] * replicate, ignore_index=True)
+    results = {
+        "search/build": summarize(
+            run_samples(lambda: SearchIndex.build(big["Title"], big["Body"], big["FilteredTags"]), max(1, repeat // 5),
+                        warmup=0),
+            len(big),
+        ),
+    }
+    index = SearchIndex.build(big["Title"], big["Body"], big["FilteredTags"])
+    for query in queries:
+        results[f"search/query/{query}"] = summarize(run_samples(lambda: index.search(query), max(repeat, 50)), 1)
+    return results
+
+
+def bench_dataset(df, repeat, replicate=100):
+    # st.cache_data désérialise une copie à chaque rerun ; le jeu partagé n'est ouvert qu'une fois
+    big = pd.concat([df] * replicate, ignore_index=True)
+    blob = pickle.dumps(big)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "big.csv")
+        big[["Title", "Body"]].assign(
+            TagsList=big["TagsList"].map(list).map(str), FilteredTags=big["FilteredTags"].map(list).map(str)
+        ).to_csv(csv_path, index=False)
+        paths = {"shared_path": os.path.join(tmp, "big.arrow"), "cache_path": os.path.join(tmp, "big.parquet")}
+        load_shared_dataset(csv_path, **paths)
+        shared_open = run_samples(lambda: load_shared_dataset(csv_path, **paths), max(1, repeat // 2))
+    return {
+        "dataset/cache_data_copy": summarize(run_samples(lambda: pickle.loads(blob), max(1, repeat // 2)), len(big)),
+        "dataset/shared_open": summarize(shared_open, len(big)),
+    }
+
+
+BENCHMARKS = {
+    "normalize": bench_normalize,
+    "compute_metrics": bench_compute_metrics,
+    "list_metrics": bench_list_metrics,
+    "api": bench_api_predict,
+    "payload": bench_payload,
+    "similarity": bench_similarity,
+    "search": bench_search,
+    "dataset": bench_dataset,
+}
+
+# =============================================================
+# Enregistrement et comparaison
+# =============================================================
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old_path, new_path, tolerance=REGRESSION_TOLERANCE):
+    """Affiche l'évolution du p50 de chaque benchmark commun ; renvoie le nombre de régressions."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    regressions = 0
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        before, after = old["results"][name]["p50_ms"], new["results"][name]["p50_ms"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  <-- régression"
+            regressions += 1
+        print(f"{name:<45} {before:10.3f} ms -> {after:10.3f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques du dashboard.")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Benchmarks à lancer (tous par défaut)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default=None, help="Fichier JSON de sortie")
+    parser.add_argument("--compare", nargs=2, metavar=("ANCIEN", "NOUVEAU"))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    df = load_dataset(args.data)
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[{name}]")
+        for key, summary in BENCHMARKS[name](df, args.repeat).items():
+            results[key] = summary
+            print(f"  {key:<45} p50 {summary['p50_ms']:9.3f} ms  p95 {summary['p95_ms']:9.3f} ms  "
+                  f"p99 {summary['p99_ms']:9.3f} ms  {summary['throughput_per_s']:12.1f} /s")
+
+    commit = _git_commit()
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": len(df),
+        "repeat": args.repeat,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{commit}.json")
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Résultats écrits dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# Évaluation de l'API sur tout test_data.csv (Partie 3 du dashboard, ou en ligne de commande)
+# Script à lancer depuis la racine du dépôt, ici contre le faux serveur :
+
+# python3 stub_api.py --port 5001 &
+# python3 bulk_eval.py --api-url http://localhost:5001/predict --workers 8
+
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from backends import BACKEND_HTTP, BACKEND_LOCAL, DEFAULT_API_SERVICE, InProcessBackend, build_backend
+from prediction_cache import FETCH_THRESHOLD
+from utils import parse_tags, tag_list_metrics, tag_list_per_tag_counts
+
+DATA_PATH = "test_data.csv"
+RESULTS_DIR = "results"
+MODEL_TYPES = ("catboost", "nmf")
+DEFAULT_WORKERS = 8
+DEFAULT_K = 5
+
+# =============================================================
+# Stockage local des scores par ligne (reprise après interruption)
+# =============================================================
+
+
+def results_path(service, model_version="", results_dir=RESULTS_DIR):
+    """Fichier de résultats propre à une source de scores (`backend.endpoint`) et une version de modèle."""
+    digest = hashlib.sha256(f"{service}|{model_version}".encode("utf-8")).hexdigest()[:12]
+    return os.path.join(results_dir, f"bulk_{digest}.jsonl")
+
+
+class ResultsStore:
+    """Scores par (ligne, modèle) dans un fichier JSON Lines en ajout seul.
+
+    Chaque résultat est écrit et vidé sur disque dès réception : une évaluation
+    interrompue reprend là où elle s'est arrêtée. Une dernière ligne tronquée
+    (arrêt brutal pendant l'écriture) est ignorée au rechargement, et retirée
+    du fichier pour que l'ajout suivant commence sur une ligne neuve.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._scores = {}
+        if os.path.exists(path):
+            complete = 0  # octets des lignes terminées par un saut de ligne
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._scores[(record["row"], record["model_type"])] = record["scores"]
+            if complete < os.path.getsize(path):
+                os.truncate(path, complete)
+
+    def __contains__(self, key):
+        return key in self._scores
+
+    def __len__(self):
+        return len(self._scores)
+
+    def add(self, row, model_type, scores):
+        record = json.dumps({"row": row, "model_type": model_type, "scores": scores}, ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(record + "\n")
+            self._scores[(row, model_type)] = scores
+
+    def scores(self, model_type):
+        """Dictionnaire {ligne: scores} pour un modèle."""
+        return {row: scores for (row, mt), scores in self._scores.items() if mt == model_type}
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+# =============================================================
+# Évaluation en masse avec concurrence bornée
+# =============================================================
+
+
+def run_bulk_evaluation(df, store, predict_fn, model_types=MODEL_TYPES, max_workers=DEFAULT_WORKERS,
+                        progress_callback=None, predict_batch_fn=None, batch_size=1):
+    """Interroge l'API pour chaque (ligne, modèle) absent du store.
+
+    Au plus `max_workers` requêtes sont en vol à la fois ; les lignes sont
+    soumises au fil de l'eau plutôt que toutes d'un coup. Les erreurs ne sont
+    pas enregistrées : elles seront retentées au prochain lancement.
+
+    Args:
+        df (pd.DataFrame): Jeu de test (colonnes Title et Body).
+        store (ResultsStore): Stockage des scores.
+        predict_fn (callable): predict_fn(title, body, model_type) -> réponse de l'API.
+        model_types (iterable): Modèles à évaluer.
+        max_workers (int): Nombre maximal de requêtes simultanées.
+        progress_callback (callable): Appelée dans le thread appelant avec (faits, total, erreurs).
+        predict_batch_fn (callable): predict_batch_fn([(titre, corps), ...], model_type) -> réponses ;
+            si fourni, les lignes sont envoyées par lots de `batch_size`.
+        batch_size (int): Nombre de lignes par lot avec `predict_batch_fn`.
+
+    Returns:
+        dict: "done" (déjà présents + nouveaux), "total" et "errors".
+    """
+    jobs = [(int(row), model_type) for row in df.index for model_type in model_types]
+    pending_jobs = [job for job in jobs if job not in store]
+    total = len(jobs)
+    done = total - len(pending_jobs)
+    errors = 0
+
+    if predict_batch_fn is None:
+        batches = iter([[job] for job in pending_jobs])
+
+        def task(batch):
+            (row, model_type), = batch
+            return [predict_fn(df.at[row, "Title"], df.at[row, "Body"], model_type)]
+    else:
+        # Un lot ne contient qu'un seul modèle
+        batches = iter([
+            rows[start:start + batch_size]
+            for model_type in model_types
+            for rows in [[job for job in pending_jobs if job[1] == model_type]]
+            for start in range(0, len(rows), batch_size)
+        ])
+
+        def task(batch):
+            questions = [(df.at[row, "Title"], df.at[row, "Body"]) for row, _ in batch]
+            return predict_batch_fn(questions, batch[0][1])
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk") as executor:
+        in_flight = {}
+        while True:
+            while len(in_flight) < max_workers:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                in_flight[executor.submit(task, batch)] = batch
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch = in_flight.pop(future)
+                try:
+                    responses = future.result()
+                except Exception as e:
+                    responses = [{"error": str(e)}] * len(batch)
+                for (row, model_type), res in zip(batch, responses):
+                    if "error" in res:
+                        errors += 1
+                    else:
+                        store.add(row, model_type, res.get("scores", {}))
+                        done += 1
+                if progress_callback is not None:
+                    progress_callback(done, total, errors)
+    return {"done": done, "total": total, "errors": errors}
+
+
+def ranked_tags(scores, threshold=0.0):
+    """Tags triés par score décroissant, restreints à ceux au-dessus du seuil."""
+    return [tag for tag, score in sorted(scores.items(), key=lambda x: x[1], reverse=True) if score >= threshold]
+
+
+def aggregate_metrics(df, store, model_types=MODEL_TYPES, k=DEFAULT_K, thresholds=None, vocabulary=None):
+    """Couverture, précision@k, rappel@k et F1@k par modèle, sur les lignes évaluées.
+
+    Les tags de référence sont les `FilteredTags`, comme dans les parties 1 et 2.
+
+    Args:
+        thresholds (dict): Seuil par modèle appliqué avant le top-k (0 par défaut).
+        vocabulary (utils.TagVocabulary): Vocabulaire partagé entre les appels (optionnel).
+
+    Returns:
+        pd.DataFrame: Une ligne par modèle.
+    """
+    thresholds = thresholds or {}
+    results = []
+    for model_type in model_types:
+        scores_by_row = store.scores(model_type)
+        rows = [row for row in df.index if int(row) in scores_by_row]
+        if not rows:
+            continue
+        threshold = thresholds.get(model_type, 0.0)
+        y_true = [parse_tags(df.at[row, "FilteredTags"]) for row in rows]
+        y_pred = [ranked_tags(scores_by_row[int(row)], threshold) for row in rows]
+        metrics = tag_list_metrics(y_true, y_pred, k=k, vocabulary=vocabulary)
+        results.append({
+            "ModelName": model_type,
+            "Rows": len(rows),
+            "Threshold": threshold,
+            "Coverage": metrics["coverage"],
+            f"Precision@{k}": metrics["precision"],
+            f"Recall@{k}": metrics["recall"],
+            f"F1@{k}": metrics["f1"],
+        })
+    return pd.DataFrame(results)
+
+
+def per_tag_metrics(df, store, model_type, k=DEFAULT_K, threshold=0.0, vocabulary=None):
+    """Précision@k, rappel@k et F1@k de chaque tag pour un modèle, sur les lignes évaluées.
+
+    Returns:
+        pd.DataFrame: Une ligne par tag vrai ou prédit au moins une fois, par support décroissant.
+    """
+    scores_by_row = store.scores(model_type)
+    rows = [row for row in df.index if int(row) in scores_by_row]
+    if not rows:
+        return pd.DataFrame(columns=["Tag", "Support", "Predicted", "Precision", "Recall", "F1"])
+    y_true = [parse_tags(df.at[row, "FilteredTags"]) for row in rows]
+    y_pred = [ranked_tags(scores_by_row[int(row)], threshold) for row in rows]
+    counts = tag_list_per_tag_counts(y_true, y_pred, k=k, vocabulary=vocabulary)
+    table = pd.DataFrame({
+        "Tag": counts["tags"],
+        "Support": counts["support"],
+        "Predicted": counts["predicted"],
+        "TruePositives": counts["true_positives"],
+    })
+    table = table[(table["Support"] > 0) | (table["Predicted"] > 0)].copy()
+    table["Precision"] = (table["TruePositives"] / table["Predicted"].where(table["Predicted"] > 0)).fillna(0.0)
+    table["Recall"] = (table["TruePositives"] / table["Support"].where(table["Support"] > 0)).fillna(0.0)
+    total = table["Precision"] + table["Recall"]
+    table["F1"] = (2 * table["Precision"] * table["Recall"] / total.where(total > 0)).fillna(0.0)
+    return table.drop(columns="TruePositives").sort_values(["Support", "Tag"], ascending=[False, True],
+                                                           ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Évaluation de l'API sur tout le jeu de test.")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://localhost:5001/predict"),
+                        help="URL de /predict, ou plusieurs séparées par des virgules")
+    parser.add_argument("--backend", choices=[BACKEND_HTTP, BACKEND_LOCAL], default=BACKEND_HTTP)
+    parser.add_argument("--artifact", action="append", default=[], metavar="MODELE=CHEMIN",
+                        help="Artefact du backend local, ex. catboost=models/catboost.joblib")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=256, help="Taille des lots (backend local)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--model-version", default="")
+    parser.add_argument("--service", default=os.getenv("API_SERVICE", DEFAULT_API_SERVICE),
+                        help="Nom stable de l'API (fichier de résultats indépendant des URLs)")
+    parser.add_argument("--restart", action="store_true", help="Efface les résultats déjà stockés.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Requêtes compactes (texte prénormalisé et tronqué, gzip, top-k des scores)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data, usecols=["Title", "Body", "FilteredTags"])
+    artifacts = dict(item.split("=", 1) for item in args.artifact)
+    backend = build_backend(args.backend, api_url=args.api_url, artifacts=artifacts, compact=args.compact,
+                            service=args.service)
+    model_types = tuple(artifacts) if args.backend == BACKEND_LOCAL else MODEL_TYPES
+    store = ResultsStore(results_path(backend.endpoint, args.model_version))
+    if args.restart:
+        store.clear()
+
+    def predict_fn(title, body, model_type):
+        return backend.predict(title, body, FETCH_THRESHOLD, model_type)
+
+    def progress(done, total, errors):
+        print(f"\r{done}/{total} prédictions, {errors} erreurs", end="", flush=True)
+
+    batch_kwargs = {}
+    if isinstance(backend, InProcessBackend):
+        batch_kwargs = {"predict_batch_fn": backend.predict_batch, "batch_size": args.batch_size}
+    summary = run_bulk_evaluation(df, store, predict_fn, model_types=model_types, max_workers=args.workers,
+                                  progress_callback=progress, **batch_kwargs)
+    print(f"\nRésultats stockés dans {store.path} ({summary['done']}/{summary['total']})")
+    print(aggregate_metrics(df, store, model_types=model_types, k=args.k).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# Conversion de test_data.csv en cache Parquet pré-parsé pour le dashboard
+# Script à lancer depuis la racine du dépôt (sinon le cache est construit au premier chargement) :
+
+# python3 dataset.py
+# python3 dataset.py --shared   # mesure aussi la copie partagée en mémoire (fichier Arrow projeté)
+
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import parse_tags
+
+DATA_PATH = "test_data.csv"
+CACHE_DIR = ".cache"
+# Colonnes utiles au dashboard : les colonnes title_body_* ne sont pas lues
+SOURCE_COLUMNS = ["Title", "Body", "TagsList", "FilteredTags"]
+TAG_COLUMNS = ["TagsList", "FilteredTags"]
+LABEL_LENGTH = 100
+CACHE_FORMAT_VERSION = "1"
+
+
+def cache_path_for(csv_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}.parquet")
+
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return f"{CACHE_FORMAT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_dataset_cache(csv_path=DATA_PATH, cache_path=None):
+    """Convertit le CSV en Parquet : tags déjà parsés en listes et libellés précalculés.
+
+    La colonne `Label` contient le libellé du sélecteur d'exemples
+    ("1 – Titre…"), construit une fois ici plutôt qu'à chaque rerun.
+
+    Returns:
+        str: Chemin du fichier Parquet écrit.
+    """
+    cache_path = cache_path or cache_path_for(csv_path)
+    df = pd.read_csv(csv_path, usecols=SOURCE_COLUMNS)
+    for column in TAG_COLUMNS:
+        df[column] = [parse_tags(raw) for raw in df[column]]
+    df["Label"] = [f"{i+1} – {title[:LABEL_LENGTH]}…" for i, title in enumerate(df["Title"])]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"source_fingerprint"] = _source_fingerprint(csv_path).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)  # écriture atomique : un lecteur ne voit jamais un fichier partiel
+    return cache_path
+
+
+def _cache_is_fresh(csv_path, cache_path):
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return metadata.get(b"source_fingerprint", b"").decode("utf-8") == _source_fingerprint(csv_path)
+
+
+def load_dataset(csv_path=DATA_PATH, columns=None, cache_path=None):
+    """Charge le jeu de test depuis le cache Parquet, reconstruit si le CSV a changé.
+
+    Args:
+        csv_path (str): CSV source.
+        columns (list): Colonnes à lire (toutes celles du cache par défaut).
+        cache_path (str): Emplacement du cache (dans `.cache/` par défaut).
+
+    Returns:
+        pd.DataFrame: Title, Body, TagsList et FilteredTags (listes de tags) et Label.
+    """
+    cache_path = cache_path or cache_path_for(csv_path)
+    if not _cache_is_fresh(csv_path, cache_path):
+        build_dataset_cache(csv_path, cache_path)
+    return pd.read_parquet(cache_path, columns=columns)
+
+
+# =============================================================
+# Jeu de test partagé entre les sessions (fichier Arrow IPC projeté en mémoire, lecture seule)
+# =============================================================
+
+
+def shared_path_for(csv_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}.arrow")
+
+
+def build_shared_cache(csv_path=DATA_PATH, shared_path=None, cache_path=None):
+    """Recopie le cache Parquet en fichier Arrow IPC non compressé, projetable en mémoire.
+
+    Le Parquet est compressé : le relire décode et alloue tout le jeu de
+    données. Le fichier IPC, lui, a la disposition mémoire d'Arrow ; ses
+    colonnes sont lues directement dans les pages du fichier.
+
+    Returns:
+        str: Chemin du fichier Arrow écrit.
+    """
+    shared_path = shared_path or shared_path_for(csv_path)
+    cache_path = cache_path or cache_path_for(csv_path)
+    if not _cache_is_fresh(csv_path, cache_path):
+        build_dataset_cache(csv_path, cache_path)
+    table = pq.read_table(cache_path)  # conserve l'empreinte du CSV dans les métadonnées
+
+    os.makedirs(os.path.dirname(shared_path) or ".", exist_ok=True)
+    tmp_path = shared_path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, shared_path)
+    return shared_path
+
+
+def _open_shared_table(shared_path):
+    # pa.memory_map ouvre en lecture seule : les tampons pointent dans les pages du fichier
+    return pa.ipc.open_file(pa.memory_map(shared_path, "r")).read_all()
+
+
+class SharedDataset:
+    """Jeu de test chargé une fois par processus et partagé, sans copie, par toutes les sessions.
+
+    `frame` est un DataFrame aux colonnes Arrow (`pd.ArrowDtype`) qui
+    référencent directement le fichier projeté en mémoire : aucune session
+    n'en reçoit de copie, et les pages sont partagées par le cache disque du
+    système entre processus. Le DataFrame est en lecture seule par contrat :
+    le modifier le modifierait pour toutes les sessions.
+
+    Args:
+        table (pa.Table): Table lue depuis le fichier Arrow projeté.
+        path (str): Fichier Arrow d'origine (pour la comptabilité mémoire).
+    """
+
+    def __init__(self, table, path=None):
+        self.table = table
+        self.path = path
+        self.frame = table.to_pandas(types_mapper=pd.ArrowDtype)
+        # Libellés du sélecteur convertis une fois, plutôt qu'à chaque rerun
+        self.labels = tuple(table.column("Label").to_pylist()) if "Label" in table.column_names else ()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def memory_usage(self):
+        """Empreinte mémoire en octets, pour dimensionner les conteneurs.
+
+        `arrow_bytes` : tampons des colonnes (projetés depuis `mapped_bytes`
+        octets de fichier, donc hors tas) ; `heap_bytes` : mémoire allouée par
+        Arrow dans le tas du processus (toutes tables confondues) ; `label_bytes` :
+        libellés du sélecteur convertis en objets Python.
+        """
+        return {
+            "rows": self.table.num_rows,
+            "arrow_bytes": int(self.table.nbytes),
+            "mapped_bytes": os.path.getsize(self.path) if self.path and os.path.exists(self.path) else 0,
+            "heap_bytes": int(pa.total_allocated_bytes()),
+            "label_bytes": sum(sys.getsizeof(label) for label in self.labels) + sys.getsizeof(self.labels),
+        }
+
+
+def load_shared_dataset(csv_path=DATA_PATH, shared_path=None, cache_path=None):
+    """Jeu de test partagé (voir `SharedDataset`), fichier Arrow reconstruit si le CSV a changé."""
+    shared_path = shared_path or shared_path_for(csv_path)
+    fresh = False
+    if os.path.exists(shared_path):
+        try:
+            table = _open_shared_table(shared_path)
+            metadata = table.schema.metadata or {}
+            fresh = metadata.get(b"source_fingerprint", b"").decode("utf-8") == _source_fingerprint(csv_path)
+        except (OSError, pa.ArrowInvalid):
+            pass
+    if not fresh:
+        build_shared_cache(csv_path, shared_path, cache_path)
+        table = _open_shared_table(shared_path)
+    return SharedDataset(table, shared_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit le cache Parquet du jeu de test.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--cache", default=None)
+    parser.add_argument("--shared", action="store_true", help="Construit et mesure aussi le fichier Arrow partagé")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_dataset_cache(args.data, args.cache)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pd.read_csv(args.data)
+    csv_time = time.perf_counter() - start
+    start = time.perf_counter()
+    load_dataset(args.data, cache_path=path)
+    parquet_time = time.perf_counter() - start
+
+    print(f"Cache écrit dans {path} ({os.path.getsize(path) / 1e3:.0f} Ko, CSV : {os.path.getsize(args.data) / 1e3:.0f} Ko)")
+    print(f"Construction : {build_time * 1e3:.0f} ms ; lecture CSV complète : {csv_time * 1e3:.1f} ms ; "
+          f"lecture du cache : {parquet_time * 1e3:.1f} ms")
+
+    if args.shared:
+        build_shared_cache(args.data, cache_path=path)
+        start = time.perf_counter()
+        shared = load_shared_dataset(args.data, cache_path=path)
+        shared_time = time.perf_counter() - start
+        usage = shared.memory_usage()
+        print(f"Copie partagée : ouverture en {shared_time * 1e3:.1f} ms ; "
+              + " ; ".join(f"{key} = {value}" for key, value in usage.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import pandas as pd
+from sklearn.metrics import f1_score, hamming_loss, jaccard_score
+
+from utils import compute_metrics_sweep, coverage_score, precision_at_k
+
+# =============================================================
+# Métriques multilabel s'appuyant sur scikit-learn (F1, Hamming loss, Jaccard)
+# Importé à la demande par utils : `from utils import compute_metrics` reste valable
+# =============================================================
+
+
+def compute_metrics(y_true, y_pred_probs, thresholds=[0.5], k=3, model_name=None, approach=None, sweep=False):
+    """Métriques multilabel pour chaque seuil de `thresholds`.
+
+    Avec `sweep=True`, délègue à `compute_metrics_sweep` (un seul tri des
+    scores pour tous les seuils) ; sinon chaque seuil est recalculé à partir
+    des métriques scikit-learn.
+    """
+    if sweep:
+        return compute_metrics_sweep(y_true, y_pred_probs, thresholds=thresholds, k=k,
+                                     model_name=model_name, approach=approach)
+    results = []
+    for threshold in thresholds:
+        y_pred = (y_pred_probs >= threshold).astype(int)
+        f1_micro = f1_score(y_true, y_pred, average="micro")
+        f1_macro = f1_score(y_true, y_pred, average="macro")
+        h_loss = hamming_loss(y_true, y_pred)
+        cov = coverage_score(y_true, y_pred)
+        prec_k = precision_at_k(y_true, y_pred_probs, k=k)
+        jac = jaccard_score_multilabel(y_true, y_pred)
+
+        metrics_dict ={
+            "ModelName": model_name,
+            "Threshold": threshold,
+            "F1_micro": f1_micro,
+            "F1_macro": f1_macro,
+            "HammingLoss": h_loss,
+            "Coverage": cov,
+            f"Precision@{k}": prec_k,
+            "Jaccard Score": jac
+            }
+        if approach is not None:
+            metrics_dict["Approach"] = approach
+        results.append(metrics_dict)
+    return pd.DataFrame(results)
+
+
+def jaccard_score_multilabel(y_true, y_pred):
+    """Calcule le Jaccard Score pour la classification multilabel."""
+    return jaccard_score(y_true, y_pred, average='macro')
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# =============================================================
+# Mesures de latence (étapes d'un rerun, appels de prédiction, caches)
+# =============================================================
+
+# Bornes des histogrammes cumulés, en secondes (format Prometheus)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_WINDOW = 500  # observations conservées par série pour les percentiles glissants
+METRIC_PREFIX = "dashboard"
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape_label_value(value):
+    # Format texte Prometheus : \\, \" et \n sont les seuls échappements des valeurs de labels
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in items) + "}"
+
+
+class _Series:
+    def __init__(self, buckets, window):
+        self.bucket_counts = [0] * (len(buckets) + 1)  # dernière case : +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+
+class MetricsRegistry:
+    """Registre de latences et compteurs partagé par tout le processus.
+
+    Chaque série (nom + labels) garde un histogramme cumulé (pour Prometheus)
+    et une fenêtre glissante des dernières observations (pour les percentiles
+    affichés dans le panneau d'administration).
+
+    Args:
+        buckets (tuple): Bornes supérieures des classes de l'histogramme, en secondes.
+        window (int): Taille de la fenêtre glissante par série.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=DEFAULT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._lock = threading.Lock()
+        self._series = {}
+        self._counters = {}
+        self._gauge_sources = {}
+
+    def observe(self, name, seconds, **labels):
+        """Enregistre une durée pour la série `name` et ses labels."""
+        key = (name, _labels_key(labels))
+        index = int(np.searchsorted(self.buckets, seconds, side="left"))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets, self.window)
+            series.bucket_counts[index] += 1
+            series.count += 1
+            series.total += seconds
+            series.recent.append(seconds)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_gauges(self, name, source):
+        """Déclare une source de jauges : `source()` renvoie {nom: valeur} à chaque export.
+
+        Sert notamment aux taux de hit des caches, lus au moment de l'export.
+        """
+        with self._lock:
+            self._gauge_sources[name] = source
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mesure la durée du bloc `with` dans la série `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+    def _gauges(self):
+        with self._lock:
+            sources = dict(self._gauge_sources)
+        gauges = {}
+        for source_name, source in sources.items():
+            try:
+                values = source()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{source_name}_{key}"] = value
+        return gauges
+
+    def snapshot(self):
+        """État courant sous forme sérialisable en JSON."""
+        with self._lock:
+            series = {key: (s.count, s.total, list(s.recent), list(s.bucket_counts)) for key, s in self._series.items()}
+            counters = dict(self._counters)
+        latencies = []
+        for (name, labels), (count, total, recent, bucket_counts) in sorted(series.items()):
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99]) if recent else (0.0, 0.0, 0.0)
+            latencies.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum_s": total,
+                "mean_ms": total / count * 1e3 if count else 0.0,
+                "p50_ms": float(p50) * 1e3,
+                "p95_ms": float(p95) * 1e3,
+                "p99_ms": float(p99) * 1e3,
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], np.cumsum(bucket_counts).tolist())),
+            })
+        return {
+            "latencies": latencies,
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters.items())],
+            "gauges": self._gauges(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Export au format texte d'exposition Prometheus."""
+        with self._lock:
+            series = {key: (s.count, s.total, list(s.bucket_counts)) for key, s in self._series.items()}
+            counters = dict(self._counters)
+        lines = []
+        seen = set()
+        for (name, labels), (count, total, bucket_counts) in sorted(series.items()):
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} histogram")
+                seen.add(metric)
+            cumulative = np.cumsum(bucket_counts).tolist()
+            for bound, value in zip([*map(str, self.buckets), "+Inf"], cumulative):
+                lines.append(f"{metric}_bucket{_format_labels(labels, {'le': bound})} {value}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+#: Registre du processus, partagé par toutes les sessions Streamlit
+METRICS = MetricsRegistry()
+
+
+class RerunClock:
+    """Chronomètre des étapes d'un rerun Streamlit.
+
+    `lap(stage)` enregistre le temps écoulé depuis l'étape précédente dans la
+    série `stage{stage=...}` ; `finish()` enregistre la durée totale du rerun.
+    Évite d'imbriquer tout le script dans des blocs `with`.
+    """
+
+    def __init__(self, registry=METRICS):
+        self.registry = registry
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.registry.observe("stage", now - self.last, stage=stage)
+        self.last = now
+
+    def finish(self):
+        self.registry.observe("rerun", time.perf_counter() - self.started)
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=METRICS):
+    """Expose `/metrics` (Prometheus) et `/metrics.json` sur un port dédié, dans un thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = registry.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -1,18 +1,33 @@
 import streamlit as st
 import pandas as pd
-import requests
 import os
+import uuid
 import numpy as np
-import ast
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import partial
+from api_client import parse_endpoints
+from backends import BACKEND_HTTP, DEFAULT_API_SERVICE, InProcessBackend, build_backend
+from prediction_cache import FETCH_THRESHOLD, PredictionCache, prediction_cache_key
+from dataset import load_shared_dataset
+from similarity import load_similarity_index, suggest_tags
+from prefetch import Prefetcher, neighbour_positions
+from search import load_search_index
+from rendering import STYLESHEET, ExampleRenderer, heading, tag_badges, warning
+from tag_stats import SOURCES as TAG_SOURCES, load_tag_statistics
+from instrumentation import METRICS, RerunClock, start_metrics_server
+from bulk_eval import ResultsStore, aggregate_metrics, per_tag_metrics, results_path, run_bulk_evaluation
 from utils import (
     coverage_score_true_pred,
     precision_at_k_true_pred,
     coverage_score,
     precision_at_k,
-    load_config
+    parse_tags,
+    load_config,
+    TagVocabulary
 )
 
 
+rerun_clock = RerunClock(METRICS)
 config = load_config(config_path="config.json")
 
 # --------- Config ---------
@@ -36,38 +51,260 @@ if not API_URL:
     else:
         # Par défaut en local
         API_URL = "http://localhost:5001/predict"
+# Une ou plusieurs instances de l'API : liste dans config.json ou URLs séparées par des virgules
+API_URL = parse_endpoints(API_URL)
 
 ###
 
 DATA_PATH = "test_data.csv"
 DEFAULT_THRESHOLD = 0.5
 NUM_EXAMPLES = 5  # pour afficher 5 exemples du test_data
+SEARCH_RESULTS = 50          # résultats de recherche proposés dans le sélecteur
+MAX_SELECTOR_OPTIONS = 200   # exemples proposés sans recherche (les premiers du jeu de test)
+# Caractères du corps envoyés avant « Afficher la suite » (0 : corps toujours complet)
+BODY_PREVIEW_CHARS = int(config.get("BODY_PREVIEW_CHARS", 1200))
+MODEL_LABELS = {"catboost": "CatBoost", "nmf": "NMF"}
+PREDICT_WORKERS = 8
+# Backend capable de répondre pour plusieurs modèles en une requête
+MULTI_MODEL_API = bool(config.get("MULTI_MODEL_API", False))
+# Version du modèle déployé : la changer invalide toutes les entrées du cache
+MODEL_VERSION = str(config.get("MODEL_VERSION", ""))
+# Nom stable de l'API (clés de cache, résultats de la Partie 3) : ne dépend pas des URLs des instances
+API_SERVICE = os.getenv("API_SERVICE") or config.get("API_SERVICE", DEFAULT_API_SERVICE)
+# "http" (API Flask) ou "local" (artefacts MODEL_ARTIFACTS chargés dans le processus)
+PREDICTION_BACKEND = os.getenv("PREDICTION_BACKEND") or config.get("PREDICTION_BACKEND", BACKEND_HTTP)
+MODEL_ARTIFACTS = config.get("MODEL_ARTIFACTS", {})
+# Requêtes compactes vers l'API (texte prénormalisé et tronqué, gzip, top-k des scores)
+COMPACT_PAYLOAD = os.getenv("COMPACT_PAYLOAD", "0") == "1" or bool(config.get("COMPACT_PAYLOAD", False))
+PREDICTION_CACHE_SIZE = 2048
+PREDICTION_CACHE_TTL = 3600  # s
+# Panneau d'instrumentation dans la barre latérale, et port optionnel pour /metrics (Prometheus)
+ADMIN_PANEL = os.getenv("DASHBOARD_ADMIN", "0") == "1" or bool(config.get("ADMIN_PANEL", False))
+METRICS_PORT = int(os.getenv("METRICS_PORT") or config.get("METRICS_PORT", 0))
+# Préchargement des exemples voisins de la Partie 1 (0 pour désactiver)
+PREFETCH_AHEAD = int(config.get("PREFETCH_AHEAD", 3))
+PREFETCH_BEHIND = int(config.get("PREFETCH_BEHIND", 1))
+PREFETCH_RATE = float(config.get("PREFETCH_RATE", 4.0))  # requêtes/s, toutes sessions confondues
+PREFETCH_WORKERS = 2
+BULK_WORKERS = 8  # requêtes simultanées maximum pendant l'évaluation complète
+BULK_K = 5
+TAG_STATS_TOP = 15  # tags affichés par défaut dans la Partie 4
+BULK_BATCH_SIZE = 256  # questions par lot avec le backend en mémoire
 
 # --------- Chargement des données ---------
-@st.cache_data
+# Cache Parquet (tags déjà parsés, libellés précalculés) recopié en fichier Arrow projeté
+# en mémoire : une seule copie par processus, partagée en lecture seule par toutes les
+# sessions (st.cache_data en renverrait une copie désérialisée à chaque rerun)
+@st.cache_resource
 def load_test_data():
-    return pd.read_csv(DATA_PATH)
-
-df_test = load_test_data()
+    dataset = load_shared_dataset(DATA_PATH)
+    METRICS.register_gauges("dataset", dataset.memory_usage)
+    return dataset
+
+test_dataset = load_test_data()
+df_test = test_dataset.frame
+rerun_clock.lap("data_load")
+
+# Index TF-IDF des questions (construit une fois, conservé dans .cache/)
+@st.cache_resource
+def get_similarity_index():
+    return load_similarity_index(DATA_PATH)
+
+# Index inversé Title/Body/FilteredTags du sélecteur d'exemples (conservé dans .cache/)
+@st.cache_resource
+def get_search_index():
+    return load_search_index(DATA_PATH)
+
+# Fréquences et co-occurrences des tags (matrices creuses conservées dans .cache/)
+@st.cache_resource
+def get_tag_statistics():
+    return load_tag_statistics(DATA_PATH)
+
+# --------- Export des mesures pour Prometheus (un seul serveur par processus) ---------
+@st.cache_resource
+def get_metrics_server(port):
+    return start_metrics_server(port)
+
+if METRICS_PORT:
+    get_metrics_server(METRICS_PORT)
+
+# --------- Backend de prédiction (API HTTP ou modèles chargés en mémoire) ---------
+# HttpBackend : client partagé (pool de connexions, timeouts, disjoncteur)
+@st.cache_resource
+def get_prediction_backend(kind, api_url):
+    return build_backend(
+        kind, api_url=api_url, artifacts=MODEL_ARTIFACTS, multi_model=MULTI_MODEL_API, compact=COMPACT_PAYLOAD,
+        service=API_SERVICE
+    )
 
 # --------- Fonction pour appeler l'API ---------
-def call_api_predict(title, body, threshold, model_type, true_tags=None):
-    payload = {
-        "title": title,
-        "body": body,
-        "threshold": threshold,
-        "model_type": model_type
-    }
-    if true_tags is not None:
-        payload["true_tags"] = true_tags
+def call_api_predict(title, body, threshold, model_type, true_tags=None, backend=None):
+    backend = backend if backend is not None else get_prediction_backend(PREDICTION_BACKEND, API_URL)
+    with METRICS.timer("predict", model=model_type, backend=PREDICTION_BACKEND):
+        res = backend.predict(title, body, threshold, model_type, true_tags=true_tags)
+    if "error" in res:
+        METRICS.increment("predict_errors", model=model_type)
+    return res
+
+# --------- Cache des scores (un changement de seuil ne rappelle pas l'API) ---------
+@st.cache_resource
+def get_prediction_cache():
+    cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+    METRICS.register_gauges("prediction_cache", cache.stats)
+    return cache
+
+# --------- Prédictions de tous les modèles en parallèle ---------
+@st.cache_resource
+def get_predict_executor():
+    return ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+
+# --------- Préchargement en arrière-plan (pool et débit bornés, partagés par les sessions) ---------
+@st.cache_resource
+def get_prefetcher():
+    prefetcher = Prefetcher(max_workers=PREFETCH_WORKERS, rate=PREFETCH_RATE)
+    METRICS.register_gauges("prefetch", prefetcher.stats)
+    return prefetcher
+
+def prefetch_scope():
+    # Une vague de préchargement par session : la suivante annule la précédente
+    if "prefetch_scope" not in st.session_state:
+        st.session_state["prefetch_scope"] = uuid.uuid4().hex
+    return st.session_state["prefetch_scope"]
+
+def prefetch_predictions(questions, model_types):
+    """Précharge dans le cache les scores de `questions` (couples titre, corps, true_tags).
+
+    Les premières questions de la liste sont envoyées en premier ; les
+    couples (question, modèle) déjà en cache sont ignorés.
+    """
+    cache = get_prediction_cache()
+    backend = get_prediction_backend(PREDICTION_BACKEND, API_URL)
+
+    def fetch(key, title, body, model_type, true_tags):
+        try:
+            res = call_api_predict(title, body, FETCH_THRESHOLD, model_type, true_tags, backend)
+        except Exception as e:
+            res = {"error": str(e)}
+        if "error" not in res:
+            cache.put(key, res)
+        return res
+
+    tasks = []
+    for title, body, true_tags in questions:
+        for model_type in model_types:
+            key = prediction_cache_key(title, body, model_type, backend.endpoint, MODEL_VERSION)
+            if key not in cache:
+                tasks.append((key, partial(fetch, key, title, body, model_type, true_tags)))
+    get_prefetcher().submit(prefetch_scope(), tasks)
+
+def relay_prefetched(prefetched, future):
+    # Résultat d'une requête préchargée reprise au premier plan, erreur comprise
     try:
-        response = requests.post(API_URL, json=payload)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": response.json().get("error", "Erreur inconnue")}
+        res = prefetched.result()
     except Exception as e:
-        return {"error": str(e)}
+        res = {"error": str(e)}
+    future.set_result(res if res is not None else {"error": "missing"})
+
+def submit_model_predictions(title, body, model_types, true_tags=None):
+    """Lance les prédictions de chaque modèle de `model_types` ; renvoie {model_type: Future}.
+
+    Tous les scores sont demandés (`FETCH_THRESHOLD`) : le seuil de chaque
+    panneau est appliqué à l'affichage, sans rappeler l'API.
+
+    Les scores déjà en cache donnent des Futures déjà résolus ; une requête
+    préchargée déjà partie est attendue plutôt que renvoyée ; les autres
+    modèles sont interrogés en même temps (en une seule requête si le backend
+    répond pour plusieurs modèles) : la latence est celle du modèle le plus
+    lent et non la somme des deux.
+    """
+    cache = get_prediction_cache()
+    backend = get_prediction_backend(PREDICTION_BACKEND, API_URL)
+    executor = get_predict_executor()
+    prefetcher = get_prefetcher()
+    futures = {}
+    missing = {}
+    for model_type in model_types:
+        key = prediction_cache_key(title, body, model_type, backend.endpoint, MODEL_VERSION)
+        futures[model_type] = Future()
+        cached = cache.get(key)
+        if cached is not None:
+            futures[model_type].set_result(cached)
+            continue
+        prefetched = prefetcher.take(key)
+        if prefetched is not None:
+            prefetched.add_done_callback(partial(relay_prefetched, future=futures[model_type]))
+        else:
+            missing[model_type] = key
+
+    # Chaque Future est toujours résolu (au pire avec {"error": ...}) : sinon le panneau attendrait indéfiniment
+    def store(model_type, res):
+        try:
+            if "error" not in res:
+                cache.put(missing[model_type], res)
+        except Exception:
+            pass  # échec de la mise en cache : le résultat est quand même affiché
+        futures[model_type].set_result(res)
+
+    if missing and backend.supports_multi:
+        def store_all(batch):
+            try:
+                results = batch.result() or {}
+            except Exception as e:
+                results = {model_type: {"error": str(e)} for model_type in missing}
+            for model_type in missing:
+                store(model_type, results.get(model_type, {"error": "missing"}))
+
+        missing_thresholds = {model_type: FETCH_THRESHOLD for model_type in missing}
+        executor.submit(backend.predict_multi, title, body, missing_thresholds, true_tags=true_tags) \
+            .add_done_callback(store_all)
+    else:
+        def predict_one(model_type):
+            try:
+                res = call_api_predict(title, body, FETCH_THRESHOLD, model_type, true_tags, backend)
+            except Exception as e:
+                res = {"error": str(e)}
+            store(model_type, res)
+
+        for model_type in missing:
+            executor.submit(predict_one, model_type)
+    return futures
+
+def iter_model_predictions(title, body, model_types, true_tags=None):
+    """Renvoie les couples (model_type, résultat) dans l'ordre d'arrivée (tous les scores)."""
+    futures = submit_model_predictions(title, body, model_types, true_tags=true_tags)
+    model_types = {future: model_type for model_type, future in futures.items()}
+    for future in as_completed(model_types):
+        yield model_types[future], future.result()
+
+def predict_all_models(title, body, thresholds, true_tags=None):
+    """Prédictions de tous les modèles de `thresholds` ({model_type: seuil}), interrogés en parallèle.
+
+    Les scores sont mis en cache pour tous les seuils ; chaque réponse ne garde
+    que ceux au-dessus du seuil de son modèle.
+    """
+    results = {}
+    for model_type, res in iter_model_predictions(title, body, tuple(thresholds), true_tags=true_tags):
+        if "scores" in res:
+            threshold = thresholds[model_type]
+            res = {**res, "scores": {tag: score for tag, score in res["scores"].items() if score >= threshold}}
+        results[model_type] = res
+    return results
+
+# --------- Rendu HTML (feuille de style commune, octets envoyés par rerun) ---------
+# Fragments HTML des exemples, construits une fois par (ligne, partie) pour toutes les sessions
+@st.cache_resource
+def get_example_renderer():
+    return ExampleRenderer(df_test, preview_chars=BODY_PREVIEW_CHARS)
+
+def markdown_html(html, part):
+    # Compte les octets HTML envoyés : cumul par partie et total du rerun en cours
+    size = len(html.encode("utf-8"))
+    METRICS.increment("html_bytes", size, part=part)
+    st.session_state["html_bytes_rerun"] = st.session_state.get("html_bytes_rerun", 0) + size
+    st.markdown(html, unsafe_allow_html=True)
+
+st.session_state["html_bytes_rerun"] = 0
+markdown_html(STYLESHEET, "stylesheet")
 
 # --------- Titre et description ---------
 st.title("🔍 Prédiction automatique de tags Stack Overflow")
@@ -108,237 +345,367 @@ Soumettez votre propre question (titre + description) pour obtenir une prédicti
 """)
 
 
-st.subheader("📌 Partie 1 – Exemples issus du jeu de test : choisissez avec la barre de gauche")
-
-# --- Ajout du slider threshold dans les exemples prédéfinis
-st.sidebar.markdown("### Réglage des seuils de prédiction (exemples ci-dessous)")
+rerun_clock.lap("intro")
 
-cb_threshold = st.sidebar.slider(
-    "Seuil CatBoost",
-    min_value=0.0,
-    max_value=1.0,
-    value=DEFAULT_THRESHOLD,
-    step=0.01,
-    key="catboost_threshold"
-)
+st.subheader("📌 Partie 1 – Exemples issus du jeu de test")
 
-nmf_threshold = st.sidebar.slider(
-    "Seuil NMF",
-    min_value=0.0,
-    max_value=1.0,
-    value=DEFAULT_THRESHOLD,
-    step=0.01,
-    key="nmf_threshold"
-)
+# --------- Affichage des exemples ---------
 
+options = range(len(test_dataset))
+labels = test_dataset.labels
 
-# --------- Affichage des exemples ---------
 
-def render_tags_as_badges(tag_list):
-    badges = " ".join([
-        f"<span style='background-color:#e8ddff; border-radius:12px; padding:6px 12px; margin:4px; display:inline-block; color:#3c0066; font-weight:500;'>{tag}</span>"
-        for tag in tag_list
-    ])
-    return f"<div style='font-size:18px; line-height:2.2;'>{badges}</div>"
-
-def render_tags_simple(label, tags):
-    if isinstance(tags, str):
-        tags = tags.strip("[]").replace("'", "").split(", ")
-    badges = " ".join([
-        f"<span style='color:#2f4f2f; font-weight:600; padding:4px 10px; border-radius:12px; background-color:#b6d7a8; margin:4px 6px 4px 0; display:inline-block;'>{tag}</span>"
-        for tag in tags if tag
-    ])
-    return f"""
-    <div style='font-size:16px; font-weight:bold; color:#000; margin-bottom:4px;'>{label} :</div>
-    <div>{badges}</div>
-    """
+# Panneau des prédictions d'un modèle pour l'exemple choisi
+def render_example_panel(model_type, res, threshold, true_tags):
+    label = MODEL_LABELS[model_type]
+    if "error" in res:
+        st.error(f"Erreur {label}: {res['error']}")
+        return
+    with st.expander(f"📎 Afficher les prédictions {label}"):
+        markdown_html(heading(f"Tags prédits ({label}) et métriques"), "prediction")
 
+        # --- Application du threshold sur les tags
+        scores = res.get("scores", {})
+        filtered_tags = [tag for tag, score in scores.items() if score >= threshold]
 
-def render_text_area_custom(text, height=150):
-    html = f"""
-    <div style="
-        white-space: pre-wrap;
-        background-color: #f5f7fa;  /* fond très pâle, légèrement bleu-gris */
-        color: #2c3e50;  /* texte foncé mais doux, bleu foncé */
-        padding: 10px;
-        border: 1px solid #cbd5e1;
-        border-radius: 6px;
-        height: {height}px;
-        overflow-y: auto;
-        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        font-size: 15px;
-        line-height: 1.4;
-    ">{text}</div>
-    """
-    return html
+        # --- Affichage des tags filtrés
+        st.markdown(f"**Threshold utilisé** : {threshold:.2f}")
+        if filtered_tags:
+            markdown_html(tag_badges(filtered_tags), "prediction")
+        else:
+            markdown_html(warning(f"⚠️ Aucun tag prédit ({label}) avec ce seuil."), "prediction")
+        # --- Métriques recalculées sur les tags filtrés
+        if true_tags and filtered_tags:
+            n_correct = len(set(filtered_tags) & set(true_tags))
+            coverage = 1.0 if n_correct > 0 else 0.0
+            precision = n_correct / len(filtered_tags)
+            st.markdown(f"📊 Couverture : {'✅ Oui' if coverage == 1.0 else '❌ Non'} (au moins un tag correct prédit)")
+            st.markdown(f"📊 Précision sur les tags prédits : {precision:.2f} (proportion de tags corrects parmi les tags prédits)")
+
+
+# Questions les plus proches (index TF-IDF) et tags suggérés à partir de leurs FilteredTags
+def render_similar_questions(neighbours):
+    with st.expander("🔎 Questions similaires du jeu de test"):
+        if not neighbours:
+            st.info("Aucune question similaire trouvée.")
+            return
+        suggested = suggest_tags(neighbours, df_test["FilteredTags"])
+        st.markdown("**Tags suggérés par les questions voisines** (référence par recherche, sans modèle) :")
+        markdown_html(tag_badges([tag for tag, _ in suggested]), "similar")
+        for row, score in neighbours:
+            tags = ", ".join(parse_tags(df_test.at[row, "FilteredTags"]))
+            st.markdown(f"- **{score:.2f}** – {labels[row]} ({tags})")
+
+
+# Chaque partie est un fragment : une interaction ne réexécute que le fragment qui
+# contient le widget (le seuil NMF ne redessine que le panneau NMF, etc.)
+@st.fragment
+def model_panel(model_type, true_tags, prediction):
+    with METRICS.timer("fragment", fragment=f"{model_type}_panel"):
+        label = MODEL_LABELS[model_type]
+        threshold = st.slider(
+            f"Seuil {label}", min_value=0.0, max_value=1.0, value=DEFAULT_THRESHOLD, step=0.01,
+            key=f"{model_type}_threshold"
+        )
+        render_example_panel(model_type, prediction.result(), threshold, true_tags)
+
+
+@st.fragment
+def example_viewer():
+    with METRICS.timer("fragment", fragment="example_viewer"):
+        st.markdown(
+            "Choisissez un exemple dans la liste pour afficher son titre, sa description "
+            "et les tags prédits par les modèles."
+        )
+        # Seuls les meilleurs résultats (ou les premiers exemples) sont envoyés au navigateur
+        query = st.text_input("🔎 Rechercher un exemple (mots-clés, `tag:python`…)", key="example_query")
+        if query.strip():
+            with METRICS.timer("search"):
+                rows, total = get_search_index().search(query, n=SEARCH_RESULTS)
+            choices = rows.tolist()
+            st.caption(f"{total} question(s) trouvée(s)"
+                       + (f", les {len(choices)} plus pertinentes sont proposées" if total > len(choices) else ""))
+        else:
+            choices = options[:MAX_SELECTOR_OPTIONS]
+            if len(options) > len(choices):
+                st.caption(f"{len(choices)} premiers exemples sur {len(options)} : utilisez la recherche pour les autres")
+        if not choices:
+            st.info("Aucune question ne correspond à la recherche.")
+            return
+        i = st.selectbox("Choisissez un exemple", choices, format_func=lambda idx: labels[idx], key="example_index")
+
+        st.markdown(f"### Exemple {i+1}")
+        renderer = get_example_renderer()
+        st.markdown("**Titre :**")
+        markdown_html(renderer.render(i, "title"), "title")
+        st.markdown("**Question :**")
+        # Corps long : aperçu seulement, la suite n'est envoyée qu'à la demande
+        expanded = False
+        if renderer.is_truncated(i):
+            expanded = st.toggle("Afficher la suite de la question", key=f"show_full_body_{i}")
+        markdown_html(renderer.render(i, "body", expanded=expanded), "body")
+
+        markdown_html(renderer.render(i, "tags"), "tags")
+        markdown_html(renderer.render(i, "filtered_tags"), "tags")
+
+        true_tags = parse_tags(df_test.loc[i, "FilteredTags"])
+        # Les deux modèles sont interrogés en même temps ; chaque panneau attend son résultat
+        predictions = submit_model_predictions(
+            title=df_test.loc[i, "Title"],
+            body=df_test.loc[i, "Body"],
+            model_types=tuple(MODEL_LABELS),
+            true_tags=true_tags
+        )
+        # Exemples voisins préchargés pendant la lecture de celui-ci (le suivant d'abord)
+        if PREFETCH_AHEAD or PREFETCH_BEHIND:
+            positions = neighbour_positions(choices.index(i), len(choices), PREFETCH_AHEAD, PREFETCH_BEHIND)
+            prefetch_predictions(
+                [(df_test.loc[choices[p], "Title"], df_test.loc[choices[p], "Body"],
+                  parse_tags(df_test.loc[choices[p], "FilteredTags"])) for p in positions],
+                tuple(MODEL_LABELS)
+            )
+        # Emplacements des panneaux créés d'abord, puis remplis dans l'ordre d'arrivée :
+        # le panneau NMF n'attend pas la réponse CatBoost
+        slots = {}
+        for model_type in predictions:
+            slots[model_type] = st.empty()
+            slots[model_type].info(f"⏳ Prédiction {MODEL_LABELS[model_type]} en cours…")
+        model_types = {future: model_type for model_type, future in predictions.items()}
+        for prediction in as_completed(model_types):
+            model_type = model_types[prediction]
+            with slots[model_type].container():
+                model_panel(model_type, true_tags, prediction)
+
+        with METRICS.timer("similar_questions"):
+            neighbours = get_similarity_index().similar_to_row(i)
+        render_similar_questions(neighbours)
+
+
+example_viewer()
+rerun_clock.lap("example_viewer")
 
+st.divider()
 
-st.sidebar.markdown("""
-    <h2>📚 Exemples prédéfinis</h2>
-    <p style="font-size:14px; line-height:1.4;">
-        Choisissez un exemple dans la liste pour afficher ses détails, son titre, sa description, et les tags prédits par les modèles.
-    </p>
-    """, unsafe_allow_html=True)
-options = df_test.index.tolist()
-labels = [f"{i+1} – {row['Title'][:100]}…" for i, row in df_test.iterrows()]
-i = st.sidebar.selectbox("Choisissez un exemple", options, format_func=lambda idx: labels[idx])
+# --------- Entrée manuelle ---------
 
 
-st.markdown(f"### Exemple {i+1}")
+st.subheader("✍️ Partie 2 – Testez votre propre question")
 
-    
-st.markdown("**Titre :**")
-st.markdown(render_text_area_custom(df_test.loc[i, "Title"], height=40), unsafe_allow_html=True)
-st.markdown("**Question :**")
-st.markdown(render_text_area_custom(df_test.loc[i, "Body"], height=110), unsafe_allow_html=True)
+def render_manual_panel(model_type, res, threshold):
+    label = MODEL_LABELS[model_type]
+    if "error" in res:
+        st.error(f"Erreur {label} : {res['error']}")
+        return
+    scores = res.get("scores", {})
+    # Filtrage et tri des tags par score décroissant
+    sorted_scores = dict(sorted(scores.items(), key=lambda x: x[1], reverse=True))
+    filtered_tags = [tag for tag, score in sorted_scores.items() if score >= threshold]
+    if filtered_tags:
+        st.markdown(f"✅ Tags prédits ({label}, seuil ≥ {threshold}) :", unsafe_allow_html=True)
+        markdown_html(tag_badges(filtered_tags), "prediction")
+    else:
+        markdown_html(warning(f"⚠️ Aucun tag prédit ({label}) avec un seuil ≥ {threshold}."), "prediction")
+    if sorted_scores:
+        st.markdown(f"**📊 Scores associés ({label})**")
+        st.json(sorted_scores)
+
+
+@st.fragment
+def manual_input_form():
+    with METRICS.timer("fragment", fragment="manual_input"), st.form("manual_input"):
+        title = st.text_input("Titre de la question")
+        body = st.text_area("Contenu de la question")
+        threshold = st.slider("Seuil de prédiction", 0.0, 1.0, DEFAULT_THRESHOLD, 0.01)
+        submitted = st.form_submit_button("Prédire les tags")
+
+        if submitted:
+            if not title or not body:
+                st.warning("Veuillez remplir le titre et le corps.")
+            else:
+                manual_panels = {model_type: st.empty() for model_type in MODEL_LABELS}
+                for model_type, placeholder in manual_panels.items():
+                    placeholder.info(f"⏳ Prédiction {MODEL_LABELS[model_type]} en cours…")
+                for model_type, res in iter_model_predictions(title=title, body=body, model_types=tuple(MODEL_LABELS)):
+                    with manual_panels[model_type].container():
+                        render_manual_panel(model_type, res, threshold)
+                with METRICS.timer("similar_questions"):
+                    neighbours = get_similarity_index().similar_to_text(title, body)
+                render_similar_questions(neighbours)
 
 
-st.markdown(render_tags_simple("🗂️ Tous les tags d'origine (TagsList)", df_test.loc[i, 'TagsList']), unsafe_allow_html=True)
-st.markdown(render_tags_simple("✅ Tags retenus (FilteredTags)", df_test.loc[i, 'FilteredTags']), unsafe_allow_html=True)
+manual_input_form()
+rerun_clock.lap("manual_input")
 
+st.divider()
 
-true_tags_raw = df_test.loc[i, "FilteredTags"]
-try:
-    true_tags = ast.literal_eval(true_tags_raw) if isinstance(true_tags_raw, str) else true_tags_raw
-except Exception:
-    true_tags = []
+# --------- Évaluation complète du jeu de test ---------
 
+st.subheader("🧮 Partie 3 – Évaluation sur tout le jeu de test")
+st.markdown(
+    f"Envoie les {len(df_test)} questions du jeu de test à l'API pour les deux modèles "
+    f"(au plus {BULK_WORKERS} requêtes simultanées). Les scores sont stockés localement : "
+    "une évaluation interrompue reprend là où elle s'était arrêtée. Les métriques utilisent "
+    "les seuils des panneaux de la Partie 1 (mis à jour à la prochaine interaction hors de ces panneaux)."
+)
 
-# Prédiction CatBoost
-with st.spinner("⏳ Prédiction en cours…"):
-    res_catboost = call_api_predict(
-        title=df_test.loc[i, "Title"],
-        body=df_test.loc[i, "Body"],
-        threshold=cb_threshold,
-        model_type="catboost",
-        true_tags=true_tags
+# Fichier de résultats relu une fois par processus, et non à chaque rerun ; l'entrée est
+# oubliée quand les résultats sont effacés ou qu'une évaluation se termine (streamlit 1.37
+# ne vide pas une seule entrée : il n'y a qu'un fichier par source de scores et version)
+@st.cache_resource
+def get_results_store(path):
+    return ResultsStore(path)
+
+bulk_backend = get_prediction_backend(PREDICTION_BACKEND, API_URL)
+bulk_store = get_results_store(results_path(bulk_backend.endpoint, MODEL_VERSION))
+col_run, col_reset = st.columns(2)
+run_bulk = col_run.button("▶️ Lancer / reprendre l'évaluation")
+if col_reset.button("🗑️ Effacer les résultats stockés"):
+    bulk_store.clear()
+    get_results_store.clear()
+
+if run_bulk:
+    progress_bar = st.progress(0.0, text="Évaluation en cours…")
+
+    def bulk_predict(title, body, model_type):
+        return call_api_predict(title, body, threshold=FETCH_THRESHOLD, model_type=model_type, backend=bulk_backend)
+
+    def bulk_progress(done, total, errors):
+        progress_bar.progress(done / total, text=f"{done}/{total} prédictions – {errors} erreur(s)")
+
+    # En mémoire, les questions sont vectorisées et scorées par lots
+    batch_kwargs = {}
+    if isinstance(bulk_backend, InProcessBackend):
+        batch_kwargs = {"predict_batch_fn": bulk_backend.predict_batch, "batch_size": BULK_BATCH_SIZE}
+    summary = run_bulk_evaluation(
+        df_test, bulk_store, bulk_predict,
+        model_types=tuple(MODEL_LABELS), max_workers=BULK_WORKERS, progress_callback=bulk_progress,
+        **batch_kwargs
     )
-if "error" not in res_catboost:
-    with st.expander("📎 Afficher les prédictions CatBoost"):
-        st.markdown("<div style='font-size:18px; font-weight:bold; color:#000; margin-bottom:8px;'>Tags prédits (CatBoost) et métriques</div>", unsafe_allow_html=True)
-        
-        # --- Application du threshold sur les tags
-        scores_cat = res_catboost.get("scores", {})
-        filtered_tags_cat = [tag for tag, score in scores_cat.items() if score >= cb_threshold]
-        
-        # --- Affichage des tags filtrés
-        st.markdown(f"**Threshold utilisé** : {cb_threshold:.2f}")
-        if filtered_tags_cat:
-            st.markdown(render_tags_as_badges(filtered_tags_cat), unsafe_allow_html=True)
-        else:
-            st.markdown(
-                "<div style='background-color:#f9d342; color:#5a3e00; padding:10px; border-radius:6px; font-weight:bold;'>"
-                "⚠️ Aucun tag prédit (CatBoost) avec ce seuil."
-                "</div>", unsafe_allow_html=True
-            )
-        # --- Métriques recalculées sur les tags filtrés
-        if true_tags and filtered_tags_cat:
-            n_correct = len(set(filtered_tags_cat) & set(true_tags))
-            coverage_cat = 1.0 if n_correct > 0 else 0.0
-            precision_cat = n_correct / len(filtered_tags_cat)
-            st.markdown(f"📊 Couverture : {'✅ Oui' if coverage_cat == 1.0 else '❌ Non'} (au moins un tag correct prédit)")
-            st.markdown(f"📊 Précision sur les tags prédits : {precision_cat:.2f} (proportion de tags corrects parmi les tags prédits)")
-        
-
-
-
-else:
-    st.error(f"Erreur CatBoost: {res_catboost['error']}")
-
-# Prédiction NMF
-with st.spinner("⏳ Prédiction en cours…"):
-    res_nmf = call_api_predict(
-        title=df_test.loc[i, "Title"],
-        body=df_test.loc[i, "Body"],
-        threshold=nmf_threshold,
-        model_type="nmf",
-        true_tags=true_tags
+    get_results_store.clear()
+    if summary["errors"]:
+        st.warning(f"{summary['errors']} prédiction(s) en erreur : relancez pour les reprendre.")
+
+@st.cache_resource
+def get_tag_vocabulary():
+    # Tags du jeu de test internés une fois : les métriques réutilisent les mêmes identifiants
+    return TagVocabulary(df_test["TagsList"], df_test["FilteredTags"])
+
+if len(bulk_store):
+    bulk_metrics = aggregate_metrics(
+        df_test, bulk_store, model_types=tuple(MODEL_LABELS), k=BULK_K,
+        thresholds={model_type: st.session_state.get(f"{model_type}_threshold", DEFAULT_THRESHOLD)
+                    for model_type in MODEL_LABELS},
+        vocabulary=get_tag_vocabulary()
     )
-if "error" not in res_nmf:
-    with st.expander("📎 Afficher les prédictions"):
-        st.markdown("<div style='font-size:18px; font-weight:bold; color:#000; margin-bottom:8px;'>Tags prédits (NMF) et métriques</div>", unsafe_allow_html=True)
-        
-        # --- Application du threshold sur les tags
-        scores_nmf = res_nmf.get("scores", {})
-        filtered_tags_nmf = [tag for tag, score in scores_nmf.items() if score >= nmf_threshold]
-        
-        # --- Affichage des tags filtrés
-        st.markdown(f"**Threshold utilisé** : {nmf_threshold:.2f}")
-        if filtered_tags_nmf:
-            st.markdown(render_tags_as_badges(filtered_tags_nmf), unsafe_allow_html=True)
-        else:
-            st.markdown(
-                "<div style='background-color:#f9d342; color:#5a3e00; padding:10px; border-radius:6px; font-weight:bold;'>"
-                "⚠️ Aucun tag prédit (NMF) avec ce seuil."
-                "</div>", unsafe_allow_html=True
-            )
-        # --- Métriques recalculées sur les tags filtrés
-        if true_tags and filtered_tags_nmf:
-            n_correct = len(set(filtered_tags_nmf) & set(true_tags))
-            coverage_nmf = 1.0 if n_correct > 0 else 0.0
-            precision_nmf = n_correct / len(filtered_tags_nmf)
-            st.markdown(f"📊 Couverture : {'✅ Oui' if coverage_nmf == 1.0 else '❌ Non'} (au moins un tag correct prédit)")
-            st.markdown(f"📊 Précision sur les tags prédits : {precision_nmf:.2f} (proportion de tags corrects parmi les tags prédits)")
-else:
-    st.error(f"Erreur NMF: {res_nmf['error']}")
+    bulk_metrics["ModelName"] = bulk_metrics["ModelName"].map(MODEL_LABELS)
+    st.dataframe(bulk_metrics, hide_index=True)
+    st.caption(f"{len(bulk_store)} / {len(df_test) * len(MODEL_LABELS)} prédictions stockées")
+
+rerun_clock.lap("bulk_evaluation")
 
 st.divider()
 
-# --------- Entrée manuelle ---------
+# --------- Analyse des tags du jeu de test ---------
+
+st.subheader("📊 Partie 4 – Analyse des tags du jeu de test")
+
+@st.fragment
+def tag_analytics():
+    with METRICS.timer("fragment", fragment="tag_analytics"):
+        stats = get_tag_statistics()
+        dropped = stats.dropped_fraction()
+        col_rows, col_occ, col_distinct, col_avg = st.columns(4)
+        col_rows.metric("Questions", stats.n_rows)
+        col_occ.metric("Occurrences retirées par le filtrage", f"{dropped['occurrences']:.1%}")
+        col_distinct.metric("Tags distincts retirés", f"{dropped['distinct']:.1%}")
+        col_avg.metric(
+            "Tags par question",
+            f"{stats.tags_per_question('FilteredTags'):.2f}",
+            delta=f"{stats.tags_per_question('FilteredTags') - stats.tags_per_question('TagsList'):.2f}",
+        )
+
+        col_top, col_source = st.columns(2)
+        top_n = col_top.slider("Nombre de tags affichés", 5, 50, TAG_STATS_TOP, key="tag_stats_top")
+        source = col_source.selectbox("Colonne des co-occurrences", TAG_SOURCES,
+                                      index=TAG_SOURCES.index("FilteredTags"), key="tag_stats_source")
+
+        st.markdown("**Tags les plus fréquents**")
+        st.dataframe(stats.frequency_table(top_n), hide_index=True,
+                     column_config={"Part conservée": st.column_config.ProgressColumn(min_value=0, max_value=1)})
+
+        st.markdown(f"**Co-occurrences des {top_n} tags les plus fréquents ({source})**")
+        st.dataframe(stats.top_cooccurrences(source, top_n))
+
+        # Précision/rappel par tag, à partir des scores stockés de la Partie 3
+        if len(bulk_store):
+            model_type = st.selectbox("Modèle", tuple(MODEL_LABELS), format_func=MODEL_LABELS.get,
+                                      key="tag_stats_model")
+            st.markdown("**Précision et rappel par tag (FilteredTags, top-k au-dessus du seuil)**")
+            st.dataframe(
+                per_tag_metrics(
+                    df_test, bulk_store, model_type, k=BULK_K,
+                    threshold=st.session_state.get(f"{model_type}_threshold", DEFAULT_THRESHOLD),
+                    vocabulary=get_tag_vocabulary(),
+                ).head(top_n),
+                hide_index=True,
+            )
+        else:
+            st.caption("Lancez l'évaluation de la Partie 3 pour obtenir la précision et le rappel par tag.")
 
 
-st.subheader("✍️ Partie 2 – Testez votre propre question")
+tag_analytics()
+rerun_clock.lap("tag_analytics")
 
-with st.form("manual_input"):
-    title = st.text_input("Titre de la question")
-    body = st.text_area("Contenu de la question")
-    threshold = st.slider("Seuil de prédiction", 0.0, 1.0, DEFAULT_THRESHOLD, 0.01)
-    submitted = st.form_submit_button("Prédire les tags")
+# --------- Statistiques du cache de prédictions ---------
+st.sidebar.markdown("### Cache des prédictions")
+if st.sidebar.button("Vider le cache (nouveau modèle déployé)"):
+    get_prediction_cache().clear()
+cache_stats = get_prediction_cache().stats()
+st.sidebar.caption(
+    f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+    f"({cache_stats['hit_ratio']:.0%}) – {cache_stats['size']}/{cache_stats['maxsize']} entrées"
+    + (f" – modèle {MODEL_VERSION}" if MODEL_VERSION else "")
+)
 
-    if submitted:
-        if not title or not body:
-            st.warning("Veuillez remplir le titre et le corps.")
-        else:
-            # Prédiction CatBoost
-            with st.spinner("⏳ Prédiction en cours…"):
-                res_catboost = call_api_predict(title=title, body=body, threshold=threshold, model_type="catboost")
-            if "error" not in res_catboost:
-                scores_cat = res_catboost.get("scores", {})
-                # Filtrage et tri des tags par score décroissant
-                sorted_scores_cat = dict(sorted(scores_cat.items(), key=lambda x: x[1], reverse=True))
-                filtered_tags_cat = [tag for tag, score in sorted_scores_cat.items() if score >= threshold]
-                if filtered_tags_cat:
-                    st.markdown(f"✅ Tags prédits (CatBoost, seuil ≥ {threshold}) :", unsafe_allow_html=True)
-                    st.markdown(render_tags_as_badges(filtered_tags_cat), unsafe_allow_html=True)
-                else:
-                    st.markdown(
-                                f"<div style='background-color:#f9d342; color:#5a3e00; padding:10px; border-radius:6px; font-weight:bold;'>"
-                                f"⚠️ Aucun tag prédit (CatBoost) avec un seuil ≥ {threshold}."
-                                "</div>", unsafe_allow_html=True
-                                )                  
-                st.markdown("**📊 Scores associés (CatBoost)**")
-                st.json(sorted_scores_cat)
-            else:
-                st.error(f"Erreur CatBoost : {res_catboost['error']}")
-
-            # Prédiction NMF
-            with st.spinner("⏳ Prédiction en cours…"):
-                res_nmf = call_api_predict(title=title, body=body, threshold=threshold, model_type="nmf")
-            if "error" not in res_nmf:
-                scores_nmf = res_nmf.get("scores", {})
-                sorted_scores_nmf = dict(sorted(scores_nmf.items(), key=lambda x: x[1], reverse=True))
-                filtered_tags_nmf = [tag for tag, score in sorted_scores_nmf.items() if score >= threshold]
-                if filtered_tags_nmf:
-                    st.markdown(f"✅ Tags prédits (NMF, seuil ≥ {threshold}) :", unsafe_allow_html=True)
-                    st.markdown(render_tags_as_badges(filtered_tags_nmf), unsafe_allow_html=True)
-                else:
-                    st.markdown(
-                            "<div style='background-color:#f9d342; color:#5a3e00; padding:10px; border-radius:6px; font-weight:bold;'>"
-                            "⚠️ Aucun tag prédit (NMF) avec un seuil ≥ {threshold}."
-                            "</div>", unsafe_allow_html=True
-                        )                
-                if sorted_scores_nmf:
-                    st.markdown("**📊 Scores associés (NMF)**")
-                    st.json(sorted_scores_nmf)
-            else:
-                st.error(f"Erreur NMF : {res_nmf['error']}")
+# --------- Instrumentation (panneau d'administration) ---------
+rerun_clock.finish()
+if ADMIN_PANEL:
+    with st.sidebar.expander("🛠️ Instrumentation"):
+        snapshot = METRICS.snapshot()
+        if snapshot["latencies"]:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Série": entry["name"] + "".join(f" {k}={v}" for k, v in entry["labels"].items()),
+                    "N": entry["count"],
+                    "p50 (ms)": round(entry["p50_ms"], 1),
+                    "p95 (ms)": round(entry["p95_ms"], 1),
+                    "p99 (ms)": round(entry["p99_ms"], 1),
+                }
+                for entry in snapshot["latencies"]
+            ]), hide_index=True)
+        api_client = getattr(get_prediction_backend(PREDICTION_BACKEND, API_URL), "client", None)
+        if hasattr(api_client, "stats"):
+            st.dataframe(pd.DataFrame(api_client.stats()), hide_index=True)
+        for counter in snapshot["counters"]:
+            st.caption(f"{counter['name']} {counter['labels']} : {counter['value']}")
+        prefetch_stats = get_prefetcher().stats()
+        st.caption(
+            f"Préchargement : {prefetch_stats['fetched']} requêtes, {prefetch_stats['joined']} reprises "
+            f"au premier plan, {prefetch_stats['cancelled']} annulées, {prefetch_stats['in_flight']} en cours"
+        )
+        render_info = get_example_renderer().cache_info()
+        st.caption(
+            f"HTML envoyé pendant ce rerun : {st.session_state.get('html_bytes_rerun', 0) / 1e3:.1f} Ko ; "
+            f"fragments mémorisés : {render_info.currsize} ({render_info.hits} hits / {render_info.misses} misses)"
+        )
+        dataset_usage = test_dataset.memory_usage()
+        st.caption(
+            f"Jeu de test partagé : {dataset_usage['rows']} questions, "
+            f"{dataset_usage['arrow_bytes'] / 1e6:.1f} Mo de colonnes Arrow projetées depuis le fichier, "
+            f"{dataset_usage['label_bytes'] / 1e6:.1f} Mo de libellés, "
+            f"{dataset_usage['heap_bytes'] / 1e6:.1f} Mo alloués par Arrow dans le tas"
+        )
+        if "prediction_cache_hit_ratio" in snapshot["gauges"]:
+            st.caption(f"Taux de hit du cache : {snapshot['gauges']['prediction_cache_hit_ratio']:.0%}")
+        st.download_button("Export JSON", METRICS.to_json(), file_name="metrics.json", mime="application/json")
+        st.download_button("Export Prometheus", METRICS.to_prometheus(), file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# =============================================================
+# Cache des prédictions de l'API (LRU + TTL)
+# =============================================================
+
+# Seuil envoyé à l'API pour toute réponse mise en cache ou stockée : tous les scores
+# sont renvoyés, le seuil choisi par l'utilisateur est appliqué côté client
+FETCH_THRESHOLD = 0.0
+
+
+def prediction_cache_key(title, body, model_type, endpoint, model_version=""):
+    """Clé de cache d'une prédiction.
+
+    Le seuil n'en fait pas partie : la réponse est toujours demandée avec
+    `FETCH_THRESHOLD` (tous les scores) et le seuil est appliqué côté client. L'endpoint et la
+    version du modèle en font partie, de sorte qu'un redéploiement annoncé par
+    un nouveau `MODEL_VERSION` ne sert jamais d'anciens scores.
+    """
+    raw = json.dumps([title, body, model_type, endpoint, model_version], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """Cache LRU à durée de vie limitée, partagé entre threads et sessions.
+
+    Args:
+        maxsize (int): Nombre maximal d'entrées ; la moins récemment utilisée est évincée.
+        ttl (float): Durée de vie d'une entrée, en secondes (None : illimitée).
+        clock (callable): Horloge monotone (injectable pour les tests).
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Renvoie la valeur associée à `key`, ou None si absente ou expirée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or self._clock() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def __contains__(self, key):
+        """Présence d'une entrée valide, sans compter de hit ou de miss ni changer l'ordre LRU."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or self._clock() - entry[0] < self.ttl)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (ex. après redéploiement du modèle) ; les compteurs sont conservés."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Compteurs du cache : hits, misses, taux de hit, évictions et taille."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
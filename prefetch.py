@@ -0,0 +1,176 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# =============================================================
+# Préchargement en arrière-plan des prédictions (exemples voisins de la Partie 1)
+# =============================================================
+
+DEFAULT_PREFETCH_WORKERS = 2
+DEFAULT_PREFETCH_RATE = 4.0   # requêtes/s au plus, toutes sessions confondues
+DEFAULT_PREFETCH_BURST = 4    # requêtes envoyables d'un coup (un pas en avant et en arrière, deux modèles)
+LIMITER_POLL_S = 0.05         # intervalle de vérification de l'annulation pendant l'attente d'un jeton
+
+
+class RateLimiter:
+    """Seau à jetons partagé entre threads : `rate` jetons/s, au plus `burst` en réserve."""
+
+    def __init__(self, rate=DEFAULT_PREFETCH_RATE, burst=DEFAULT_PREFETCH_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _wait_time(self):
+        """Prend un jeton s'il y en a un (renvoie 0), sinon renvoie l'attente nécessaire en s."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, cancelled=lambda: False):
+        """Attend un jeton ; renvoie False si `cancelled()` devient vrai entre-temps."""
+        while True:
+            if cancelled():
+                return False
+            wait = self._wait_time()
+            if not wait:
+                return True
+            time.sleep(min(wait, LIMITER_POLL_S))
+
+
+class Prefetcher:
+    """Préchargement borné et annulable, partagé par toutes les sessions.
+
+    Chaque session (`scope`) n'a qu'une vague de préchargement active : une
+    nouvelle vague annule les tâches de la précédente qui n'ont pas encore
+    envoyé leur requête (l'utilisateur est allé ailleurs). Une requête déjà
+    partie va au bout, son résultat alimente le cache. Le débit total est
+    limité par un `RateLimiter` commun pour ne pas surcharger l'API.
+
+    Les tâches sont identifiées par leur clé de cache : une clé déjà en cours
+    n'est pas soumise deux fois, et `take(key)` permet à une requête de
+    premier plan de réutiliser une requête préchargée déjà partie.
+
+    Une vague est oubliée dès que toutes ses tâches sont terminées, reprises
+    ou annulées : l'état ne grossit pas avec le nombre de sessions.
+
+    Args:
+        max_workers (int): Requêtes de préchargement simultanées au plus.
+        rate (float): Requêtes/s au plus.
+        burst (int): Taille du seau à jetons.
+    """
+
+    def __init__(self, max_workers=DEFAULT_PREFETCH_WORKERS, rate=DEFAULT_PREFETCH_RATE,
+                 burst=DEFAULT_PREFETCH_BURST):
+        self.limiter = RateLimiter(rate, burst)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        # Réentrant : `Future.cancel()` appelle `_forget` dans le thread qui détient déjà le verrou
+        self._lock = threading.RLock()
+        self._wave_ids = itertools.count(1)
+        self._generations = {}   # scope -> numéro de la vague en cours (numérotation commune aux sessions)
+        self._pending = {}       # scope -> {clé: Future} non terminés de la vague en cours
+        self._futures = {}       # clé -> Future, tâches non terminées
+        self._sending = set()    # clés dont la requête est partie
+        self._dropped = set()    # clés reprises par le premier plan avant l'envoi
+        self.counts = {"submitted": 0, "fetched": 0, "cancelled": 0, "joined": 0}
+
+    def submit(self, scope, tasks):
+        """Remplace la vague de `scope` par `tasks`, liste de couples (clé, fonction sans argument)."""
+        with self._lock:
+            self._end_wave(scope)
+            generation = next(self._wave_ids)
+            self._generations[scope] = generation
+            pending = self._pending[scope] = {}
+            for key, fetch in tasks:
+                if key in self._futures:
+                    continue
+                future = self._executor.submit(self._run, scope, generation, key, fetch)
+                self._futures[key] = pending[key] = future
+                future.add_done_callback(partial(self._forget, scope, key))
+                self.counts["submitted"] += 1
+            if not pending:
+                self._end_wave(scope)
+
+    def _end_wave(self, scope):
+        """Oublie la vague de `scope` et annule ses tâches pas encore démarrées."""
+        self._generations.pop(scope, None)
+        for future in self._pending.pop(scope, {}).values():
+            if future.cancel():
+                self.counts["cancelled"] += 1
+
+    def cancel(self, scope):
+        self.submit(scope, [])
+
+    def _stale(self, scope, generation, key):
+        with self._lock:
+            return self._generations.get(scope) != generation or key in self._dropped
+
+    def _run(self, scope, generation, key, fetch):
+        if not self.limiter.acquire(lambda: self._stale(scope, generation, key)):
+            with self._lock:
+                self.counts["cancelled"] += 1
+            return None
+        with self._lock:
+            if key in self._dropped:
+                return None
+            self._sending.add(key)
+        result = fetch()
+        with self._lock:
+            self.counts["fetched"] += 1
+        return result
+
+    def _forget(self, scope, key, future):
+        with self._lock:
+            self._futures.pop(key, None)
+            self._sending.discard(key)
+            self._dropped.discard(key)
+            pending = self._pending.get(scope)
+            if pending is not None and pending.get(key) is future:
+                del pending[key]
+                if not pending:
+                    self._end_wave(scope)
+
+    def take(self, key):
+        """Future de la requête préchargée `key` si elle est déjà partie, sinon None.
+
+        Une tâche pas encore envoyée est abandonnée : le premier plan fait sa
+        propre requête plutôt que d'attendre un jeton de préchargement.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                return None
+            if key in self._sending:
+                self.counts["joined"] += 1
+                return future
+            self._dropped.add(key)
+            if future.cancel():
+                self.counts["cancelled"] += 1
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, "in_flight": len(self._sending), "queued": len(self._futures) - len(self._sending)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def neighbour_positions(position, n_items, ahead=3, behind=1):
+    """Positions voisines de `position`, les plus proches d'abord (la suivante avant la précédente)."""
+    order = []
+    for step in range(1, max(ahead, behind) + 1):
+        if step <= ahead and position + step < n_items:
+            order.append(position + step)
+        if step <= behind and position - step >= 0:
+            order.append(position - step)
+    return order
@@ -0,0 +1,302 @@
+# Calcul des colonnes title_body_* à partir d'un CSV brut (Title, Body), par lots et en parallèle
+# Seule title_body est reproduite à l'identique : title_body_bow, _bow_lem et _dl sont une
+# approximation du prétraitement NLTK d'origine (non livré), voir `--compare`
+# Script à lancer depuis la racine du dépôt :
+
+# python3 preprocess.py questions.csv questions.parquet                 # tous les cœurs
+# python3 preprocess.py questions.csv questions.parquet --workers 4 --chunk-size 5000
+# python3 preprocess.py test_data.csv /tmp/test_data.parquet --compare  # écart avec les colonnes livrées
+
+
+import argparse
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import languages_frameworks, normalize_text
+
+DEFAULT_CHUNK_SIZE = 2000   # lignes par tâche envoyée aux processus
+MAX_CHUNKS_IN_FLIGHT = 2    # lots en cours par processus : borne la mémoire si l'écriture est plus lente
+SOURCE_COLUMNS = ["Title", "Body"]
+DERIVED_COLUMNS = ["title_body", "title_body_bow", "title_body_bow_lem", "title_body_dl"]
+STAGES = ["title_body", "bow", "lemmatize", "dl"]
+MIN_TOKEN_LENGTH = 3
+LEMMA_CACHE_SIZE = 200_000
+
+# Mots vides anglais de NLTK (`stopwords.words("english")`), recopiés pour ne pas dépendre du corpus
+STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves he him
+his himself she she's her hers herself it it's its itself they them their theirs themselves what which who
+whom this that that'll these those am is are was were be been being have has had having do does did doing
+a an the and but if or because as until while of at by for with about against between into through during
+before after above below to from up down in out on off over under again further then once here there when
+where why how all any both each few more most other some such no nor not only own same so than too very s t
+can will just don don't should should've now d ll m o re ve y ain aren aren't couldn couldn't didn didn't
+doesn doesn't hadn hadn't hasn hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't
+shan shan't shouldn shouldn't wasn wasn't weren weren't won won't wouldn wouldn't cannot
+""".split())
+
+# =============================================================
+# Étapes de prétraitement (une question à la fois)
+# =============================================================
+
+_EDGE_PUNCTUATION = ".,:;!?'\"()[]{}<>*`"
+# Approximation de `nltk.word_tokenize` : mots (avec points internes : "i.e", "so.exe"),
+# contractions ("'m", "n't") et ponctuation isolée ; les tirets séparent les mots
+_DL_TOKEN_PATTERN = re.compile(r"n't|'\w+|\w+(?:\.\w+)*|[^\w\s-]")
+
+
+def bow_tokens(text):
+    """Sac de mots : `utils.normalize_text`, puis sans mots vides ni mots de moins de 3 caractères.
+
+    Les mots contenant des chiffres (« sse2 », « 0x00415116 ») sont gardés,
+    comme dans la colonne `title_body_bow` livrée.
+    """
+    tokens = (token.strip(_EDGE_PUNCTUATION) for token in normalize_text(text, languages_frameworks).split())
+    return [
+        token for token in tokens
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def dl_tokens(text):
+    """Texte minuscule découpé en mots et ponctuation, sans filtrage (entrée des modèles de deep learning)."""
+    return _DL_TOKEN_PATTERN.findall(text.lower())
+
+
+def _suffix_lemma(token):
+    # Repli sans NLTK : pluriels réguliers uniquement
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")) and len(token) > MIN_TOKEN_LENGTH:
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=1)
+def _lemmatizer():
+    """`WordNetLemmatizer().lemmatize` (nom) si NLTK et WordNet sont installés, sinon règles de pluriel."""
+    try:
+        from nltk.stem import WordNetLemmatizer
+
+        lemmatize = WordNetLemmatizer().lemmatize
+        lemmatize("tests")  # charge WordNet maintenant : LookupError si le corpus manque
+        return lemmatize, "wordnet"
+    except (ImportError, LookupError):
+        return _suffix_lemma, "suffix"
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_token(token):
+    return _lemmatizer()[0](token)
+
+
+def _tokenizer():
+    """`nltk.word_tokenize` si NLTK (et punkt) sont installés, sinon `dl_tokens`."""
+    try:
+        from nltk.tokenize import word_tokenize
+
+        word_tokenize("test.")
+        return lambda text: word_tokenize(text.lower().replace("-", " ")), "nltk"
+    except (ImportError, LookupError):
+        return dl_tokens, "regex"
+
+
+def preprocess_chunk(titles, bodies):
+    """Colonnes dérivées d'un lot de questions, et durée (s) de chaque étape.
+
+    Exécuté dans les processus du pool : les entrées et sorties sont des
+    listes de chaînes (sérialisation légère entre processus).
+    """
+    timings = {}
+    start = time.perf_counter()
+    title_body = [f"{title} {body}" for title, body in zip(titles, bodies)]
+    timings["title_body"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bow = [bow_tokens(text) for text in title_body]
+    timings["bow"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lem = [" ".join(lemmatize_token(token) for token in tokens) for tokens in bow]
+    timings["lemmatize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokenize = _tokenizer()[0]
+    dl = [" ".join(tokenize(text)) for text in title_body]
+    timings["dl"] = time.perf_counter() - start
+
+    columns = {
+        "title_body": title_body,
+        "title_body_bow": [" ".join(tokens) for tokens in bow],
+        "title_body_bow_lem": lem,
+        "title_body_dl": dl,
+    }
+    return columns, timings
+
+
+def pipeline_backends():
+    """Implémentations utilisées pour le lemmatiseur et le tokeniseur (enregistrées dans le Parquet)."""
+    return {"lemmatizer": _lemmatizer()[1], "tokenizer": _tokenizer()[1]}
+
+# =============================================================
+# Pipeline : lecture par lots, pool de processus, écriture Parquet incrémentale
+# =============================================================
+
+
+def _prepare(chunk):
+    chunk = chunk.reset_index(drop=True)
+    chunk[SOURCE_COLUMNS] = chunk[SOURCE_COLUMNS].fillna("").astype(str)
+    return chunk
+
+
+def run_pipeline(csv_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, keep_columns=None,
+                 progress=None):
+    """Calcule les colonnes `DERIVED_COLUMNS` d'un CSV brut et les écrit en Parquet.
+
+    `title_body` est identique à la colonne livrée ; les trois autres en sont
+    une approximation (tokeniseur et lemmatiseur proches de ceux de NLTK, sans
+    le code d'origine) : sur test_data.csv (sans NLTK), de 7 % à 21 % des lignes seulement
+    sont identiques, pour une similarité de Jaccard moyenne de 0,89 à 0,96.
+    Elles conviennent aux index et statistiques du dashboard, pas à réentraîner
+    ou évaluer les modèles à la place des colonnes d'origine.
+
+    Le CSV est lu par lots de `chunk_size` lignes ; chaque lot est traité par
+    un processus du pool et écrit dès qu'il revient, dans l'ordre, comme un
+    groupe de lignes Parquet. Au plus `MAX_CHUNKS_IN_FLIGHT` lots par
+    processus sont en mémoire à la fois, quelle que soit la taille du CSV.
+
+    Args:
+        csv_path (str): CSV avec au moins les colonnes Title et Body.
+        output_path (str): Fichier Parquet de sortie (écrit de façon atomique).
+        workers (int): Processus du pool (nombre de cœurs par défaut).
+        chunk_size (int): Lignes par lot.
+        keep_columns (list): Colonnes du CSV recopiées telles quelles (ex. TagsList, FilteredTags).
+        progress (callable): Appelée avec le nombre de lignes écrites après chaque lot.
+
+    Returns:
+        dict: Lignes, durée totale, débit et durée cumulée de chaque étape (s).
+    """
+    workers = workers or os.cpu_count() or 1
+    keep_columns = [column for column in (keep_columns or []) if column not in SOURCE_COLUMNS + DERIVED_COLUMNS]
+    stage_seconds = dict.fromkeys(STAGES + ["read", "write"], 0.0)
+    rows = 0
+    started = time.perf_counter()
+    tmp_path = output_path + ".tmp"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    writer = None
+
+    def write(chunk, future):
+        nonlocal writer, rows
+        columns, timings = future.result()
+        for stage, seconds in timings.items():
+            stage_seconds[stage] += seconds
+        start = time.perf_counter()
+        table = pa.Table.from_pandas(chunk.assign(**columns), preserve_index=False)
+        if writer is None:
+            metadata = {**(table.schema.metadata or {}),
+                        **{f"preprocess_{k}".encode(): v.encode() for k, v in pipeline_backends().items()}}
+            writer = pq.ParquetWriter(tmp_path, table.schema.with_metadata(metadata))
+        writer.write_table(table.cast(writer.schema))  # un lot sans valeur dans une colonne la type en null
+        stage_seconds["write"] += time.perf_counter() - start
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            reader = pd.read_csv(csv_path, usecols=lambda c: c in SOURCE_COLUMNS + keep_columns, chunksize=chunk_size)
+            while True:
+                start = time.perf_counter()
+                chunk = next(reader, None)
+                stage_seconds["read"] += time.perf_counter() - start
+                if chunk is None:
+                    break
+                chunk = _prepare(chunk)
+                in_flight.append((chunk, executor.submit(preprocess_chunk, chunk["Title"].tolist(),
+                                                         chunk["Body"].tolist())))
+                if len(in_flight) >= workers * MAX_CHUNKS_IN_FLIGHT:
+                    write(*in_flight.popleft())
+            while in_flight:
+                write(*in_flight.popleft())
+        if writer is None:
+            raise ValueError(f"Aucune ligne dans {csv_path}")
+        writer.close()
+        writer = None
+        os.replace(tmp_path, output_path)  # écriture atomique, comme le cache Parquet de dataset.py
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "workers": workers, "elapsed_s": elapsed, "rows_per_s": rows / elapsed,
+            "stage_seconds": stage_seconds}
+
+
+def compare_columns(csv_path, output_path):
+    """Écart entre les colonnes calculées et celles du CSV (s'il les contient).
+
+    Returns:
+        dict: {colonne: (part des lignes identiques, similarité de Jaccard moyenne des mots)}.
+    """
+    available = [c for c in DERIVED_COLUMNS if c in pd.read_csv(csv_path, nrows=0).columns]
+    if not available:
+        return {}
+    expected = pd.read_csv(csv_path, usecols=available).fillna("")
+    produced = pd.read_parquet(output_path, columns=available)
+    report = {}
+    for column in available:
+        pairs = list(zip(expected[column].astype(str), produced[column]))
+        jaccard = []
+        for a, b in pairs:
+            a, b = set(a.split()), set(b.split())
+            jaccard.append(len(a & b) / len(a | b) if a | b else 1.0)
+        report[column] = (sum(a == b for a, b in pairs) / len(pairs), sum(jaccard) / len(jaccard))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Calcule les colonnes title_body_* d'un CSV de questions (bow, bow_lem et dl approchées)."
+    )
+    parser.add_argument("input", help="CSV avec les colonnes Title et Body")
+    parser.add_argument("output", help="Fichier Parquet de sortie")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (nombre de cœurs par défaut)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--keep", nargs="*", default=["TagsList", "FilteredTags"],
+                        help="Colonnes recopiées telles quelles si présentes")
+    parser.add_argument("--compare", action="store_true", help="Compare avec les colonnes title_body_* du CSV")
+    args = parser.parse_args()
+
+    present = set(pd.read_csv(args.input, nrows=0).columns)
+    summary = run_pipeline(
+        args.input, args.output, workers=args.workers, chunk_size=args.chunk_size,
+        keep_columns=[column for column in args.keep if column in present],
+        progress=lambda rows: print(f"\r{rows} lignes écrites", end="", flush=True),
+    )
+    print()
+    print(f"{summary['rows']} lignes en {summary['elapsed_s']:.1f} s avec {summary['workers']} processus : "
+          f"{summary['rows_per_s']:.0f} lignes/s ({', '.join(f'{k}={v}' for k, v in pipeline_backends().items())})")
+    for stage, seconds in summary["stage_seconds"].items():
+        rate = summary["rows"] / seconds if seconds else float("inf")
+        print(f"  {stage:<12} {seconds:8.2f} s cumulées  {rate:12.0f} lignes/s par processus")
+    if args.compare:
+        print("Écart avec les colonnes du CSV (bow, bow_lem et dl : approximation du prétraitement d'origine) :")
+        for column, (identical, jaccard) in compare_columns(args.input, args.output).items():
+            print(f"  {column:<20} lignes identiques {identical:6.1%}  Jaccard moyen {jaccard:.3f}")
+
+
+if __name__ == "__main__":
+    main()
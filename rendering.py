@@ -0,0 +1,157 @@
+# Rendu HTML allégé des exemples : feuille de style commune, corps tronqués et fragments mémorisés
+# Script à lancer depuis la racine du dépôt (octets envoyés par rerun sur les plus longues questions) :
+
+# python3 rendering.py
+# python3 rendering.py --preview-chars 600 --top 10
+
+
+import argparse
+import html
+from functools import lru_cache
+
+from utils import parse_tags
+
+DEFAULT_PREVIEW_CHARS = 1200
+RENDER_CACHE_SIZE = 4096  # fragments mémorisés (4 par exemple affiché)
+
+# =============================================================
+# Feuille de style commune (injectée une fois par rerun, au lieu d'un style par élément)
+# =============================================================
+
+STYLESHEET = """<style>
+.tq-text { white-space: pre-wrap; background-color: #f5f7fa; color: #2c3e50; padding: 10px;
+  border: 1px solid #cbd5e1; border-radius: 6px; overflow-y: auto; font-size: 15px; line-height: 1.4;
+  font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
+.tq-title { height: 40px; }
+.tq-body { height: 110px; }
+.tq-label { font-size: 16px; font-weight: bold; color: #000; margin-bottom: 4px; }
+.tq-heading { font-size: 18px; font-weight: bold; color: #000; margin-bottom: 8px; }
+.tq-badges { font-size: 18px; line-height: 2.2; }
+.tq-badge { display: inline-block; border-radius: 12px; margin: 4px; padding: 6px 12px;
+  background-color: #e8ddff; color: #3c0066; font-weight: 500; }
+.tq-badge-true { display: inline-block; border-radius: 12px; margin: 4px 6px 4px 0; padding: 4px 10px;
+  background-color: #b6d7a8; color: #2f4f2f; font-weight: 600; }
+.tq-warning { background-color: #f9d342; color: #5a3e00; padding: 10px; border-radius: 6px; font-weight: bold; }
+</style>"""
+
+# =============================================================
+# Fragments HTML (classes CSS de STYLESHEET, texte échappé)
+# =============================================================
+
+
+def truncate_text(text, limit=DEFAULT_PREVIEW_CHARS):
+    """Aperçu de `text` d'au plus `limit` caractères, coupé à la fin d'une ligne ou d'un mot si possible.
+
+    Returns:
+        tuple: (aperçu, True si le texte a été tronqué).
+    """
+    if not limit or len(text) <= limit:
+        return text, False
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip() + " …", True
+
+
+def text_block(text, css_class="tq-body"):
+    return f'<div class="tq-text {css_class}">{html.escape(text, quote=False)}</div>'
+
+
+def tag_badges(tags):
+    badges = " ".join(f'<span class="tq-badge">{html.escape(tag)}</span>' for tag in tags)
+    return f'<div class="tq-badges">{badges}</div>'
+
+
+def labelled_tags(label, tags):
+    badges = " ".join(f'<span class="tq-badge-true">{html.escape(tag)}</span>' for tag in parse_tags(tags))
+    return f'<div class="tq-label">{label} :</div><div>{badges}</div>'
+
+
+def heading(text):
+    return f'<div class="tq-heading">{text}</div>'
+
+
+def warning(text):
+    return f'<div class="tq-warning">{text}</div>'
+
+# =============================================================
+# Fragments d'un exemple du jeu de test, mémorisés par (ligne, partie)
+# =============================================================
+
+EXAMPLE_PARTS = ("title", "body", "tags", "filtered_tags")
+
+
+class ExampleRenderer:
+    """Fragments HTML des exemples du jeu de test, construits une fois et partagés entre sessions.
+
+    Le jeu de test étant en lecture seule, un fragment ne dépend que de
+    (ligne, partie, corps complet ou non) : il est mémorisé dans un LRU.
+
+    Args:
+        frame (pd.DataFrame): Jeu de test (Title, Body, TagsList, FilteredTags).
+        preview_chars (int): Longueur de l'aperçu des corps (0 : jamais tronqué).
+        maxsize (int): Fragments mémorisés au plus.
+    """
+
+    def __init__(self, frame, preview_chars=DEFAULT_PREVIEW_CHARS, maxsize=RENDER_CACHE_SIZE):
+        self.frame = frame
+        self.preview_chars = preview_chars
+        self._render = lru_cache(maxsize=maxsize)(self._render_part)
+
+    def is_truncated(self, row):
+        return bool(self.preview_chars) and len(self.frame.at[row, "Body"]) > self.preview_chars
+
+    def render(self, row, part, expanded=False):
+        """Fragment HTML de la partie `part` (voir EXAMPLE_PARTS) de la ligne `row`."""
+        return self._render(int(row), part, bool(expanded) and part == "body")
+
+    def _render_part(self, row, part, expanded):
+        if part == "title":
+            return text_block(self.frame.at[row, "Title"], "tq-title")
+        if part == "body":
+            body = self.frame.at[row, "Body"]
+            if not expanded:
+                body, _ = truncate_text(body, self.preview_chars)
+            return text_block(body, "tq-body")
+        if part == "tags":
+            return labelled_tags("🗂️ Tous les tags d'origine (TagsList)", self.frame.at[row, "TagsList"])
+        if part == "filtered_tags":
+            return labelled_tags("✅ Tags retenus (FilteredTags)", self.frame.at[row, "FilteredTags"])
+        raise ValueError(f"Partie inconnue : {part}")
+
+    def payload_bytes(self, row, expanded=False):
+        """Octets HTML envoyés pour afficher la ligne `row` (feuille de style non comprise)."""
+        return sum(len(self.render(row, part, expanded).encode("utf-8")) for part in EXAMPLE_PARTS)
+
+    def cache_info(self):
+        return self._render.cache_info()
+
+
+def main():
+    from dataset import DATA_PATH, load_shared_dataset
+
+    parser = argparse.ArgumentParser(description="Octets HTML envoyés par exemple (aperçu et corps complet).")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--preview-chars", type=int, default=DEFAULT_PREVIEW_CHARS)
+    parser.add_argument("--top", type=int, default=5, help="Nombre de questions les plus longues")
+    args = parser.parse_args()
+
+    frame = load_shared_dataset(args.data).frame
+    renderer = ExampleRenderer(frame, preview_chars=args.preview_chars)
+    lengths = frame["Body"].str.len().to_numpy()
+    rows = lengths.argsort()[::-1][:args.top]
+    print(f"Feuille de style : {len(STYLESHEET.encode('utf-8'))} octets par rerun")
+    print(f"{'Ligne':>6} {'Corps':>8} {'Aperçu':>8} {'Complet':>8}")
+    for row in rows:
+        print(f"{row:>6} {lengths[row]:>8} {renderer.payload_bytes(row):>8} "
+              f"{renderer.payload_bytes(row, expanded=True):>8}")
+    preview = sum(renderer.payload_bytes(row) for row in range(len(frame)))
+    full = sum(renderer.payload_bytes(row, expanded=True) for row in range(len(frame)))
+    print(f"Tout le jeu de test : {preview / len(frame):.0f} octets par exemple avec l'aperçu, "
+          f"{full / len(frame):.0f} avec le corps complet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# Index inversé plein texte (Title, Body, FilteredTags) pour le sélecteur d'exemples
+# Script à lancer depuis la racine du dépôt :
+
+# python3 search.py                     # construit l'index (.cache/test_data_search.npz)
+# python3 search.py "tag:c++ sse"
+# python3 search.py "delete duplicate list" -n 10
+
+
+import argparse
+import bisect
+import os
+import re
+import time
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+DATA_PATH = "test_data.csv"
+CACHE_DIR = ".cache"
+INDEX_FORMAT_VERSION = "1"
+DEFAULT_RESULTS = 50
+TITLE_WEIGHT = 2     # un mot du titre compte double
+TAG_WEIGHT = 2       # les tags sont aussi cherchables comme mots-clés
+BM25_K1 = 1.2
+BM25_B = 0.75
+TAG_PREFIX = "tag:"
+# Un mot-clé trouve aussi les mots qui le prolongent ("sse" → "sse2"), avec un poids moindre
+PREFIX_WEIGHT = 0.5
+PREFIX_MIN_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 50
+
+# Mots en minuscules, en gardant les caractères des noms de langages ("c++", "c#", "asp.net", "node.js")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def parse_query(query):
+    """Sépare une requête en mots-clés et filtres de tags (`tag:c++ sse` → (["sse"], ["c++"]))."""
+    terms, tags = [], []
+    for part in str(query).split():
+        if part.lower().startswith(TAG_PREFIX):
+            if len(part) > len(TAG_PREFIX):
+                tags.append(part[len(TAG_PREFIX):].lower())
+        else:
+            terms += tokenize(part)
+    return terms, tags
+
+
+def _postings(term_ids, doc_ids, weights, n_terms, n_docs):
+    """Listes inversées au format CSR : pour le terme t, docs[ptr[t]:ptr[t+1]] et leurs poids.
+
+    Matrice creuse (mots × questions) : la conversion COO → CSR de scipy
+    regroupe par mot et additionne les doublons (mot répété dans une question)
+    sans tri complet.
+    """
+    matrix = sp.csr_matrix((weights, (term_ids, doc_ids)), shape=(n_terms, n_docs), dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix.indptr.astype(np.int64), matrix.indices.astype(np.int32), matrix.data
+
+
+class SearchIndex:
+    """Index inversé des questions, classement BM25 et filtres exacts sur les tags.
+
+    Construit une fois par `build(titles, bodies, tag_lists)` et conservé
+    dans .cache/ (voir `load_search_index`) : les listes inversées sont des
+    tableaux numpy contigus, et une requête ne parcourt que les listes de ses
+    mots, ce qui la garde à quelques millisecondes même pour 100 000 questions.
+    """
+
+    def __init__(self, terms, ptr, docs, weights, doc_lengths, tag_names, tag_ptr, tag_docs):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self._sorted_terms = sorted(self.vocabulary)
+        self.ptr, self.docs, self.weights = ptr, docs, weights
+        self.doc_lengths = doc_lengths
+        self.n_docs = len(doc_lengths)
+        self.average_length = doc_lengths.mean() if self.n_docs else 0.0
+        document_frequency = np.diff(ptr)
+        self.idf = np.log(1 + (self.n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+        self.tag_ids = {tag: i for i, tag in enumerate(tag_names)}
+        self.tag_ptr, self.tag_docs = tag_ptr, tag_docs
+
+    @classmethod
+    def build(cls, titles, bodies, tag_lists):
+        tags = [[str(tag).lower() for tag in row] for row in tag_lists]
+        n_docs = len(tags)
+        # Tous les mots à plat, puis numérotés en une passe (`pd.factorize`) plutôt qu'un dict par mot
+        fields = [([tokenize(title) for title in titles], TITLE_WEIGHT),
+                  ([tokenize(body) for body in bodies], 1),
+                  (tags, TAG_WEIGHT)]
+        tokens = list(chain.from_iterable(chain.from_iterable(rows) for rows, _ in fields))
+        lengths = [np.fromiter(map(len, rows), dtype=np.int64, count=n_docs) for rows, _ in fields]
+        doc_ids = np.concatenate([np.repeat(np.arange(n_docs), counts) for counts in lengths])
+        weights = np.concatenate([np.full(counts.sum(), weight, dtype=np.float64)
+                                  for counts, (_, weight) in zip(lengths, fields)])
+        term_ids, terms = pd.factorize(np.array(tokens, dtype=object))
+        doc_lengths = np.bincount(doc_ids, weights=weights, minlength=n_docs)
+        ptr, docs, term_weights = _postings(term_ids, doc_ids, weights, len(terms), n_docs)
+
+        tag_term_ids, tag_names = pd.factorize(np.array(list(chain.from_iterable(tags)), dtype=object))
+        tag_doc_ids = np.repeat(np.arange(n_docs), lengths[2])
+        tag_ptr, tag_docs, _ = _postings(tag_term_ids, tag_doc_ids, np.ones(len(tag_doc_ids)), len(tag_names), n_docs)
+        return cls(list(terms), ptr, docs, term_weights, doc_lengths, list(tag_names), tag_ptr, tag_docs)
+
+    def __len__(self):
+        return self.n_docs
+
+    def _tag_filter(self, tags):
+        """Lignes portant tous les `tags` (tableau trié), None si aucun filtre."""
+        matches = None
+        for tag in tags:
+            tag_id = self.tag_ids.get(tag)
+            if tag_id is None:
+                return np.array([], dtype=np.int32)
+            docs = self.tag_docs[self.tag_ptr[tag_id]:self.tag_ptr[tag_id + 1]]
+            matches = docs if matches is None else np.intersect1d(matches, docs, assume_unique=True)
+        return matches
+
+    def _expand(self, terms):
+        """{id de mot : poids} des mots-clés et des mots qui les prolongent."""
+        expanded = {}
+        for term in dict.fromkeys(terms):
+            if term in self.vocabulary:
+                expanded[self.vocabulary[term]] = 1.0
+            if len(term) < PREFIX_MIN_LENGTH:
+                continue
+            start = bisect.bisect_right(self._sorted_terms, term)
+            end = bisect.bisect_left(self._sorted_terms, term + "\uffff", lo=start)
+            for word in self._sorted_terms[start:min(end, start + MAX_PREFIX_EXPANSIONS)]:
+                expanded.setdefault(self.vocabulary[word], PREFIX_WEIGHT)
+        return expanded
+
+    def search(self, query, n=DEFAULT_RESULTS):
+        """Lignes correspondant à `query`, les plus pertinentes d'abord.
+
+        Les mots-clés sont combinés en OU et classés par BM25 (les mots qui
+        les prolongent comptent avec le poids `PREFIX_WEIGHT`) ; les filtres
+        `tag:` sont des ET exacts. Sans mot-clé, les lignes filtrées sont
+        renvoyées dans l'ordre du jeu de données.
+
+        Returns:
+            tuple: (lignes (np.ndarray), nombre total de lignes correspondantes).
+        """
+        terms, tags = parse_query(query)
+        allowed = self._tag_filter(tags)
+        expanded = self._expand(terms)
+        term_ids = list(expanded)
+        if not term_ids:
+            if terms or allowed is None:
+                return np.array([], dtype=np.int32), 0
+            return allowed[:n], len(allowed)
+        docs = np.concatenate([self.docs[self.ptr[t]:self.ptr[t + 1]] for t in term_ids])
+        tf = np.concatenate([self.weights[self.ptr[t]:self.ptr[t + 1]] for t in term_ids])
+        idf = np.concatenate([np.full(self.ptr[t + 1] - self.ptr[t], self.idf[t] * expanded[t]) for t in term_ids])
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / self.average_length)
+        contributions = idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores = np.bincount(docs, weights=contributions, minlength=self.n_docs)
+        candidates = np.flatnonzero(scores)
+        scores = scores[candidates]
+        if allowed is not None:
+            keep = np.isin(candidates, allowed, assume_unique=True)
+            candidates, scores = candidates[keep], scores[keep]
+        total = len(candidates)
+        if total > n:
+            # Les n meilleurs ; à égalité au rang n, les premières lignes du jeu de données
+            kth = -np.partition(-scores, n - 1)[n - 1]
+            above = np.flatnonzero(scores > kth)
+            top = np.concatenate([above, np.flatnonzero(scores == kth)[:n - len(above)]])
+            candidates, scores = candidates[top], scores[top]
+        order = np.lexsort((candidates, -scores))  # score décroissant, puis ordre du jeu de données
+        return candidates[order], total
+
+
+    def save(self, path, fingerprint=""):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        terms = [term for term, _ in sorted(self.vocabulary.items(), key=lambda x: x[1])]
+        tag_names = [tag for tag, _ in sorted(self.tag_ids.items(), key=lambda x: x[1])]
+        np.savez(
+            tmp_path,
+            # Mots joints en une seule chaîne, comme dans similarity.py (pas de "\n" dans un mot)
+            terms=np.array("\n".join(terms)),
+            tag_names=np.array("\n".join(tag_names)),
+            ptr=self.ptr,
+            docs=self.docs,
+            weights=self.weights,
+            doc_lengths=self.doc_lengths,
+            tag_ptr=self.tag_ptr,
+            tag_docs=self.tag_docs,
+            fingerprint=np.array(fingerprint),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Index enregistré par `save`, et l'empreinte de sa source."""
+        with np.load(path, allow_pickle=False) as arrays:
+            split = lambda name: str(arrays[name]).split("\n") if str(arrays[name]) else []  # noqa: E731
+            index = cls(split("terms"), arrays["ptr"], arrays["docs"], arrays["weights"], arrays["doc_lengths"],
+                        split("tag_names"), arrays["tag_ptr"], arrays["tag_docs"])
+            return index, str(arrays["fingerprint"])
+
+# =============================================================
+# Construction et chargement (index persisté dans .cache/)
+# =============================================================
+
+
+def index_path_for(csv_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}_search.npz")
+
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return f"{INDEX_FORMAT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_search_index(csv_path=DATA_PATH, index_path=None):
+    """Construit l'index à partir du jeu de données (cache Parquet de dataset.py) et l'enregistre."""
+    from dataset import load_dataset
+
+    index_path = index_path or index_path_for(csv_path)
+    df = load_dataset(csv_path, columns=["Title", "Body", "FilteredTags"])
+    index = SearchIndex.build(df["Title"], df["Body"], df["FilteredTags"])
+    index.save(index_path, fingerprint=_source_fingerprint(csv_path))
+    return index
+
+
+def load_search_index(csv_path=DATA_PATH, index_path=None):
+    """Index enregistré, reconstruit si le CSV a changé depuis sa construction."""
+    index_path = index_path or index_path_for(csv_path)
+    if os.path.exists(index_path):
+        try:
+            index, fingerprint = SearchIndex.load(index_path)
+            if fingerprint == _source_fingerprint(csv_path):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    return build_search_index(csv_path, index_path)
+
+
+def main():
+    from dataset import load_dataset
+
+    parser = argparse.ArgumentParser(description="Construit l'index de recherche et l'interroge.")
+    parser.add_argument("query", nargs="?", default=None)
+    parser.add_argument("-n", type=int, default=10)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--index", default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_search_index(args.data, args.index)
+    print(f"Index : {len(index)} questions, {len(index.vocabulary)} mots, {len(index.tag_ids)} tags "
+          f"({(time.perf_counter() - start) * 1e3:.0f} ms)")
+    if args.query is None:
+        return
+    df = load_dataset(args.data)
+    start = time.perf_counter()
+    rows, total = index.search(args.query, n=args.n)
+    print(f"{total} résultat(s) en {(time.perf_counter() - start) * 1e3:.2f} ms")
+    for row in rows:
+        print(f"  {row + 1:>5}  {df.at[row, 'Title'][:80]}  [{', '.join(df.at[row, 'FilteredTags'])}]")
+
+
+if __name__ == "__main__":
+    main()
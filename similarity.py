@@ -0,0 +1,231 @@
+# Index TF-IDF des questions du jeu de test, pour retrouver les questions similaires
+# Script à lancer depuis la racine du dépôt (sinon l'index est construit au premier chargement) :
+
+# python3 similarity.py
+# python3 similarity.py --query "How to read a CSV file with pandas"
+
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from preprocess import bow_tokens
+from utils import parse_tags
+
+DATA_PATH = "test_data.csv"
+CACHE_DIR = ".cache"
+# Texte déjà prétraité par `preprocess.bow_tokens` (minuscules, sans mots vides ni ponctuation de bord)
+TEXT_COLUMN = "title_body_bow"
+INDEX_FORMAT_VERSION = "1"
+DEFAULT_NEIGHBOURS = 5
+
+# =============================================================
+# Index TF-IDF (matrice creuse normalisée, requêtes par produit matriciel)
+# =============================================================
+
+
+class SimilarityIndex:
+    """Vecteurs TF-IDF des questions, normalisés L2 : la similarité cosinus est un produit scalaire.
+
+    Une requête est vectorisée avec le même vocabulaire et les mêmes poids
+    IDF, puis comparée à toutes les questions par un seul produit creux
+    `matrice @ vecteur` ; seules les lignes partageant au moins un mot avec la
+    requête contribuent au calcul.
+
+    Args:
+        vocabulary (list): Mots de l'index, dans l'ordre des colonnes.
+        idf (np.ndarray): Poids IDF de chaque mot.
+        matrix (scipy.sparse.csr_matrix): Vecteurs des questions (n_questions, n_mots).
+    """
+
+    def __init__(self, vocabulary, idf, matrix):
+        self.vocabulary = list(vocabulary)
+        self.index = {word: j for j, word in enumerate(self.vocabulary)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.matrix = sp.csr_matrix(matrix)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @classmethod
+    def build(cls, texts):
+        """Index construit à partir de textes déjà tokenisés (mots séparés par des espaces).
+
+        IDF lissé et TF sous-linéaire, comme `TfidfVectorizer(smooth_idf=True, sublinear_tf=True)`.
+        """
+        documents = [str(text).split() for text in texts]
+        vocabulary = sorted({word for words in documents for word in words})
+        columns = {word: j for j, word in enumerate(vocabulary)}
+        rows, cols = [], []
+        for i, words in enumerate(documents):
+            rows += [i] * len(words)
+            cols += [columns[word] for word in words]
+        counts = sp.csr_matrix(
+            (np.ones(len(cols)), (rows, cols)), shape=(len(documents), len(vocabulary))
+        )
+        counts.sum_duplicates()
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        index = cls(vocabulary, idf, counts)
+        index.matrix = index._weight(counts)
+        return index
+
+    def _weight(self, counts):
+        weighted = counts.astype(np.float64)
+        weighted.data = 1 + np.log(weighted.data)
+        weighted = weighted.multiply(self.idf[np.newaxis, :]).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1 / norms) @ weighted)
+
+    def vectorize(self, title, body):
+        """Vecteur (1, n_mots) d'une question brute, tokenisée par `preprocess.bow_tokens`.
+
+        C'est le découpage qui a produit la colonne `TEXT_COLUMN` : un mot suivi
+        d'une ponctuation (« pandas. ») retrouve ainsi sa colonne dans l'index.
+        """
+        words = bow_tokens(f"{title} {body}")
+        cols = [self.index[word] for word in words if word in self.index]
+        counts = sp.csr_matrix(
+            (np.ones(len(cols)), ([0] * len(cols), cols)), shape=(1, len(self.vocabulary))
+        )
+        counts.sum_duplicates()
+        return self._weight(counts)
+
+    def neighbours(self, vector, n=DEFAULT_NEIGHBOURS, exclude=None):
+        """Les `n` questions les plus proches de `vector`, par similarité décroissante.
+
+        Args:
+            exclude (int): Ligne à ignorer (la question elle-même).
+
+        Returns:
+            list: Couples (ligne, similarité), similarité > 0 uniquement.
+        """
+        scores = np.asarray((self.matrix @ vector.T).todense()).ravel()
+        if exclude is not None:
+            scores[exclude] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(row), float(scores[row])) for row in ranked]
+
+    def similar_to_row(self, row, n=DEFAULT_NEIGHBOURS):
+        return self.neighbours(self.matrix[row], n=n, exclude=row)
+
+    def similar_to_text(self, title, body, n=DEFAULT_NEIGHBOURS):
+        return self.neighbours(self.vectorize(title, body), n=n)
+
+    def save(self, path, fingerprint=""):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            # Mots joints en une seule chaîne : un tableau de chaînes à largeur fixe pèserait
+            # (nombre de mots × longueur du plus long) caractères
+            vocabulary=np.array("\n".join(self.vocabulary)),
+            idf=self.idf,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.array(self.matrix.shape),
+            fingerprint=np.array(fingerprint),
+        )
+        os.replace(tmp_path, path)  # écriture atomique, comme le cache Parquet
+
+    @classmethod
+    def load(cls, path):
+        """Index enregistré par `save`, et l'empreinte de sa source."""
+        with np.load(path, allow_pickle=False) as arrays:
+            matrix = sp.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(arrays["shape"])
+            )
+            vocabulary = str(arrays["vocabulary"]).split("\n")
+            return cls(vocabulary, arrays["idf"], matrix), str(arrays["fingerprint"])
+
+
+def suggest_tags(neighbours, tag_lists, k=DEFAULT_NEIGHBOURS):
+    """Tags des questions voisines, pondérés par leur similarité (suggestion par recherche).
+
+    Args:
+        neighbours (list): Couples (ligne, similarité) de `SimilarityIndex.neighbours`.
+        tag_lists (sequence): Tags de référence de chaque ligne (ex. `FilteredTags`).
+
+    Returns:
+        list: Couples (tag, score) triés, score = part de la similarité totale des voisins.
+    """
+    total = sum(score for _, score in neighbours)
+    if not total:
+        return []
+    votes = {}
+    for row, score in neighbours:
+        for tag in parse_tags(tag_lists[row]):
+            votes[tag] = votes.get(tag, 0.0) + score / total
+    return sorted(votes.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+# =============================================================
+# Construction et chargement (index persisté dans .cache/)
+# =============================================================
+
+
+def index_path_for(csv_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}_tfidf.npz")
+
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return f"{INDEX_FORMAT_VERSION}:{TEXT_COLUMN}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_similarity_index(csv_path=DATA_PATH, index_path=None):
+    """Construit l'index à partir de la colonne `TEXT_COLUMN` du CSV et l'enregistre."""
+    index_path = index_path or index_path_for(csv_path)
+    texts = pd.read_csv(csv_path, usecols=[TEXT_COLUMN])[TEXT_COLUMN].fillna("")
+    index = SimilarityIndex.build(texts)
+    index.save(index_path, fingerprint=_source_fingerprint(csv_path))
+    return index
+
+
+def load_similarity_index(csv_path=DATA_PATH, index_path=None):
+    """Index enregistré, reconstruit si le CSV a changé depuis sa construction."""
+    index_path = index_path or index_path_for(csv_path)
+    if os.path.exists(index_path):
+        try:
+            index, fingerprint = SimilarityIndex.load(index_path)
+            if fingerprint == _source_fingerprint(csv_path):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    return build_similarity_index(csv_path, index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit l'index des questions similaires.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--index", default=None)
+    parser.add_argument("--query", default=None, help="Question de test (titre)")
+    parser.add_argument("-n", type=int, default=DEFAULT_NEIGHBOURS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_similarity_index(args.data, args.index)
+    print(f"Index : {len(index)} questions, {len(index.vocabulary)} mots, "
+          f"{index.matrix.nnz} valeurs non nulles ({(time.perf_counter() - start) * 1e3:.0f} ms)")
+
+    df = pd.read_csv(args.data, usecols=["Title", "FilteredTags"])
+    start = time.perf_counter()
+    neighbours = index.similar_to_text(args.query, "", n=args.n) if args.query else index.similar_to_row(0, n=args.n)
+    print(f"Requête : {(time.perf_counter() - start) * 1e3:.2f} ms")
+    for row, score in neighbours:
+        print(f"  {score:.3f}  {df.at[row, 'Title']}")
+    print("Tags suggérés :", ", ".join(f"{tag} ({score:.2f})" for tag, score in suggest_tags(neighbours, df["FilteredTags"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Faux serveur /predict pour tester le dashboard hors ligne (sans l'API Flask ni les modèles)
+# Script à lancer depuis la racine du dépôt :
+
+# python3 stub_api.py --port 5001
+# python3 stub_api.py --port 5001 --service-ms 40 --jitter-ms 10 --workers 4   # modèle lent, 4 workers
+# API_URL=http://localhost:5001/predict streamlit run main.py
+
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TAGS = [
+    "python", "java", "javascript", "c#", "c++", "c", "php", "android", "jquery", "html",
+    "css", "sql", "mysql", "ios", "objective-c", "ruby", "ruby-on-rails", "asp.net", ".net",
+    "linux", "git", "django", "node.js", "arrays", "string", "regex", "multithreading",
+    "performance", "r", "windows",
+]
+
+
+def stub_scores(title, body, model_type, tags=DEFAULT_TAGS):
+    """Scores déterministes : élevés pour les tags présents dans le texte, faibles sinon."""
+    text = f" {title} {body} ".lower()
+    scores = {}
+    for tag in tags:
+        digest = hashlib.md5(f"{model_type}|{tag}|{title}".encode("utf-8")).digest()
+        noise = digest[0] / 255
+        present = f" {tag} " in text or f" {tag}." in text or f" {tag}," in text
+        scores[tag] = round(0.55 + 0.45 * noise if present else 0.5 * noise, 4)
+    return scores
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, comme un vrai serveur WSGI derrière un proxy
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, Nagle et l'ACK
+    # retardé ajoutent ~40 ms à chaque réponse
+    disable_nagle_algorithm = True
+    # Temps de service simulé (voir `make_stub_handler`) : aucun par défaut
+    service_ms = 0.0
+    jitter_ms = 0.0
+    capacity = contextlib.nullcontext()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", ""):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        with self.capacity:
+            if self.service_ms or self.jitter_ms:
+                time.sleep(max(0.0, random.gauss(self.service_ms, self.jitter_ms)) / 1e3)
+            self._predict()
+
+    def _predict(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            payload = json.loads(data or b"{}")
+        except (ValueError, OSError):
+            self._send_json(400, {"error": "JSON invalide"})
+            return
+        title, body = payload.get("title", ""), payload.get("body", "")
+        if not title and not body:
+            self._send_json(400, {"error": "Titre et corps manquants"})
+            return
+        top_k = payload.get("top_k")
+
+        def scores_for(model_type):
+            scores = stub_scores(title, body, model_type)
+            if top_k:
+                scores = dict(sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k])
+            return {"scores": scores}
+
+        model_types = payload.get("model_types")
+        if model_types:
+            self._send_json(200, {"results": {model_type: scores_for(model_type) for model_type in model_types}})
+        else:
+            self._send_json(200, scores_for(payload.get("model_type", "catboost")))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_handler(service_ms=0.0, jitter_ms=0.0, workers=None):
+    """Handler qui simule le temps de calcul d'un modèle.
+
+    Args:
+        service_ms (float): Temps de service moyen d'une requête `/predict`, en ms.
+        jitter_ms (float): Écart-type (loi normale tronquée à 0), en ms.
+        workers (int): Requêtes traitées en parallèle au plus, comme les workers
+            d'un serveur WSGI ; les suivantes attendent. Sans limite si None.
+    """
+    return type("SimulatedStubHandler", (StubHandler,), {
+        "service_ms": service_ms,
+        "jitter_ms": jitter_ms,
+        "capacity": threading.BoundedSemaphore(workers) if workers else contextlib.nullcontext(),
+    })
+
+
+def start_stub_server(host="127.0.0.1", port=0, handler=StubHandler):
+    """Démarre le serveur dans un thread et renvoie (serveur, URL de /predict)."""
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/predict"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur /predict pour les tests hors ligne.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--service-ms", type=float, default=0.0, help="Temps de service moyen simulé (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Écart-type du temps de service (ms)")
+    parser.add_argument("--workers", type=int, default=None, help="Requêtes traitées en parallèle au plus")
+    args = parser.parse_args()
+    handler = make_stub_handler(args.service_ms, args.jitter_ms, args.workers)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Stub API sur http://{args.host}:{args.port}/predict")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
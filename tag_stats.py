@@ -0,0 +1,175 @@
+# Statistiques des tags du jeu de test : fréquences, tags retirés par le filtrage et co-occurrences
+# Script à lancer depuis la racine du dépôt (sinon les statistiques sont calculées au premier chargement) :
+
+# python3 tag_stats.py
+# python3 tag_stats.py --top 15
+
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from utils import TagVocabulary
+
+DATA_PATH = "test_data.csv"
+CACHE_DIR = ".cache"
+STATS_FORMAT_VERSION = "1"
+SOURCES = ("TagsList", "FilteredTags")
+DEFAULT_TOP = 20
+
+# =============================================================
+# Fréquences et co-occurrences (matrice one-hot creuse X, co-occurrences XᵀX)
+# =============================================================
+
+
+class TagStatistics:
+    """Statistiques précalculées des colonnes `TagsList` et `FilteredTags`.
+
+    Pour chaque colonne, `X` est la matrice one-hot creuse (questions × tags) ;
+    les fréquences sont les sommes de ses colonnes et les co-occurrences la
+    matrice creuse `XᵀX` (diagonale : fréquence du tag). Les deux colonnes
+    partagent le même vocabulaire de tags.
+
+    Args:
+        tags (list): Noms des tags, dans l'ordre des lignes et colonnes des matrices.
+        n_rows (int): Nombre de questions.
+        cooccurrences (dict): {colonne: matrice CSR (n_tags, n_tags) d'entiers}.
+    """
+
+    def __init__(self, tags, n_rows, cooccurrences):
+        self.tags = list(tags)
+        self.n_rows = n_rows
+        self.cooccurrences = {source: sp.csr_matrix(matrix) for source, matrix in cooccurrences.items()}
+        self.frequencies = {source: matrix.diagonal() for source, matrix in self.cooccurrences.items()}
+
+    @classmethod
+    def build(cls, tags_list, filtered_tags):
+        """Statistiques à partir des listes de tags de chaque question."""
+        vocabulary = TagVocabulary(tags_list, filtered_tags)
+        cooccurrences = {}
+        for source, tag_lists in zip(SOURCES, (tags_list, filtered_tags)):
+            one_hot = vocabulary.encode(tag_lists).astype(np.int32)
+            cooccurrences[source] = (one_hot.T @ one_hot).tocsr()
+        return cls(vocabulary.tags, len(tags_list), cooccurrences)
+
+    def tags_per_question(self, source):
+        """Nombre moyen de tags par question dans `source`."""
+        return self.frequencies[source].sum() / self.n_rows if self.n_rows else 0.0
+
+    def dropped_fraction(self):
+        """Part des tags (occurrences et tags distincts) retirés par le filtrage."""
+        kept = self.frequencies["FilteredTags"]
+        original = self.frequencies["TagsList"]
+        occurrences = 1 - kept.sum() / original.sum() if original.sum() else 0.0
+        distinct = (original > 0).sum()
+        removed = ((original > 0) & (kept == 0)).sum()
+        return {"occurrences": float(occurrences), "distinct": float(removed / distinct) if distinct else 0.0}
+
+    def frequency_table(self, n=None):
+        """Tags par fréquence décroissante dans `TagsList`, avec la part conservée dans `FilteredTags`."""
+        original, kept = self.frequencies["TagsList"], self.frequencies["FilteredTags"]
+        order = np.lexsort((-kept, -original))[:n]
+        return pd.DataFrame({
+            "Tag": [self.tags[i] for i in order],
+            "TagsList": original[order],
+            "FilteredTags": kept[order],
+            "Part conservée": np.divide(kept[order], original[order], out=np.zeros(len(order)),
+                                        where=original[order] > 0),
+        })
+
+    def top_cooccurrences(self, source="FilteredTags", n=DEFAULT_TOP):
+        """Co-occurrences entre les `n` tags les plus fréquents de `source` (DataFrame n × n)."""
+        frequencies = self.frequencies[source]
+        order = np.argsort(-frequencies, kind="stable")[:n]
+        order = order[frequencies[order] > 0]
+        matrix = self.cooccurrences[source][order][:, order].toarray()
+        names = [self.tags[i] for i in order]
+        return pd.DataFrame(matrix, index=names, columns=names)
+
+    def save(self, path, fingerprint=""):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        arrays = {"tags": np.array("\n".join(self.tags)), "n_rows": np.array(self.n_rows),
+                  "fingerprint": np.array(fingerprint)}
+        for source, matrix in self.cooccurrences.items():
+            arrays.update({f"{source}_data": matrix.data, f"{source}_indices": matrix.indices,
+                           f"{source}_indptr": matrix.indptr})
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)  # écriture atomique, comme les autres caches de .cache/
+
+    @classmethod
+    def load(cls, path):
+        """Statistiques enregistrées par `save`, et l'empreinte de leur source."""
+        with np.load(path, allow_pickle=False) as arrays:
+            tags = str(arrays["tags"]).split("\n") if str(arrays["tags"]) else []
+            cooccurrences = {
+                source: sp.csr_matrix(
+                    (arrays[f"{source}_data"], arrays[f"{source}_indices"], arrays[f"{source}_indptr"]),
+                    shape=(len(tags), len(tags)),
+                )
+                for source in SOURCES
+            }
+            return cls(tags, int(arrays["n_rows"]), cooccurrences), str(arrays["fingerprint"])
+
+# =============================================================
+# Construction et chargement (statistiques persistées dans .cache/)
+# =============================================================
+
+
+def stats_path_for(csv_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}_tag_stats.npz")
+
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return f"{STATS_FORMAT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_tag_statistics(csv_path=DATA_PATH, stats_path=None):
+    """Calcule les statistiques à partir du cache Parquet de dataset.py et les enregistre."""
+    from dataset import load_dataset
+
+    stats_path = stats_path or stats_path_for(csv_path)
+    df = load_dataset(csv_path, columns=list(SOURCES))
+    stats = TagStatistics.build(df["TagsList"].tolist(), df["FilteredTags"].tolist())
+    stats.save(stats_path, fingerprint=_source_fingerprint(csv_path))
+    return stats
+
+
+def load_tag_statistics(csv_path=DATA_PATH, stats_path=None):
+    """Statistiques enregistrées, recalculées si le CSV a changé depuis."""
+    stats_path = stats_path or stats_path_for(csv_path)
+    if os.path.exists(stats_path):
+        try:
+            stats, fingerprint = TagStatistics.load(stats_path)
+            if fingerprint == _source_fingerprint(csv_path):
+                return stats
+        except (OSError, ValueError, KeyError):
+            pass
+    return build_tag_statistics(csv_path, stats_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcule les statistiques des tags du jeu de test.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--stats", default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_tag_statistics(args.data, args.stats)
+    print(f"{stats.n_rows} questions, {len(stats.tags)} tags ({(time.perf_counter() - start) * 1e3:.0f} ms)")
+    dropped = stats.dropped_fraction()
+    print(f"Retirés par le filtrage : {dropped['occurrences']:.1%} des occurrences, "
+          f"{dropped['distinct']:.1%} des tags distincts")
+    print(stats.frequency_table(args.top).to_string(index=False))
+    print(stats.top_cooccurrences(n=args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules du dépôt importés depuis la racine, comme dans benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
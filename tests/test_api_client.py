@@ -0,0 +1,168 @@
+# Répartition de charge, bascule et disjoncteur du client HTTP, contre des instances de stub_api.py
+# python3 -m pytest tests/test_api_client.py
+
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from api_client import ApiClient, CircuitBreaker, CircuitOpenError, LoadBalancedClient
+from backends import HttpBackend
+from stub_api import make_stub_handler, start_stub_server
+
+PAYLOAD = {"title": "python list", "body": "How to sort a python list?", "threshold": 0.5, "model_type": "catboost"}
+
+
+def unused_url():
+    """URL `/predict` d'un port local sur lequel personne n'écoute (instance arrêtée)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/predict"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def replicas():
+    """Trois instances : une rapide, une lente (80 ms par requête) et une arrêtée."""
+    fast, fast_url = start_stub_server()
+    slow, slow_url = start_stub_server(handler=make_stub_handler(service_ms=80))
+    yield {"fast": fast_url, "slow": slow_url, "down": unused_url()}
+    for server in (fast, slow):
+        server.shutdown()
+        server.server_close()
+
+# =============================================================
+# Répartition et bascule entre instances
+# =============================================================
+
+
+def test_load_balancing_fails_over_and_prefers_fast_replica(replicas):
+    client = LoadBalancedClient(list(replicas.values()), health_interval=0, failure_threshold=3)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(lambda _: client.post_json(PAYLOAD).status_code, range(80)))
+        stats = {entry["url"]: entry for entry in client.stats()}
+    finally:
+        client.close()
+
+    # Chaque requête envoyée à l'instance arrêtée est retentée ailleurs
+    assert statuses == [200] * 80
+    down = stats[replicas["down"]]
+    assert down["failures"] == down["requests"] >= 1
+    assert down["circuit"] == CircuitBreaker.OPEN
+    assert stats[replicas["fast"]]["requests"] > stats[replicas["slow"]]["requests"] > 0
+    assert stats[replicas["fast"]]["ewma_ms"] < stats[replicas["slow"]]["ewma_ms"]
+
+
+def test_health_check_evicts_and_readmits_replica(replicas):
+    client = LoadBalancedClient([replicas["fast"], replicas["down"]], health_interval=0)
+    try:
+        client.check_health()
+        healthy = {entry["url"]: entry["healthy"] for entry in client.stats()}
+        assert healthy == {replicas["fast"]: True, replicas["down"]: False}
+
+        # L'instance écartée ne reçoit plus de requêtes, sans échec côté disjoncteur
+        for _ in range(10):
+            assert client.post_json(PAYLOAD).status_code == 200
+        stats = {entry["url"]: entry for entry in client.stats()}
+        assert stats[replicas["down"]]["requests"] == 0
+        assert stats[replicas["fast"]]["requests"] == 10
+
+        # Redémarrée sur le même port, elle est réadmise à la vérification suivante
+        port = int(replicas["down"].rsplit(":", 1)[1].split("/")[0])
+        server, _ = start_stub_server(port=port)
+        try:
+            client.check_health()
+            assert all(entry["healthy"] for entry in client.stats())
+            for _ in range(20):
+                assert client.post_json(PAYLOAD).status_code == 200
+            stats = {entry["url"]: entry for entry in client.stats()}
+            assert stats[replicas["down"]]["requests"] > 0
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        client.close()
+
+
+def test_all_replicas_down_raises_without_hanging():
+    client = LoadBalancedClient([unused_url(), unused_url()], health_interval=0, failure_threshold=1)
+    try:
+        with pytest.raises(requests.ConnectionError):
+            client.post_json(PAYLOAD)
+        # Les deux disjoncteurs sont ouverts : échec immédiat, sans appel réseau
+        with pytest.raises(CircuitOpenError):
+            client.post_json(PAYLOAD)
+    finally:
+        client.close()
+
+# =============================================================
+# Disjoncteur, API hors ligne
+# =============================================================
+
+
+def test_breaker_opens_after_threshold_then_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0, clock=clock)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 30.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    # Un seul appel d'essai à la fois
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 60.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_fails_fast_while_api_offline():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+    client = ApiClient(unused_url(), connect_timeout=0.5, retries=0, breaker=breaker)
+    try:
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                client.post_json(PAYLOAD)
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            client.post_json(PAYLOAD)
+
+        # L'API revient : l'appel d'essai après `reset_timeout` referme le circuit
+        server, client.url = start_stub_server()
+        try:
+            clock.now = 30.0
+            assert client.post_json(PAYLOAD).status_code == 200
+            assert breaker.state == CircuitBreaker.CLOSED
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        client.close()
+
+
+def test_http_backend_reports_open_circuit_as_error():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    backend = HttpBackend(ApiClient(unused_url(), connect_timeout=0.5, retries=0, breaker=breaker))
+    assert "error" in backend.predict("python list", "How to sort?", 0.5, "catboost")
+    res = backend.predict("python list", "How to sort?", 0.5, "catboost")
+    assert "circuit ouvert" in res["error"]
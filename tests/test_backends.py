@@ -0,0 +1,172 @@
+# Backends de prédiction : modèles chargés dans le processus (artefacts joblib)
+# et aller-retour du mode compact (gzip, texte prénormalisé, top-k) contre stub_api.py
+# python3 -m pytest tests/test_backends.py
+
+import gzip
+import json
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+
+from api_client import ApiClient
+from backends import (
+    DEFAULT_TOKEN_BUDGET, GZIP_MIN_BYTES, HttpBackend, InProcessBackend, compact_text, save_model_artifact
+)
+from stub_api import stub_scores, start_stub_server
+from utils import languages_frameworks, normalize_text
+
+TAGS = ["python", "java", "sql"]
+QUESTIONS = [
+    ("How to sort a list in Python?", "I have a python list of dicts and want to sort it."),
+    ("Java streams", "How do I filter a List<String> with Java 8 streams?"),
+    ("SQL join", "Inner join vs left join in MySQL, which one for my SQL query?"),
+    ("Python and SQL", "Reading a SQL table into a python pandas DataFrame."),
+    ("NullPointerException in Java", "My java program crashes when calling a method."),
+    ("Group by in SQL", "How to count rows per group with GROUP BY?"),
+]
+LABELS = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [0, 1, 0], [0, 0, 1]])
+
+
+def normalized(questions):
+    return [normalize_text(f"{title} {body}", languages_frameworks) for title, body in questions]
+
+# =============================================================
+# InProcessBackend
+# =============================================================
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("artifacts")
+    texts = normalized(QUESTIONS)
+    vectorizer = TfidfVectorizer().fit(texts)
+    X = vectorizer.transform(texts)
+    classifier = OneVsRestClassifier(LogisticRegression()).fit(X, LABELS)
+    nmf = NMF(n_components=2, init="nndsvda", max_iter=500).fit(X)
+    topic_tags = nmf.transform(X).T @ LABELS
+    paths = {"catboost": str(directory / "clf.joblib"), "nmf": str(directory / "nmf.joblib")}
+    save_model_artifact(paths["catboost"], vectorizer, classifier, TAGS)
+    save_model_artifact(paths["nmf"], vectorizer, nmf, TAGS, topic_tags=topic_tags)
+    return paths
+
+
+def test_supervised_scores_match_model(artifacts):
+    backend = InProcessBackend(artifacts)
+    artifact = joblib.load(artifacts["catboost"])
+    expected = artifact["model"].predict_proba(artifact["vectorizer"].transform(normalized(QUESTIONS)))
+    results = backend.predict_batch(QUESTIONS, "catboost")
+    assert [list(res["scores"]) for res in results] == [TAGS] * len(QUESTIONS)
+    np.testing.assert_allclose([list(res["scores"].values()) for res in results], expected.round(4))
+    # Une question seule donne les mêmes scores que dans un lot
+    assert backend.predict(*QUESTIONS[2], threshold=0.5, model_type="catboost") == results[2]
+
+
+def test_topic_model_scores_are_normalized_per_row(artifacts):
+    results = InProcessBackend(artifacts).predict_batch(QUESTIONS, "nmf")
+    scores = np.array([list(res["scores"].values()) for res in results])
+    assert scores.min() >= 0
+    np.testing.assert_allclose(scores.max(axis=1), 1.0)
+
+
+def test_artifacts_load_once_and_lazily(artifacts, monkeypatch):
+    loads = []
+    load = joblib.load
+    monkeypatch.setattr(joblib, "load", lambda path: loads.append(path) or load(path))
+    backend = InProcessBackend(artifacts)
+    assert loads == []
+    for _ in range(3):
+        backend.predict(*QUESTIONS[0], threshold=0.0, model_type="catboost")
+    assert loads == [artifacts["catboost"]]
+
+
+def test_errors_are_returned_not_raised(artifacts, tmp_path):
+    backend = InProcessBackend({**artifacts, "broken": str(tmp_path / "absent.joblib")})
+    assert "error" in backend.predict(*QUESTIONS[0], threshold=0.0, model_type="unknown")
+    results = backend.predict_batch(QUESTIONS[:2], "broken")
+    assert len(results) == 2 and all("error" in res for res in results)
+    assert backend.predict_batch([], "catboost") == []
+
+
+def test_endpoint_identifies_artifacts(artifacts):
+    # Clé de cache et fichier de résultats : changer un artefact change l'identité du backend
+    assert InProcessBackend(artifacts).endpoint == InProcessBackend(dict(reversed(artifacts.items()))).endpoint
+    assert InProcessBackend(artifacts).endpoint != InProcessBackend({"catboost": artifacts["nmf"]}).endpoint
+
+# =============================================================
+# HttpBackend en mode compact, contre le stub
+# =============================================================
+
+LONG_BODY = " ".join(["Sorting a python list of dicts by key with pandas and numpy."] * 80)
+
+
+class RecordingClient(ApiClient):
+    """Client vers le stub qui garde les corps envoyés (décodés) et leurs en-têtes."""
+
+    def __init__(self, url):
+        super().__init__(url, retries=0)
+        self.sent = []
+
+    def post_body(self, data, headers):
+        decoded = gzip.decompress(data) if headers.get("Content-Encoding") == "gzip" else data
+        self.sent.append((json.loads(decoded), headers, len(data)))
+        return super().post_body(data, headers)
+
+
+@pytest.fixture
+def stub_url():
+    server, url = start_stub_server()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_compact_payload_round_trip(stub_url):
+    client = RecordingClient(stub_url)
+    backend = HttpBackend(client, compact=True, top_k=5)
+    res = backend.predict("Sort a list in Python", LONG_BODY, 0.0, "catboost", true_tags=["python"])
+
+    payload, headers, size = client.sent[0]
+    title, body = compact_text("Sort a list in Python", LONG_BODY)
+    assert payload == {"title": title, "body": body, "normalized": True, "top_k": 5,
+                       "threshold": 0.0, "model_type": "catboost"}
+    assert len(title.split()) + len(body.split()) == DEFAULT_TOKEN_BUDGET
+    assert headers["Content-Encoding"] == "gzip" and size < len(json.dumps(payload))
+    # Le stub a bien reçu le texte compacté : ses 5 meilleurs scores sur ce texte
+    expected = sorted(stub_scores(title, body, "catboost").items(), key=lambda x: x[1], reverse=True)[:5]
+    assert res == {"scores": dict(expected)}
+    client.close()
+
+
+def test_compact_small_body_is_not_gzipped(stub_url):
+    client = RecordingClient(stub_url)
+    backend = HttpBackend(client, compact=True)
+    backend.predict("Python list", "How to sort it?", 0.0, "nmf")
+    payload, headers, size = client.sent[0]
+    assert size < GZIP_MIN_BYTES
+    assert "Content-Encoding" not in headers
+    client.close()
+
+
+def test_compact_multi_model_limits_each_model(stub_url):
+    client = RecordingClient(stub_url)
+    backend = HttpBackend(client, multi_model=True, compact=True, top_k=3)
+    results = backend.predict_multi("Sort a list in Python", LONG_BODY, {"catboost": 0.0, "nmf": 0.0})
+    assert len(client.sent) == 1
+    assert set(results) == {"catboost", "nmf"}
+    assert all(len(res["scores"]) == 3 for res in results.values())
+    client.close()
+
+
+def test_compact_and_raw_endpoints_differ():
+    client = ApiClient("http://127.0.0.1:1/predict")
+    raw = HttpBackend(client)
+    compact = HttpBackend(client, compact=True)
+    assert len({raw.endpoint, compact.endpoint, HttpBackend(client, compact=True, top_k=5).endpoint}) == 3
+    # Le texte brut part tel quel, avec les tags vrais
+    assert raw.build_payload("T", "B", 0.0, "nmf", true_tags=["python"]) == {
+        "title": "T", "body": "B", "true_tags": ["python"], "threshold": 0.0, "model_type": "nmf"}
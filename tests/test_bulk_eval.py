@@ -0,0 +1,191 @@
+# Évaluation complète reprenable (Partie 3) contre stub_api.py, et métriques comparées à compute_metrics
+# python3 -m pytest tests/test_bulk_eval.py
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api_client import ApiClient
+from backends import HttpBackend
+from bulk_eval import ResultsStore, aggregate_metrics, per_tag_metrics, run_bulk_evaluation
+from conftest import ROOT
+from evaluation import compute_metrics
+from prediction_cache import FETCH_THRESHOLD
+from stub_api import DEFAULT_TAGS, start_stub_server
+from utils import parse_tags
+
+MODEL_TYPES = ("catboost", "nmf")
+N_ROWS = 40
+
+
+class CountingPredict:
+    """`predict_fn` de `run_bulk_evaluation` vers le stub, qui compte les appels par (titre, modèle)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def __call__(self, title, body, model_type):
+        with self.lock:
+            self.calls.append((title, model_type))
+        return self.backend.predict(title, body, FETCH_THRESHOLD, model_type)
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture(scope="module")
+def backend():
+    server, url = start_stub_server()
+    client = ApiClient(url, retries=0)
+    yield HttpBackend(client)
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_csv(os.path.join(ROOT, "test_data.csv"), usecols=["Title", "Body", "FilteredTags"],
+                       nrows=N_ROWS)
+
+
+def interrupt_after(n_done):
+    def progress(done, total, errors):
+        if done >= n_done:
+            raise Interrupted
+    return progress
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+# =============================================================
+# Reprise après interruption
+# =============================================================
+
+
+def test_interrupted_run_resumes_without_recomputing(backend, frame, tmp_path):
+    path = str(tmp_path / "bulk.jsonl")
+    first = CountingPredict(backend)
+    with pytest.raises(Interrupted):
+        run_bulk_evaluation(frame, ResultsStore(path), first, model_types=MODEL_TYPES, max_workers=4,
+                            progress_callback=interrupt_after(30))
+    stored = {(record["row"], record["model_type"]) for record in read_records(path)}
+    assert 30 <= len(stored) < N_ROWS * len(MODEL_TYPES)
+
+    # Nouveau processus : le store est relu depuis le fichier
+    second = CountingPredict(backend)
+    summary = run_bulk_evaluation(frame, ResultsStore(path), second, model_types=MODEL_TYPES, max_workers=4)
+    assert summary == {"done": N_ROWS * len(MODEL_TYPES), "total": N_ROWS * len(MODEL_TYPES), "errors": 0}
+    assert len(second.calls) == N_ROWS * len(MODEL_TYPES) - len(stored)
+    recomputed = {(frame.index[frame["Title"] == title][0], model_type) for title, model_type in second.calls}
+    assert not recomputed & stored
+
+    keys = [(record["row"], record["model_type"]) for record in read_records(path)]
+    assert len(keys) == len(set(keys)) == N_ROWS * len(MODEL_TYPES)
+    # Tout est déjà stocké : aucun appel
+    third = CountingPredict(backend)
+    run_bulk_evaluation(frame, ResultsStore(path), third, model_types=MODEL_TYPES)
+    assert third.calls == []
+
+
+def test_truncated_last_line_is_skipped(backend, frame, tmp_path):
+    path = str(tmp_path / "bulk.jsonl")
+    run_bulk_evaluation(frame.head(5), ResultsStore(path), CountingPredict(backend), model_types=("nmf",))
+    # Arrêt brutal pendant l'écriture de l'enregistrement suivant
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"row": 5, "model_type": "nmf", "scores": {"pyth')
+
+    store = ResultsStore(path)
+    assert len(store) == 5
+    assert (5, "nmf") not in store
+
+    # La ligne suivante est écrite sur une ligne neuve : rien n'est perdu au rechargement
+    predict = CountingPredict(backend)
+    run_bulk_evaluation(frame.head(8), store, predict, model_types=("nmf",))
+    assert len(predict.calls) == 3
+    assert len(ResultsStore(path)) == 8
+    assert len(read_records(path)) == 8
+
+
+def test_error_rows_are_not_stored(backend, frame, tmp_path):
+    path = str(tmp_path / "bulk.jsonl")
+    rows = frame.head(6).copy()
+    # Titre et corps vides : le stub répond 400
+    rows.loc[[1, 4], ["Title", "Body"]] = ""
+    summary = run_bulk_evaluation(rows, ResultsStore(path), CountingPredict(backend), model_types=MODEL_TYPES)
+    assert summary == {"done": 8, "total": 12, "errors": 4}
+    store = ResultsStore(path)
+    assert len(store) == 8
+    assert all((row, model_type) not in store for row in (1, 4) for model_type in MODEL_TYPES)
+
+    # Les lignes en erreur sont retentées au lancement suivant
+    predict = CountingPredict(backend)
+    run_bulk_evaluation(rows, store, predict, model_types=MODEL_TYPES)
+    assert len(predict.calls) == 4
+
+# =============================================================
+# Métriques agrégées et par tag, comparées à evaluation.compute_metrics
+# =============================================================
+
+
+@pytest.fixture(scope="module")
+def evaluated(backend, frame, tmp_path_factory):
+    store = ResultsStore(str(tmp_path_factory.mktemp("bulk") / "bulk.jsonl"))
+    run_bulk_evaluation(frame, store, CountingPredict(backend), model_types=MODEL_TYPES)
+    return store
+
+
+def label_matrices(frame, store, model_type):
+    """Matrices (lignes, DEFAULT_TAGS) des tags vrais et des scores stockés."""
+    scores = store.scores(model_type)
+    y_true = np.array([[tag in parse_tags(raw) for tag in DEFAULT_TAGS] for raw in frame["FilteredTags"]], dtype=int)
+    y_scores = np.array([[scores[row].get(tag, 0.0) for tag in DEFAULT_TAGS] for row in frame.index])
+    return y_true, y_scores
+
+
+@pytest.mark.filterwarnings("ignore:.*is ill-defined")
+@pytest.mark.parametrize("model_type", MODEL_TYPES)
+@pytest.mark.parametrize("k", [3, 5])
+def test_aggregate_metrics_match_compute_metrics(evaluated, frame, model_type, k):
+    y_true, y_scores = label_matrices(frame, evaluated, model_type)
+    for threshold in (0.0, 0.3, 0.6):
+        metrics = aggregate_metrics(frame, evaluated, model_types=(model_type,), k=k,
+                                    thresholds={model_type: threshold}).iloc[0]
+        expected = compute_metrics(y_true, y_scores, thresholds=[threshold], k=k).iloc[0]
+        assert metrics["Rows"] == N_ROWS
+        assert metrics["Coverage"] == pytest.approx(expected["Coverage"], abs=1e-12)
+        if threshold == 0.0:
+            # Sans seuil, le top-k porte sur tous les scores comme dans compute_metrics
+            assert metrics[f"Precision@{k}"] == pytest.approx(expected[f"Precision@{k}"], abs=1e-12)
+
+
+@pytest.mark.filterwarnings("ignore:.*is ill-defined")
+@pytest.mark.parametrize("model_type", MODEL_TYPES)
+def test_per_tag_metrics_match_label_matrices(evaluated, frame, model_type, k=5):
+    y_true, y_scores = label_matrices(frame, evaluated, model_type)
+    top_k = np.zeros_like(y_true)
+    np.put_along_axis(top_k, np.argsort(-y_scores, axis=1, kind="stable")[:, :k], 1, axis=1)
+    table = per_tag_metrics(frame, evaluated, model_type, k=k).set_index("Tag")
+    for j, tag in enumerate(DEFAULT_TAGS):
+        support, predicted = y_true[:, j].sum(), top_k[:, j].sum()
+        true_positives = (y_true[:, j] & top_k[:, j]).sum()
+        if not support and not predicted:
+            assert tag not in table.index
+            continue
+        row = table.loc[tag]
+        assert (row["Support"], row["Predicted"]) == (support, predicted)
+        assert row["Precision"] == pytest.approx(true_positives / predicted if predicted else 0.0)
+        assert row["Recall"] == pytest.approx(true_positives / support if support else 0.0)
+    # Precision@k moyenne cohérente avec compute_metrics : somme des vrais positifs / (k × lignes)
+    expected = compute_metrics(y_true, y_scores, thresholds=[0.0], k=k).iloc[0][f"Precision@{k}"]
+    assert table["Predicted"].sum() == k * N_ROWS
+    assert (table["Precision"] * table["Predicted"]).sum() / (k * N_ROWS) == pytest.approx(expected)
@@ -0,0 +1,63 @@
+# Jeu de test partagé : copie Arrow projetée en mémoire, en lecture seule et identique au cache Parquet
+# python3 -m pytest tests/test_dataset.py
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from conftest import ROOT
+from dataset import load_dataset, load_shared_dataset
+
+
+@pytest.fixture
+def paths(tmp_path):
+    csv_path = str(tmp_path / "data.csv")
+    shutil.copyfile(os.path.join(ROOT, "test_data.csv"), csv_path)
+    return csv_path, str(tmp_path / "data.parquet"), str(tmp_path / "data.arrow")
+
+
+def test_shared_copy_matches_parquet(paths):
+    csv_path, cache_path, shared_path = paths
+    shared = load_shared_dataset(csv_path, shared_path, cache_path)
+    expected = load_dataset(csv_path, cache_path=cache_path)
+    assert len(shared) == len(expected) == 100
+    assert list(shared.frame.columns) == list(expected.columns)
+    for column in expected.columns:
+        values = [list(value) if isinstance(value, np.ndarray) else value for value in expected[column]]
+        assert shared.frame[column].tolist() == values, column
+    assert shared.labels == tuple(expected["Label"])
+
+
+def test_shared_copy_is_memory_mapped_and_read_only(paths):
+    csv_path, cache_path, shared_path = paths
+    load_shared_dataset(csv_path, shared_path, cache_path)
+    before = pa.total_allocated_bytes()
+    shared = load_shared_dataset(csv_path, shared_path, cache_path)
+    # Les colonnes ne sont pas recopiées dans le tas : elles pointent dans le fichier projeté
+    assert pa.total_allocated_bytes() - before < shared.table.nbytes / 10
+    usage = shared.memory_usage()
+    assert usage["rows"] == 100 and usage["mapped_bytes"] == os.path.getsize(shared_path)
+
+    buffer = shared.table.column("Title").chunk(0).buffers()[-1]
+    assert not buffer.is_mutable
+    view = np.frombuffer(buffer, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        view[0] = 0
+
+
+def test_shared_copy_is_rebuilt_when_the_csv_changes(paths):
+    csv_path, cache_path, shared_path = paths
+    load_shared_dataset(csv_path, shared_path, cache_path)
+    mtime = os.stat(shared_path).st_mtime_ns
+    load_shared_dataset(csv_path, shared_path, cache_path)
+    assert os.stat(shared_path).st_mtime_ns == mtime
+
+    # CSV réduit à ses 10 premières questions
+    pd.read_csv(csv_path, nrows=10).to_csv(csv_path, index=False)
+    shared = load_shared_dataset(csv_path, shared_path, cache_path)
+    assert len(shared) == 10
+    assert shared.frame["Title"].tolist() == load_dataset(csv_path, cache_path=cache_path)["Title"].tolist()
@@ -0,0 +1,56 @@
+# Export Prometheus : valeurs de labels échappées selon le format texte d'exposition
+# python3 -m pytest tests/test_instrumentation.py
+
+import re
+
+import pytest
+
+from instrumentation import MetricsRegistry
+
+LABEL_VALUE = r'"((?:[^"\\\n]|\\[\\"n])*)"'
+SAMPLE_LINE = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)"
+    r"(?:\{(?P<labels>[a-zA-Z_][a-zA-Z0-9_]*=" + LABEL_VALUE
+    + r"(?:,[a-zA-Z_][a-zA-Z0-9_]*=" + LABEL_VALUE + r")*)\})?"
+    r" (?P<value>\S+)$"
+)
+LABEL_PAIR = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)=' + LABEL_VALUE)
+
+TRICKY_VALUES = [
+    "http://10.0.0.1:5001/predict",
+    'modèle "v2"',
+    "C:\\models\\catboost.joblib",
+    "deux\nlignes",
+    '\\"',
+]
+
+
+def unescape(value):
+    return re.sub(r"\\([\\\"n])", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def parse_samples(text):
+    """(nom, {label: valeur}, valeur) de chaque échantillon ; échoue sur une ligne invalide."""
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match, f"ligne invalide : {line!r}"
+        labels = {key: unescape(value) for key, value in LABEL_PAIR.findall(match.group("labels") or "")}
+        samples.append((match.group("name"), labels, float(match.group("value"))))
+    return samples
+
+
+@pytest.mark.parametrize("value", TRICKY_VALUES)
+def test_prometheus_label_values_round_trip(value):
+    registry = MetricsRegistry()
+    registry.observe("predict", 0.02, endpoint=value)
+    registry.increment("predict_errors", 3, model=value)
+    samples = parse_samples(registry.to_prometheus())
+
+    counters = [s for s in samples if s[0] == "dashboard_predict_errors_total"]
+    assert counters == [("dashboard_predict_errors_total", {"model": value}, 3.0)]
+    buckets = [s for s in samples if s[0] == "dashboard_predict_seconds_bucket"]
+    assert buckets and all(labels["endpoint"] == value for _, labels, _ in buckets)
+    assert buckets[-1][1]["le"] == "+Inf" and buckets[-1][2] == 1.0
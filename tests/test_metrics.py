@@ -0,0 +1,83 @@
+# Équivalence des métriques binarisées vectorisées (denses et CSR) avec les versions de référence
+# python3 -m pytest tests/test_metrics.py
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from utils import coverage_score, coverage_score_reference, precision_at_k, precision_at_k_reference
+
+
+def random_labels(n_rows=60, n_labels=12, density=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random((n_rows, n_labels)) < density).astype(int)
+    y_pred = (rng.random((n_rows, n_labels)) < density).astype(int)
+    scores = rng.random((n_rows, n_labels))  # scores continus : pas d'ex aequo dans le top-k
+    return y_true, y_pred, scores
+
+
+def with_empty_rows(y):
+    y = y.copy()
+    y[::5] = 0
+    return y
+
+
+def csr_with_duplicates(y):
+    """Même matrice en CSR, chaque entrée stockée deux fois (doublons non sommés)."""
+    canonical = sp.csr_matrix(y)
+    indptr = 2 * canonical.indptr
+    indices = np.repeat(canonical.indices, 2)
+    matrix = sp.csr_matrix((np.ones(len(indices), dtype=int), indices, indptr), shape=y.shape)
+    assert not matrix.has_canonical_format
+    return matrix
+
+
+CASES = {
+    "dense": lambda y_true, y_pred: (y_true, y_pred),
+    "empty_rows": lambda y_true, y_pred: (with_empty_rows(y_true), with_empty_rows(y_pred)),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("seed", range(3))
+def test_coverage_score_matches_reference(case, seed):
+    y_true, y_pred, _ = random_labels(seed=seed)
+    y_true, y_pred = CASES[case](y_true, y_pred)
+    expected = coverage_score_reference(y_true, y_pred)
+    assert coverage_score(y_true, y_pred) == expected
+    assert coverage_score(sp.csr_matrix(y_true), y_pred) == expected
+    assert coverage_score(y_true, sp.csr_matrix(y_pred)) == expected
+    assert coverage_score(sp.csr_matrix(y_true), sp.csr_matrix(y_pred)) == expected
+
+
+def test_coverage_score_counts_duplicate_entries_once():
+    y_true, y_pred, _ = random_labels(seed=4)
+    expected = coverage_score_reference(y_true, y_pred)
+    assert coverage_score(csr_with_duplicates(y_true), csr_with_duplicates(y_pred)) == expected
+
+
+def test_coverage_score_ignores_explicit_zeros():
+    y_true, y_pred, _ = random_labels(seed=5)
+    sparse_true = sp.csr_matrix(y_true)
+    sparse_true.data[::2] = 0  # zéros explicites : ne sont pas des tags vrais
+    expected = coverage_score_reference(sparse_true.toarray(), y_pred)
+    assert coverage_score(sparse_true, y_pred) == expected
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("k", [1, 3, 5, 12, 20])
+def test_precision_at_k_matches_reference(case, k):
+    y_true, y_pred, scores = random_labels(seed=k)
+    y_true, _ = CASES[case](y_true, y_pred)
+    expected = precision_at_k_reference(y_true, scores, k=k)
+    assert precision_at_k(y_true, scores, k=k) == pytest.approx(expected, abs=1e-12)
+    assert precision_at_k(sp.csr_matrix(y_true), scores, k=k) == pytest.approx(expected, abs=1e-12)
+    assert precision_at_k(csr_with_duplicates(y_true), scores, k=k) == pytest.approx(expected, abs=1e-12)
+
+
+def test_all_empty_labels():
+    y_true = np.zeros((4, 3), dtype=int)
+    scores = np.random.default_rng(0).random((4, 3))
+    assert coverage_score(y_true, y_true) == coverage_score_reference(y_true, y_true) == 0.0
+    assert coverage_score(sp.csr_matrix(y_true), y_true) == 0.0
+    assert precision_at_k(sp.csr_matrix(y_true), scores, k=2) == precision_at_k_reference(y_true, scores, k=2) == 0.0
@@ -0,0 +1,74 @@
+# Équivalence du normaliseur compilé (regex en trie) avec normalize_text_reference
+# python3 -m pytest tests/test_normalize.py
+
+import random
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from utils import TextNormalizer, languages_frameworks, normalize_text, normalize_text_reference
+
+TRICKY_TEXTS = [
+    "",
+    "   ",
+    "I use C++ and C# with .NET Core on ASP.NET MVC",
+    "T-SQL vs SQL vs MySQL vs PostgreSQL; sql-server",
+    "node.js, Node.JS and NODE.js!! react/redux + vue.js",
+    "Objective-C, objective-c++ and C/C++ headers",
+    "python3 Python-2.7 pythonic __preserve_0__ __preserve_999__",
+    "CI/CD with GitHub, gitlab and Git; Jenkinsfile",
+    "tabs\tand\nnewlines\r\nand unicode: café, naïve, 日本語",
+    "java.util.List<String> vs JavaScript vs Java's streams",
+]
+
+WORD_LISTS = {
+    "dashboard": languages_frameworks,
+    "prefix_first": ["C", "C++", "C#", "Objective-C"],
+    "longest_first": ["ASP.NET Core", "ASP.NET", ".NET", "C#", "C"],
+    "overlap": ["ab-cd", "cd-ef", "SQL", "T-SQL", "My SQL"],
+    "duplicates": ["Java", "java", "JavaScript", "Java"],
+    "empty": [],
+}
+
+
+def random_texts(words, n=200, seed=0):
+    """Textes mêlant mots préservés (casse variée), ponctuation et mots ordinaires."""
+    rng = random.Random(seed)
+    filler = ["the", "a", "code", "error", "x", "+", "#", ".", "-", "/", ",", "__", "_preserve", "(", ")"]
+    pool = [word for word in words if word] + filler
+    texts = []
+    for _ in range(n):
+        tokens = []
+        for _ in range(rng.randint(0, 20)):
+            token = rng.choice(pool)
+            token = rng.choice([token, token.lower(), token.upper()])
+            tokens.append(token + rng.choice(["", " ", "  ", ".", ",", "-", "\n"]))
+        texts.append("".join(tokens))
+    return texts
+
+
+@pytest.mark.parametrize("name", sorted(WORD_LISTS))
+def test_normalizer_matches_reference(name):
+    words = WORD_LISTS[name]
+    normalizer = TextNormalizer(words)
+    for text in TRICKY_TEXTS + random_texts(words):
+        assert normalizer.normalize(text) == normalize_text_reference(text, words), text
+
+
+def test_normalize_text_matches_reference_on_test_data():
+    df = pd.read_csv(f"{ROOT}/test_data.csv", usecols=["Title", "Body"])
+    for text in (df["Title"] + " " + df["Body"]).tolist():
+        assert normalize_text(text, languages_frameworks) == normalize_text_reference(text, languages_frameworks)
+
+
+def test_normalize_many_keeps_order():
+    normalizer = TextNormalizer(languages_frameworks)
+    assert normalizer.normalize_many(TRICKY_TEXTS) == [normalize_text_reference(text, languages_frameworks)
+                                                       for text in TRICKY_TEXTS]
+
+
+def test_longest_first_keeps_symbol_words():
+    # Écart volontaire avec la référence (qui réduit C++ et C# à "c")
+    normalizer = TextNormalizer(["C", "C++", "C#"], longest_first=True)
+    assert normalizer.normalize("C++ or C# or C") == "c++ or c# or c"
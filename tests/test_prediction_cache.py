@@ -0,0 +1,77 @@
+# Cache des prédictions : éviction LRU, expiration (TTL) et clés de cache
+# python3 -m pytest tests/test_prediction_cache.py
+
+from prediction_cache import PredictionCache, prediction_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=3)
+    for key in "abc":
+        cache.put(key, {"scores": {key: 1.0}})
+    # Une lecture remet l'entrée en tête : "b" devient la moins récemment utilisée
+    assert cache.get("a") == {"scores": {"a": 1.0}}
+    cache.put("d", {})
+    assert "b" not in cache
+    assert all(key in cache for key in "acd")
+    # Réécrire une clé existante ne fait pas grossir le cache
+    cache.put("c", {"scores": {}})
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl=10.0, clock=clock)
+    cache.put("a", "old")
+    clock.now = 9.9
+    assert cache.get("a") == "old"
+    # La lecture ne prolonge pas la durée de vie
+    clock.now = 10.0
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    # Une nouvelle écriture repart de zéro
+    cache.put("a", "new")
+    clock.now = 19.0
+    assert cache.get("a") == "new"
+
+
+def test_ttl_none_never_expires():
+    clock = FakeClock()
+    cache = PredictionCache(ttl=None, clock=clock)
+    cache.put("a", 1)
+    clock.now = 1e9
+    assert cache.get("a") == 1
+
+
+def test_stats_count_lookups_but_not_membership():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1)
+    assert "a" in cache and "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3, "evictions": 0, "size": 0, "maxsize": 2}
+
+
+def test_key_depends_on_text_model_endpoint_and_version():
+    key = prediction_cache_key("Title", "Body", "catboost", "http:flask_app", "v1")
+    assert key == prediction_cache_key("Title", "Body", "catboost", "http:flask_app", "v1")
+    variants = [
+        ("Title ", "Body", "catboost", "http:flask_app", "v1"),
+        ("Title", "Body", "nmf", "http:flask_app", "v1"),
+        ("Title", "Body", "catboost", "http:flask_app|compact:256:20", "v1"),
+        ("Title", "Body", "catboost", "http:flask_app", "v2"),
+        # Pas de collision par concaténation du titre et du corps
+        ("TitleBody", "", "catboost", "http:flask_app", "v1"),
+    ]
+    assert len({key} | {prediction_cache_key(*variant) for variant in variants}) == len(variants) + 1
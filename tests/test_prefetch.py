@@ -0,0 +1,57 @@
+# État du préchargement : vagues remplacées, reprises au premier plan et sessions terminées
+# python3 -m pytest tests/test_prefetch.py
+
+import threading
+import time
+
+from prefetch import Prefetcher
+
+
+def wait_idle(prefetcher, timeout=5.0):
+    # Les tâches sont oubliées par le callback de fin, qui suit la fin du Future
+    deadline = time.monotonic() + timeout
+    while prefetcher._futures and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def assert_no_state(prefetcher):
+    assert prefetcher._generations == {}
+    assert prefetcher._pending == {}
+    assert prefetcher._futures == {}
+    assert prefetcher._sending == set()
+    assert prefetcher._dropped == set()
+
+
+def test_completed_waves_leave_no_state():
+    prefetcher = Prefetcher(max_workers=2, rate=1000, burst=1000)
+    try:
+        for session in range(50):
+            prefetcher.submit(f"session-{session}", [((session, model), lambda: {"scores": {}})
+                                                     for model in ("catboost", "nmf")])
+        wait_idle(prefetcher)
+        assert prefetcher.stats()["fetched"] == 100
+        assert_no_state(prefetcher)
+    finally:
+        prefetcher.shutdown()
+
+
+def test_superseded_and_taken_waves_leave_no_state():
+    release = threading.Event()
+    prefetcher = Prefetcher(max_workers=1, rate=1000, burst=1000)
+    try:
+        prefetcher.submit("scope", [("sent", lambda: release.wait(5)), ("queued", dict)])
+        while "sent" not in prefetcher._sending:
+            time.sleep(0.01)
+        # Une tâche déjà partie est reprise, celle en attente est abandonnée
+        joined = prefetcher.take("sent")
+        assert joined is not None
+        assert prefetcher.take("queued") is None
+        # Nouvelle vague pendant que la requête reprise est en cours, puis fin de session
+        prefetcher.submit("scope", [("next", dict)])
+        prefetcher.cancel("scope")
+        release.set()
+        assert joined.result(timeout=5) is True
+        wait_idle(prefetcher)
+        assert_no_state(prefetcher)
+    finally:
+        prefetcher.shutdown()
@@ -0,0 +1,103 @@
+# Rendu HTML des exemples : titres, corps et tags non fiables échappés, aperçus tronqués et fragments mémorisés
+# python3 -m pytest tests/test_rendering.py
+
+from html.parser import HTMLParser
+
+import pandas as pd
+import pytest
+
+from rendering import EXAMPLE_PARTS, ExampleRenderer, tag_badges, text_block, truncate_text
+
+HOSTILE_TITLE = '<script>alert("x")</script> & <b>bold</b>'
+HOSTILE_BODY = "Use <img src=x onerror=alert(1)> &amp; 'quotes' \"here\"\n</div><div style='x'>escape"
+HOSTILE_TAGS = ["c++", "<svg onload=alert(1)>", 'a"b']
+
+
+class FragmentParser(HTMLParser):
+    """Balises ouvertes et texte (entités décodées) d'un fragment HTML."""
+
+    def __init__(self, fragment):
+        super().__init__(convert_charrefs=True)
+        self.tags, self.attributes, self.text = [], [], []
+        self.feed(fragment)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append(tag)
+        self.attributes += [name for name, _ in attrs]
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def assert_only_markup_of_the_renderer(fragment):
+    parsed = FragmentParser(fragment)
+    assert set(parsed.tags) <= {"div", "span"}
+    assert set(parsed.attributes) <= {"class"}
+    return parsed
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Title": [HOSTILE_TITLE, "Short title"],
+        "Body": [HOSTILE_BODY, "word " * 400],
+        "TagsList": [HOSTILE_TAGS, "['python', 'pandas']"],
+        "FilteredTags": [HOSTILE_TAGS[:2], "['python']"],
+    })
+
+
+@pytest.mark.parametrize("text", [HOSTILE_TITLE, HOSTILE_BODY])
+def test_text_block_escapes_untrusted_text(text):
+    parsed = assert_only_markup_of_the_renderer(text_block(text))
+    assert "".join(parsed.text) == text
+
+
+def test_tag_badges_escape_tags():
+    parsed = assert_only_markup_of_the_renderer(tag_badges(HOSTILE_TAGS))
+    assert [data for data in parsed.text if data.strip()] == HOSTILE_TAGS
+
+
+def test_example_parts_escape_every_field(frame):
+    renderer = ExampleRenderer(frame, preview_chars=0)
+    title = assert_only_markup_of_the_renderer(renderer.render(0, "title"))
+    body = assert_only_markup_of_the_renderer(renderer.render(0, "body"))
+    assert "".join(title.text) == HOSTILE_TITLE
+    assert "".join(body.text) == HOSTILE_BODY
+    for part in ("tags", "filtered_tags"):
+        tags = assert_only_markup_of_the_renderer(renderer.render(0, part))
+        assert set(HOSTILE_TAGS[:2]) <= set(tags.text)
+    with pytest.raises(ValueError):
+        renderer.render(0, "unknown")
+
+
+def test_truncate_text_cuts_at_line_or_word():
+    assert truncate_text("short", 10) == ("short", False)
+    assert truncate_text("x" * 50, 0) == ("x" * 50, False)
+    text = "first line\nsecond line that is long"
+    assert truncate_text(text, 20) == ("first line …", True)
+    assert truncate_text("alpha beta gamma delta", 15) == ("alpha beta …", True)
+    # Un seul mot plus long que la limite : coupé à la limite
+    assert truncate_text("y" * 30, 10) == ("y" * 10 + " …", True)
+
+
+def test_body_preview_and_expansion(frame):
+    renderer = ExampleRenderer(frame, preview_chars=100)
+    assert renderer.is_truncated(1) and not renderer.is_truncated(0)
+    preview = "".join(FragmentParser(renderer.render(1, "body")).text)
+    full = "".join(FragmentParser(renderer.render(1, "body", expanded=True)).text)
+    assert len(preview) <= 100 + 2 and preview.endswith(" …")
+    assert full == frame.at[1, "Body"]
+    assert renderer.payload_bytes(1) < renderer.payload_bytes(1, expanded=True)
+
+
+def test_fragments_are_memoized(frame):
+    renderer = ExampleRenderer(frame, maxsize=16)
+    first = [renderer.render(row, part) for row in (0, 1) for part in EXAMPLE_PARTS]
+    assert renderer.cache_info().misses == 8
+    # Lignes numpy et `expanded` sans effet hors du corps : mêmes entrées du cache
+    again = [renderer.render(row, part, expanded=part != "body")
+             for row in pd.Index([0, 1]) for part in EXAMPLE_PARTS]
+    assert again == first
+    info = renderer.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (8, 8, 8)
@@ -0,0 +1,103 @@
+# Recherche plein texte : tokenisation, classement BM25 comparé à un calcul direct, filtres de tags et persistance
+# python3 -m pytest tests/test_search.py
+
+import math
+
+import numpy as np
+import pytest
+
+from search import BM25_B, BM25_K1, PREFIX_WEIGHT, TAG_WEIGHT, TITLE_WEIGHT, SearchIndex, parse_query, tokenize
+
+TITLES = [
+    "Vectorize a loop with SSE",
+    "Delete duplicates from a list",
+    "SSE2 intrinsics in C++",
+    "Remove duplicate rows in pandas",
+    "Node.js list files",
+    "Delete a file in C#",
+]
+BODIES = [
+    "I want faster code using sse instructions.",
+    "How to delete duplicate items from a python list?",
+    "Which header declares the sse2 intrinsics?",
+    "My DataFrame has duplicate rows, how to drop them?",
+    "List all files of a directory with node.js fs module.",
+    "How do I delete a file in c#? File.Delete fails.",
+]
+TAGS = [["c++", "sse"], ["python", "list"], ["c++", "sse"], ["python", "pandas"], ["node.js"], ["c#"]]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex.build(TITLES, BODIES, TAGS)
+
+
+def bm25_reference(weights):
+    """Scores BM25 ({mot : poids de la requête}) calculés question par question, sans index inversé."""
+    documents = []
+    for title, body, tags in zip(TITLES, BODIES, TAGS):
+        counts = {}
+        for words, weight in ((tokenize(title), TITLE_WEIGHT), (tokenize(body), 1), (tags, TAG_WEIGHT)):
+            for word in words:
+                counts[word] = counts.get(word, 0) + weight
+        documents.append(counts)
+    average = np.mean([sum(counts.values()) for counts in documents])
+    scores = np.zeros(len(documents))
+    for term, weight in weights.items():
+        frequency = sum(term in counts for counts in documents)
+        idf = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+        for i, counts in enumerate(documents):
+            tf = counts.get(term, 0)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / average)
+            scores[i] += weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+def test_tokenize_keeps_language_names():
+    assert tokenize("Using C++, C# and Node.js (ASP.NET).") == ["using", "c++", "c#", "and", "node.js", "asp.net"]
+    assert parse_query("tag:C++ SSE intrinsics tag:") == (["sse", "intrinsics"], ["c++"])
+
+
+def test_ranking_matches_bm25(index):
+    rows, total = index.search("delete duplicate", n=10)
+    # "duplicates" prolonge "duplicate" : il compte avec le poids PREFIX_WEIGHT
+    expected = bm25_reference({"delete": 1.0, "duplicate": 1.0, "duplicates": PREFIX_WEIGHT})
+    assert total == np.count_nonzero(expected)
+    assert list(rows) == sorted(np.flatnonzero(expected), key=lambda row: (-expected[row], row))
+
+
+def test_prefix_expansion_scores_longer_words_lower(index):
+    # "sse" trouve aussi "sse2" (ligne 2), avec le poids PREFIX_WEIGHT
+    rows, total = index.search("sse")
+    assert set(rows) == {0, 2} and total == 2
+    expected = bm25_reference({"sse": 1.0, "sse2": PREFIX_WEIGHT})
+    assert list(rows) == sorted([0, 2], key=lambda row: -expected[row])
+
+
+def test_tag_filters_are_exact_and_combined(index):
+    rows, total = index.search("tag:python")
+    assert list(rows) == [1, 3] and total == 2
+    assert list(index.search("tag:python tag:pandas")[0]) == [3]
+    assert list(index.search("tag:c++ delete")[0]) == []
+    assert index.search("tag:unknown")[1] == 0
+    # "c" ne doit pas correspondre au tag "c++" ni à "c#"
+    assert index.search("tag:c")[1] == 0
+    assert index.search("zzz")[1] == 0
+    assert index.search("")[1] == 0
+
+
+def test_results_are_truncated_but_total_is_kept(index):
+    rows, total = index.search("delete duplicate", n=2)
+    assert total > 2 and len(rows) == 2
+    assert list(rows) == list(index.search("delete duplicate", n=10)[0][:2])
+
+
+def test_saved_index_gives_the_same_results(index, tmp_path):
+    path = str(tmp_path / "search.npz")
+    index.save(path, fingerprint="v1")
+    loaded, fingerprint = SearchIndex.load(path)
+    assert fingerprint == "v1"
+    for query in ("delete duplicate", "sse", "tag:python list", "node.js"):
+        rows, total = loaded.search(query)
+        expected_rows, expected_total = index.search(query)
+        assert list(rows) == list(expected_rows) and total == expected_total
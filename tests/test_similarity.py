@@ -0,0 +1,83 @@
+# Questions similaires : index TF-IDF comparé à scikit-learn, requêtes, persistance et suggestions de tags
+# python3 -m pytest tests/test_similarity.py
+
+import os
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import ROOT
+from similarity import SimilarityIndex, load_similarity_index, suggest_tags
+
+TEXTS = [
+    "read csv file pandas",
+    "pandas dataframe merge two columns",
+    "java stream filter list",
+    "sort list python python",
+    "read json file python",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SimilarityIndex.build(TEXTS)
+
+
+def test_weights_match_sklearn(index):
+    vectorizer = TfidfVectorizer(smooth_idf=True, sublinear_tf=True, token_pattern=r"\S+")
+    expected = vectorizer.fit_transform(TEXTS)
+    assert index.vocabulary == list(vectorizer.get_feature_names_out())
+    np.testing.assert_allclose(index.idf, vectorizer.idf_)
+    np.testing.assert_allclose(index.matrix.toarray(), expected.toarray())
+
+
+def test_raw_query_is_tokenized_like_the_index(index):
+    # Ponctuation collée et majuscules : mêmes colonnes que le texte prétraité
+    raw = index.vectorize("Read a CSV file", "with pandas.")
+    np.testing.assert_allclose(raw.toarray(), index.matrix[0].toarray())
+    assert index.vectorize("", "unknown words only").nnz == 0
+
+
+def test_neighbours_are_ranked_and_exclude_the_question(index):
+    neighbours = index.similar_to_row(0, n=10)
+    rows = [row for row, _ in neighbours]
+    scores = [score for _, score in neighbours]
+    assert 0 not in rows
+    # Seules les questions partageant un mot sont renvoyées, par similarité décroissante
+    assert set(rows) == {1, 4}
+    assert scores == sorted(scores, reverse=True) and all(0 < s <= 1 for s in scores)
+    assert index.similar_to_row(0, n=1) == neighbours[:1]
+    expected = (index.matrix @ index.matrix[0].T).toarray().ravel()
+    assert scores == pytest.approx([expected[row] for row in rows])
+
+
+def test_suggest_tags_weights_neighbours_by_similarity():
+    neighbours = [(0, 0.6), (1, 0.2)]
+    tag_lists = ["['python', 'pandas']", "['python', 'java']"]
+    suggested = dict(suggest_tags(neighbours, tag_lists))
+    assert suggested == pytest.approx({"python": 1.0, "pandas": 0.75, "java": 0.25})
+    assert suggest_tags([], tag_lists) == []
+
+
+def test_persisted_index_is_reused_until_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "data.csv")
+    with open(os.path.join(ROOT, "test_data.csv"), "rb") as src, open(csv_path, "wb") as dst:
+        dst.write(src.read())
+    index_path = str(tmp_path / "index.npz")
+
+    built = load_similarity_index(csv_path, index_path)
+    assert os.path.exists(index_path)
+    mtime = os.stat(index_path).st_mtime_ns
+    loaded = load_similarity_index(csv_path, index_path)
+    assert os.stat(index_path).st_mtime_ns == mtime
+    assert loaded.vocabulary == built.vocabulary
+    assert (loaded.matrix != built.matrix).nnz == 0
+    assert loaded.similar_to_row(3) == built.similar_to_row(3)
+
+    # CSV modifié : l'empreinte ne correspond plus, l'index est reconstruit
+    with open(csv_path, "ab") as f:
+        f.write(b"\n")
+    os.utime(csv_path, ns=(mtime + 10**9, mtime + 10**9))
+    load_similarity_index(csv_path, index_path)
+    assert os.stat(index_path).st_mtime_ns != mtime
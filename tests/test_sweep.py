@@ -0,0 +1,91 @@
+# Équivalence de compute_metrics_sweep (un seul tri) avec compute_metrics seuil par seuil (scikit-learn)
+# python3 -m pytest tests/test_sweep.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from evaluation import compute_metrics
+from utils import threshold_sweep_counts
+
+THRESHOLDS = [0.0, 0.1, 0.25, 0.5, 0.5, 0.75, 0.9, 1.0, 1.1]
+
+
+def random_problem(n_rows=80, n_labels=10, density=0.25, seed=0):
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random((n_rows, n_labels)) < density).astype(int)
+    # Scores arrondis : des ex aequo tombent exactement sur les seuils
+    scores = np.round(rng.random((n_rows, n_labels)), 2)
+    return y_true, scores
+
+
+def assert_same_metrics(y_true, scores, k=3):
+    expected = compute_metrics(y_true, scores, thresholds=THRESHOLDS, k=k, model_name="m", approach="a")
+    swept = compute_metrics(y_true, scores, thresholds=THRESHOLDS, k=k, model_name="m", approach="a", sweep=True)
+    assert list(swept.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(swept, expected, check_exact=False, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sweep_matches_sklearn(seed):
+    assert_same_metrics(*random_problem(seed=seed))
+
+
+@pytest.mark.filterwarnings("ignore:.*is ill-defined")  # labels sans aucun exemple : 0 des deux côtés
+def test_sweep_with_empty_rows_and_unused_labels():
+    y_true, scores = random_problem(seed=4)
+    y_true[::4] = 0   # exemples sans tag vrai
+    y_true[:, 2] = 0  # label jamais vrai
+    assert_same_metrics(y_true, scores)
+
+
+def test_sweep_accepts_csr_labels():
+    y_true, scores = random_problem(seed=5)
+    expected = compute_metrics(y_true, scores, thresholds=THRESHOLDS, sweep=True)
+    swept = compute_metrics(sp.csr_matrix(y_true), scores, thresholds=THRESHOLDS, sweep=True)
+    pd.testing.assert_frame_equal(swept, expected)
+
+
+def test_sweep_counts_never_densify_csr_labels(monkeypatch):
+    y_true, scores = random_problem(seed=7)
+    expected = threshold_sweep_counts(y_true, scores, THRESHOLDS)
+
+    def densify(*args, **kwargs):
+        raise AssertionError("y_true densifiée")
+
+    # Le balayage doit rester sur les indices creux
+    monkeypatch.setattr(sp.csr_matrix, "toarray", densify)
+    monkeypatch.setattr(sp.csr_matrix, "todense", densify)
+    counts = threshold_sweep_counts(sp.csr_matrix(y_true), scores, THRESHOLDS)
+    for name in ("tp", "fp", "fn", "covered"):
+        np.testing.assert_array_equal(counts[name], expected[name])
+
+
+def test_sweep_counts_csr_with_duplicates_and_explicit_zeros():
+    y_true, scores = random_problem(seed=8)
+    # Chaque vrai label stocké deux fois, plus un zéro explicite sur un label faux de la ligne
+    indptr, indices, data = [0], [], []
+    for row in y_true:
+        true_cols = np.flatnonzero(row)
+        false_cols = np.flatnonzero(row == 0)
+        indices += list(np.repeat(true_cols, 2)) + list(false_cols[:1])
+        data += [1] * (2 * len(true_cols)) + [0] * len(false_cols[:1])
+        indptr.append(len(indices))
+    messy = sp.csr_matrix((data, indices, indptr), shape=y_true.shape)
+    assert not messy.has_canonical_format
+    expected = threshold_sweep_counts(y_true, scores, THRESHOLDS)
+    counts = threshold_sweep_counts(messy, scores, THRESHOLDS)
+    for name in ("tp", "fp", "fn", "covered"):
+        np.testing.assert_array_equal(counts[name], expected[name])
+
+
+@pytest.mark.parametrize("labels", ["random", "all_negative", "all_positive"])
+def test_sweep_single_label_column(labels):
+    # Une seule colonne : scikit-learn passe en cible binaire (moyennes sur les classes 0 et 1)
+    y_true, scores = random_problem(n_labels=1, density=0.4, seed=6)
+    if labels == "all_negative":
+        y_true[:] = 0
+    elif labels == "all_positive":
+        y_true[:] = 1
+    assert_same_metrics(y_true, scores, k=1)
@@ -0,0 +1,117 @@
+# Équivalence des métriques sur listes de tags (matrices CSR) avec les boucles de référence
+# python3 -m pytest tests/test_tag_list_metrics.py
+
+import random
+import threading
+
+import pytest
+
+from utils import (
+    TagVocabulary,
+    compute_row_scores,
+    coverage_score_true_pred,
+    coverage_score_true_pred_reference,
+    precision_at_k_true_pred,
+    precision_at_k_true_pred_reference,
+    tag_list_metrics,
+    tag_list_per_tag_counts,
+    tag_list_row_scores,
+)
+
+TAGS = ["python", "java", "c++", "c#", ".net", "sql", "javascript", "html", "css", "linux"]
+
+
+def random_tag_lists(n_rows=80, seed=0, empty=True, duplicates=True):
+    rng = random.Random(seed)
+    y_true, y_pred = [], []
+    for _ in range(n_rows):
+        true_tags = rng.sample(TAGS, rng.randint(0 if empty else 1, 4))
+        pred_tags = rng.sample(TAGS, rng.randint(0 if empty else 1, 8))
+        if duplicates and pred_tags and rng.random() < 0.3:
+            pred_tags.insert(rng.randrange(len(pred_tags) + 1), rng.choice(pred_tags))
+        if duplicates and true_tags and rng.random() < 0.3:
+            true_tags.append(true_tags[0])
+        y_true.append(true_tags)
+        y_pred.append(pred_tags)
+    return y_true, y_pred
+
+
+def reference_metrics(y_true, y_pred, k):
+    rows = [compute_row_scores(true_tags, pred_tags, k=k) for true_tags, pred_tags in zip(y_true, y_pred)]
+    return {
+        "coverage": coverage_score_true_pred_reference(y_true, y_pred),
+        "precision": sum(row[0] for row in rows) / len(rows),
+        "recall": sum(row[1] for row in rows) / len(rows),
+        "f1": sum(row[2] for row in rows) / len(rows),
+    }
+
+
+CASES = {
+    "plain": dict(empty=False, duplicates=False),
+    "empty_rows": dict(empty=True, duplicates=False),
+    "duplicates": dict(empty=False, duplicates=True),
+    "empty_and_duplicates": dict(empty=True, duplicates=True),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("k", [1, 3, 5, 10])
+def test_tag_list_metrics_match_reference(case, k):
+    y_true, y_pred = random_tag_lists(seed=k, **CASES[case])
+    # Valeurs identiques au flottant près : mêmes dénominateurs et mêmes sommes séquentielles
+    assert tag_list_metrics(y_true, y_pred, k=k) == reference_metrics(y_true, y_pred, k)
+    assert coverage_score_true_pred(y_true, y_pred) == coverage_score_true_pred_reference(y_true, y_pred)
+    assert precision_at_k_true_pred(y_true, y_pred, k=k) == precision_at_k_true_pred_reference(y_true, y_pred, k=k)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_row_scores_match_reference(case):
+    y_true, y_pred = random_tag_lists(seed=7, **CASES[case])
+    scores = tag_list_row_scores(y_true, y_pred, k=5)
+    for i, (true_tags, pred_tags) in enumerate(zip(y_true, y_pred)):
+        precision, recall, f1 = compute_row_scores(true_tags, pred_tags, k=5)
+        assert (scores["precision"][i], scores["recall"][i], scores["f1"][i]) == (precision, recall, f1)
+        assert scores["covered"][i] == bool(set(true_tags) & set(pred_tags))
+
+
+def test_shared_vocabulary_gives_same_results():
+    y_true, y_pred = random_tag_lists(seed=3)
+    vocabulary = TagVocabulary(y_true)
+    vocabulary.update(["unrelated", "tags"])  # colonnes supplémentaires, absentes des listes
+    assert tag_list_metrics(y_true, y_pred, vocabulary=vocabulary) == tag_list_metrics(y_true, y_pred)
+
+
+def test_per_tag_counts_match_python_counts():
+    y_true, y_pred = random_tag_lists(seed=11)
+    counts = tag_list_per_tag_counts(y_true, y_pred, k=3)
+    for j, tag in enumerate(counts["tags"]):
+        assert counts["support"][j] == sum(tag in true_tags for true_tags in y_true)
+        assert counts["predicted"][j] == sum(tag in pred_tags[:3] for pred_tags in y_pred)
+        assert counts["true_positives"][j] == sum(
+            tag in true_tags and tag in pred_tags[:3] for true_tags, pred_tags in zip(y_true, y_pred)
+        )
+
+
+def test_vocabulary_growing_concurrently():
+    # Vocabulaire partagé entre sessions : un autre thread interne des tags pendant le calcul
+    y_true, y_pred = random_tag_lists(n_rows=500, seed=5)
+    expected = tag_list_metrics(y_true, y_pred)
+    vocabulary = TagVocabulary()
+    stop = threading.Event()
+
+    def grow():
+        i = 0
+        while not stop.is_set():
+            vocabulary.update([f"new-{i}"])
+            i += 1
+
+    thread = threading.Thread(target=grow)
+    thread.start()
+    try:
+        for _ in range(20):
+            assert tag_list_metrics(y_true, y_pred, vocabulary=vocabulary) == expected
+            counts = tag_list_per_tag_counts(y_true, y_pred, vocabulary=vocabulary)
+            assert len(counts["tags"]) == len(counts["support"])
+    finally:
+        stop.set()
+        thread.join()
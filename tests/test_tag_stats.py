@@ -0,0 +1,90 @@
+# Statistiques des tags : fréquences, tags retirés par le filtrage et co-occurrences (comptage direct)
+# python3 -m pytest tests/test_tag_stats.py
+
+import os
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from tag_stats import TagStatistics, load_tag_statistics
+
+TAGS_LIST = [
+    ["python", "pandas", "csv"],
+    ["python", "list"],
+    ["java", "list", "stream"],
+    ["python", "pandas"],
+    ["c++"],
+]
+FILTERED_TAGS = [
+    ["python", "pandas"],
+    ["python"],
+    ["java"],
+    ["python", "pandas"],
+    [],
+]
+
+
+@pytest.fixture(scope="module")
+def stats():
+    return TagStatistics.build(TAGS_LIST, FILTERED_TAGS)
+
+
+def count_pairs(tag_lists):
+    counts = {}
+    for tags in tag_lists:
+        for tag in tags:
+            counts[(tag, tag)] = counts.get((tag, tag), 0) + 1
+        for a, b in combinations(tags, 2):
+            counts[(a, b)] = counts.get((a, b), 0) + 1
+            counts[(b, a)] = counts.get((b, a), 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("source, tag_lists", [("TagsList", TAGS_LIST), ("FilteredTags", FILTERED_TAGS)])
+def test_cooccurrences_match_direct_count(stats, source, tag_lists):
+    matrix = stats.cooccurrences[source].toarray()
+    expected = np.zeros_like(matrix)
+    for (a, b), count in count_pairs(tag_lists).items():
+        expected[stats.tags.index(a), stats.tags.index(b)] = count
+    np.testing.assert_array_equal(matrix, expected)
+    assert stats.tags_per_question(source) == pytest.approx(sum(map(len, tag_lists)) / len(tag_lists))
+
+
+def test_dropped_fraction(stats):
+    # 11 occurrences dont 6 conservées ; csv, list, stream et c++ disparaissent (4 tags distincts sur 7)
+    assert stats.dropped_fraction() == pytest.approx({"occurrences": 5 / 11, "distinct": 4 / 7})
+
+
+def test_frequency_table_is_sorted(stats):
+    table = stats.frequency_table()
+    assert list(table["Tag"][:3]) == ["python", "pandas", "list"]
+    dropped = table.set_index("Tag").loc["list"]
+    assert (dropped["TagsList"], dropped["FilteredTags"], dropped["Part conservée"]) == (2, 0, 0.0)
+    assert list(table["TagsList"]) == sorted(table["TagsList"], reverse=True)
+    assert len(stats.frequency_table(n=2)) == 2
+
+
+def test_top_cooccurrences_skip_absent_tags(stats):
+    top = stats.top_cooccurrences("FilteredTags", n=10)
+    assert list(top.index) == ["python", "pandas", "java"]
+    assert top.at["python", "pandas"] == top.at["pandas", "python"] == 2
+    assert top.at["java", "java"] == 1
+
+
+def test_saved_statistics_are_reused(tmp_path, monkeypatch):
+    # Le cache Parquet de dataset.py va dans .cache/ du répertoire courant
+    monkeypatch.chdir(tmp_path)
+    csv_path = str(tmp_path / "data.csv")
+    with open(os.path.join(ROOT, "test_data.csv"), "rb") as src, open(csv_path, "wb") as dst:
+        dst.write(src.read())
+    stats_path = str(tmp_path / "stats.npz")
+
+    built = load_tag_statistics(csv_path, stats_path)
+    mtime = os.stat(stats_path).st_mtime_ns
+    loaded = load_tag_statistics(csv_path, stats_path)
+    assert os.stat(stats_path).st_mtime_ns == mtime
+    assert loaded.tags == built.tags and loaded.n_rows == built.n_rows == 100
+    for source in built.cooccurrences:
+        assert (loaded.cooccurrences[source] != built.cooccurrences[source]).nnz == 0
@@ -17,37 +17,52 @@ def run_cmd(cmd):
     result = subprocess.check_output(cmd, shell=True)
     return result.decode('utf-8').strip()
 
-# 1. Trouver la task "RUNNING" du service ECS
-task_arn = run_cmd(
-    f"aws ecs list-tasks --cluster {CLUSTER_NAME} --service-name {SERVICE_NAME} --desired-status RUNNING --output text --query 'taskArns[0]'"
-)
-if not task_arn:
+# 1. Trouver les tasks "RUNNING" du service ECS (toutes : le dashboard répartit les requêtes)
+task_arns = run_cmd(
+    f"aws ecs list-tasks --cluster {CLUSTER_NAME} --service-name {SERVICE_NAME} --desired-status RUNNING --output text --query 'taskArns'"
+).split()
+if not task_arns or task_arns == ["None"]:
     raise Exception("Aucune task RUNNING trouvée.")
 
-# 2. Récupérer l'ENI (Elastic Network Interface) de la task
-eni_id = run_cmd(
-    f"aws ecs describe-tasks --cluster {CLUSTER_NAME} --tasks {task_arn} "
-    f"--query 'tasks[0].attachments[0].details[?name==`networkInterfaceId`].value' --output text"
-)
+# 2. Récupérer l'ENI (Elastic Network Interface) et la définition de chaque task
+tasks = json.loads(run_cmd(
+    f"aws ecs describe-tasks --cluster {CLUSTER_NAME} --tasks {' '.join(task_arns)} "
+    f"--query 'tasks[].{{eni: attachments[0].details[?name==`networkInterfaceId`].value | [0], definition: taskDefinitionArn}}' "
+    f"--output json"
+))
 
-# 3. Récupérer l'IP publique de l'ENI
-ip_publique = run_cmd(
-    f"aws ec2 describe-network-interfaces --network-interface-ids {eni_id} "
-    f"--query 'NetworkInterfaces[0].Association.PublicIp' --output text"
-)
+# 3. Récupérer l'IP publique de chaque ENI
+ips_publiques = sorted(run_cmd(
+    f"aws ec2 describe-network-interfaces --network-interface-ids {' '.join(task['eni'] for task in tasks)} "
+    f"--query 'NetworkInterfaces[].Association.PublicIp' --output text"
+).split())
 
-print(f"Nouvelle IP publique : {ip_publique}")
+print(f"IP publiques : {', '.join(ips_publiques)}")
 
-# 4. Met à jour config.json
-url_api = f"http://{ip_publique}:{API_PORT}/predict"
+# 4. Met à jour config.json (les autres clés sont conservées)
+urls_api = [f"http://{ip}:{API_PORT}/predict" for ip in ips_publiques]
+try:
+    with open(CONFIG_JSON, "r") as f:
+        config = json.load(f)
+except FileNotFoundError:
+    config = {}
+previous = dict(config)
+# Une seule task : chaîne, comme avant ; plusieurs : liste d'endpoints
+config["URL_API"] = urls_api[0] if len(urls_api) == 1 else urls_api
+# La révision de la définition de task sert de version du modèle : elle change à chaque
+# déploiement (et invalide le cache de prédictions), pas quand une task redémarre
+config["MODEL_VERSION"] = tasks[0]["definition"].rsplit("/", 1)[-1]
+if config == previous:
+    print(f"{CONFIG_JSON} déjà à jour, rien à pousser.")
+    raise SystemExit(0)
 with open(CONFIG_JSON, "w") as f:
-    json.dump({"URL_API": url_api}, f, indent=4, ensure_ascii=False)
+    json.dump(config, f, indent=4, ensure_ascii=False)
 
-print(f"{CONFIG_JSON} mis à jour avec : {url_api}")
+print(f"{CONFIG_JSON} mis à jour avec : {', '.join(urls_api)}")
 
 # 5. Commit et push Git
 subprocess.run(["git", "add", CONFIG_JSON])
-subprocess.run(["git", "commit", "-m", f"Update API URL to {ip_publique}"])
+subprocess.run(["git", "commit", "-m", f"Update API URLs to {', '.join(ips_publiques)}"])
 subprocess.run(["git", "push"])
 
 print("Commit & push faits. C'est prêt !")
@@ -1,9 +1,13 @@
 import re
+import ast
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 import json
+import threading
+from functools import lru_cache
+from itertools import chain
 
-from sklearn.metrics import f1_score, hamming_loss, jaccard_score
 
 def load_config(config_path="config/config.json"):
     """Load configuration from JSON file."""
@@ -81,8 +85,11 @@ languages_frameworks = [
 
 
 
-def normalize_text(text, languages_frameworks):
-    """Normalise le texte tout en préservant certains langages et frameworks.
+def normalize_text_reference(text, languages_frameworks):
+    """Implémentation historique de `normalize_text` (un `re.sub` par mot).
+
+    Conservée comme référence pour les tests d'équivalence et les benchmarks :
+    elle recompile et parcourt le texte une fois par mot à préserver.
 
     Args:
         text (str): Le texte à normaliser.
@@ -111,41 +118,409 @@ def normalize_text(text, languages_frameworks):
 
     return text
 
+
+_CLEAN_PATTERN = re.compile(r'[^a-zA-Z0-9\s_.]+')
+_SPACES_PATTERN = re.compile(r'\s+')
+_PLACEHOLDER_PATTERN = re.compile(r'__preserve_(0|[1-9][0-9]*)__')
+
+
+def _is_word_char(char):
+    return re.match(r'\w', char) is not None
+
+
+def _unshadowed_words(languages_frameworks):
+    """Écarte les mots que la référence ne peut jamais reconnaître.
+
+    Un mot est masqué dès qu'un mot listé avant lui apparaît (entre deux `\\b`)
+    dans chacune de ses occurrences : la passe du premier détruit toujours le
+    second. Les bords du mot sont entourés d'un caractère de nature opposée
+    pour simuler la frontière `\\b` qui encadre toute occurrence réelle.
+    """
+    kept = []
+    for index, word in enumerate(languages_frameworks):
+        if not word:
+            continue
+        left = ' ' if _is_word_char(word[0]) else 'a'
+        right = ' ' if _is_word_char(word[-1]) else 'a'
+        padded = left + word + right
+        shadowed = any(
+            re.search(r'\b' + re.escape(previous) + r'\b', padded, flags=re.IGNORECASE)
+            for previous in languages_frameworks[:index] if previous
+        )
+        if not shadowed:
+            kept.append((index, word))
+    return kept
+
+
+def _has_ambiguous_overlap(words):
+    """Indique si deux mots peuvent se chevaucher partiellement dans un texte.
+
+    Cas où l'ordre d'application des passes change le résultat et où une
+    alternance unique ne reproduit plus la référence. Un mot qui commence ou
+    finit par un caractère non alphanumérique modifie aussi les frontières `\\b`
+    de ses voisins une fois remplacé par un placeholder.
+    """
+    for word in words:
+        if not (_is_word_char(word[0]) and _is_word_char(word[-1])):
+            return True
+    for first in words:
+        for second in words:
+            if first is second:
+                continue
+            for size in range(1, min(len(first), len(second))):
+                cut = len(first) - size
+                if (
+                    re.fullmatch(re.escape(first[cut:]), second[:size], flags=re.IGNORECASE)
+                    and _is_word_char(first[cut - 1]) != _is_word_char(first[cut])
+                    and _is_word_char(second[size - 1]) != _is_word_char(second[size])
+                ):
+                    return True
+    return False
+
+
+def _compile_trie(alternatives, left, right):
+    """Compile les mots en une seule regex factorisée par préfixes (trie).
+
+    Chaque fin de mot porte un groupe nommé vide `w<index>` : `lastgroup` donne
+    l'index du mot reconnu. Les branches qui prolongent le préfixe sont essayées
+    avant la fin de mot, donc la correspondance la plus longue l'emporte.
+    """
+    trie = {}
+    for index, word in alternatives:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node.setdefault(None, index)  # en cas de doublon, le premier listé reste
+
+    def to_regex(node):
+        branches = [
+            re.escape(char) + to_regex(child)
+            for char, child in sorted((key, value) for key, value in node.items() if key is not None)
+        ]
+        if None in node:
+            branches.append(f"{right}(?P<w{node[None]}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    if not trie:
+        return None
+    return re.compile(left + to_regex(trie), flags=re.IGNORECASE)
+
+
+class TextNormalizer:
+    """Normaliseur compilé une seule fois à partir de la liste des mots à préserver.
+
+    Les ~100 `re.sub` successifs de `normalize_text_reference` sont remplacés par
+    une seule regex précompilée, factorisée par préfixes : le texte est parcouru une fois pour poser
+    les placeholders, une fois pour le nettoyage et une fois pour la restauration.
+
+    Par défaut, la sortie est identique octet pour octet à celle de la
+    référence, y compris ses particularités. La référence applique les mots
+    l'un après l'autre : un mot qui contient un mot listé avant lui ne peut
+    jamais être reconnu ("SQL" passe avant "T-SQL", "C" avant "C++" et "C#",
+    qui sont donc réduits à "sql" et "c"). Ces mots masqués sont écartés à la
+    construction ; parmi les mots restants, le premier listé est aussi le plus
+    long à une position donnée, ce que donne la regex en trie. Si la liste contient
+    des chevauchements que l'alternance ne sait pas arbitrer comme la
+    référence, on retombe sur des passes successives (précompilées).
+
+    Avec `longest_first=True`, les mots les plus longs sont essayés en premier
+    et les bords sont testés par `(?<!\\w)`/`(?!\\w)` au lieu de `\\b`, de sorte
+    que "C++", "C#" ou "ASP.NET Core" sont conservés tels quels (sortie
+    volontairement différente de la référence).
+
+    Args:
+        languages_frameworks (list): Liste de langages et frameworks à préserver.
+        longest_first (bool): Priorité au mot le plus long plutôt qu'à l'ordre de la liste.
+    """
+
+    def __init__(self, languages_frameworks, longest_first=False):
+        self.words = list(languages_frameworks)
+        self.longest_first = longest_first
+        self._restore_words = [word.lower() for word in self.words]
+        self._passes = None
+        if longest_first:
+            alternatives = list(enumerate(self.words))
+            self._pattern = _compile_trie(alternatives, r'(?<!\w)', r'(?!\w)')
+            return
+        alternatives = _unshadowed_words(self.words)
+        if _has_ambiguous_overlap([word for _, word in alternatives]):
+            # Ordre d'application significatif : une passe par mot, comme la référence
+            self._passes = [
+                (re.compile(r'\b' + re.escape(word) + r'\b', flags=re.IGNORECASE), f"__preserve_{index}__")
+                for index, word in alternatives
+            ]
+        self._pattern = _compile_trie(alternatives, r'\b', r'\b')
+
+    def _protect(self, match):
+        return f"__preserve_{match.lastgroup[1:]}__"
+
+    def _restore(self, match):
+        index = int(match.group(1))
+        if index < len(self._restore_words):
+            return self._restore_words[index]
+        return match.group(0)
+
+    def normalize(self, text):
+        """Normalise un texte (même contrat que `normalize_text`).
+
+        Args:
+            text (str): Le texte à normaliser.
+
+        Returns:
+            str: Le texte normalisé avec les langages et frameworks préservés.
+        """
+        if self._passes is not None:
+            for pattern, placeholder in self._passes:
+                text = pattern.sub(placeholder, text)
+        elif self._pattern is not None:
+            text = self._pattern.sub(self._protect, text)
+        text = _CLEAN_PATTERN.sub(' ', text)
+        text = text.lower()
+        text = _SPACES_PATTERN.sub(' ', text).strip()
+        if not self._restore_words:
+            return text
+        return _PLACEHOLDER_PATTERN.sub(self._restore, text)
+
+    def normalize_many(self, texts):
+        """Normalise un itérable de textes.
+
+        Args:
+            texts (iterable): Textes à normaliser.
+
+        Returns:
+            list: Les textes normalisés, dans le même ordre.
+        """
+        normalize = self.normalize
+        return [normalize(text) for text in texts]
+
+
+@lru_cache(maxsize=8)
+def _get_normalizer(languages_frameworks):
+    return TextNormalizer(languages_frameworks)
+
+
+def normalize_text(text, languages_frameworks):
+    """Normalise le texte tout en préservant certains langages et frameworks.
+
+    Le `TextNormalizer` correspondant à la liste est construit une seule fois
+    puis réutilisé d'un appel à l'autre.
+
+    Args:
+        text (str): Le texte à normaliser.
+        languages_frameworks (list): Liste de langages et frameworks à préserver.
+
+    Returns:
+        str: Le texte normalisé avec les langages et frameworks préservés.
+    """
+    return _get_normalizer(tuple(languages_frameworks)).normalize(text)
+
 # =============================================================
 # Fonctions d’évaluation multilabel classiques (binarisées)
 # Utilisées dans l’approche supervisée (e.g. CatBoost, LogisticRegression)
+# Les fonctions qui dépendent de scikit-learn sont dans evaluation.py
 # =============================================================
 
+# Importées à la demande depuis evaluation.py : le dashboard n'a pas à charger scikit-learn au démarrage
+_LAZY_EVALUATION = ("compute_metrics", "jaccard_score_multilabel")
+
+
+def __getattr__(name):
+    if name in _LAZY_EVALUATION:
+        import evaluation
+        return getattr(evaluation, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _safe_ratio(numerator, denominator):
+    """Division élément par élément, 0 quand le dénominateur est nul (comme scikit-learn)."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def threshold_sweep_counts(y_true, y_pred_probs, thresholds):
+    """Compte TP/FP/FN par label pour chaque seuil, avec un seul tri des scores.
+
+    Chaque colonne de `y_pred_probs` est triée une fois : le nombre de scores
+    `>= seuil` s'obtient par `np.searchsorted`. Les vrais positifs viennent de
+    la même recherche sur les seuls scores des vrais labels, triés par label ;
+    `y_true` creuse (CSR) n'est donc jamais densifiée.
+
+    Args:
+        y_true (array-like ou scipy.sparse): Labels binaires (n_exemples, n_labels).
+        y_pred_probs (array-like): Scores (n_exemples, n_labels).
+        thresholds (iterable): Seuils à évaluer.
+
+    Returns:
+        dict: "tp", "fp", "fn" de forme (n_seuils, n_labels), "covered" (n_seuils,)
+        = nombre d'exemples ayant au moins un vrai tag au-dessus du seuil, et "n_samples".
+    """
+    y_true = _as_bool_labels(y_true)
+    if sp.issparse(y_true):
+        y_true = y_true.tocoo()
+        y_true.sum_duplicates()
+        true_rows, true_cols = y_true.row, y_true.col
+    else:
+        true_rows, true_cols = np.nonzero(y_true)
+    y_pred_probs = np.asarray(y_pred_probs, dtype=float)
+    thresholds = np.asarray(list(thresholds), dtype=float)
+    n_samples, n_labels = y_pred_probs.shape
+
+    # Scores des vrais labels, groupés par label et croissants dans chaque groupe
+    true_scores = y_pred_probs[true_rows, true_cols]
+    order = np.lexsort((true_scores, true_cols))
+    true_rows, true_cols, true_scores = true_rows[order], true_cols[order], true_scores[order]
+    bounds = np.searchsorted(true_cols, np.arange(n_labels + 1))
+    positives = np.diff(bounds)
+
+    sorted_scores = np.sort(y_pred_probs, axis=0)
+    predicted = np.empty((len(thresholds), n_labels), dtype=np.int64)
+    tp = np.empty((len(thresholds), n_labels), dtype=np.int64)
+    for j in range(n_labels):
+        predicted[:, j] = n_samples - np.searchsorted(sorted_scores[:, j], thresholds, side="left")
+        label_scores = true_scores[bounds[j]:bounds[j + 1]]
+        tp[:, j] = len(label_scores) - np.searchsorted(label_scores, thresholds, side="left")
+
+    # Un exemple est couvert dès que son meilleur score parmi ses vrais tags dépasse le seuil
+    best_true_score = np.full(n_samples, -np.inf)
+    np.maximum.at(best_true_score, true_rows, true_scores)
+    best_true_score.sort()
+    covered = n_samples - np.searchsorted(best_true_score, thresholds, side="left")
+
+    return {
+        "tp": tp,
+        "fp": predicted - tp,
+        "fn": positives[np.newaxis, :] - tp,
+        "covered": covered,
+        "n_samples": n_samples,
+    }
+
 
+def compute_metrics_sweep(y_true, y_pred_probs, thresholds=[0.5], k=3, model_name=None, approach=None):
+    """Même DataFrame que `compute_metrics`, calculé en une passe pour tous les seuils.
+
+    Les F1 micro/macro, Hamming loss, couverture et Jaccard macro sont dérivés
+    des comptes de `threshold_sweep_counts` ; la précision@k, indépendante du
+    seuil, n'est calculée qu'une fois. Un balayage de 1 000 seuils coûte
+    ainsi à peine plus qu'un seul seuil.
+    """
+    thresholds = list(thresholds)
+    counts = threshold_sweep_counts(y_true, y_pred_probs, thresholds)
+    tp, fp, fn = counts["tp"], counts["fp"], counts["fn"]
+    n_samples = counts["n_samples"]
+    n_labels = tp.shape[1]
+
+    tp_sum, fp_sum, fn_sum = tp.sum(axis=1), fp.sum(axis=1), fn.sum(axis=1)
+    h_loss = (fp_sum + fn_sum) / (n_samples * n_labels)
+    cov = counts["covered"] / n_samples
+    prec_k = precision_at_k(y_true, y_pred_probs, k=k)
+    if n_labels == 1:
+        f1_micro, f1_macro, jac = _binary_sweep_scores(tp[:, 0], fp[:, 0], fn[:, 0], n_samples)
+    else:
+        f1_micro = _safe_ratio(2 * tp_sum, 2 * tp_sum + fp_sum + fn_sum)
+        f1_macro = _safe_ratio(2 * tp, 2 * tp + fp + fn).mean(axis=1)
+        jac = _safe_ratio(tp, tp + fp + fn).mean(axis=1)
 
-def compute_metrics(y_true, y_pred_probs, thresholds=[0.5], k=3, model_name=None, approach=None):
     results = []
-    for threshold in thresholds:
-        y_pred = (y_pred_probs >= threshold).astype(int)
-        f1_micro = f1_score(y_true, y_pred, average="micro")
-        f1_macro = f1_score(y_true, y_pred, average="macro")
-        h_loss = hamming_loss(y_true, y_pred)
-        cov = coverage_score(y_true, y_pred)
-        prec_k = precision_at_k(y_true, y_pred_probs, k=k)
-        jac = jaccard_score_multilabel(y_true, y_pred)
-
-        metrics_dict ={
+    for i, threshold in enumerate(thresholds):
+        metrics_dict = {
             "ModelName": model_name,
             "Threshold": threshold,
-            "F1_micro": f1_micro,
-            "F1_macro": f1_macro,
-            "HammingLoss": h_loss,
-            "Coverage": cov,
+            "F1_micro": f1_micro[i],
+            "F1_macro": f1_macro[i],
+            "HammingLoss": h_loss[i],
+            "Coverage": cov[i],
             f"Precision@{k}": prec_k,
-            "Jaccard Score": jac
-            }
+            "Jaccard Score": jac[i]
+        }
         if approach is not None:
             metrics_dict["Approach"] = approach
         results.append(metrics_dict)
     return pd.DataFrame(results)
 
+def _binary_sweep_scores(tp, fp, fn, n_samples):
+    """F1 micro/macro et Jaccard macro d'une seule colonne de labels, comme scikit-learn.
+
+    Une matrice (n, 1) est vue par scikit-learn comme une cible binaire : les
+    moyennes portent sur les classes 0 et 1 présentes dans les vrais labels ou
+    les prédictions, et non sur l'unique colonne.
+    """
+    tn = n_samples - tp - fp - fn
+    # Comptes de la classe 0 : ses vrais positifs sont les vrais négatifs de la classe 1
+    per_class_tp = np.stack([tn, tp], axis=1)
+    per_class_fp = np.stack([fn, fp], axis=1)
+    per_class_fn = np.stack([fp, fn], axis=1)
+    present = (per_class_tp + per_class_fn + per_class_fp) > 0
+    f1 = _safe_ratio(2 * per_class_tp, 2 * per_class_tp + per_class_fp + per_class_fn)
+    jaccard = _safe_ratio(per_class_tp, per_class_tp + per_class_fp + per_class_fn)
+    n_present = present.sum(axis=1)
+    f1_micro = (tp + tn) / n_samples  # micro sur les deux classes = exactitude
+    f1_macro = (f1 * present).sum(axis=1) / n_present
+    jac = (jaccard * present).sum(axis=1) / n_present
+    return f1_micro, f1_macro, jac
+
+
+def _as_bool_labels(y):
+    """Matrice de labels en booléens : CSR si creuse (sans densifier), ndarray sinon."""
+    if sp.issparse(y):
+        y = sp.csr_matrix(y, dtype=bool)
+        y.eliminate_zeros()
+        return y
+    return np.asarray(y).astype(bool)
+
+
 def coverage_score(y_true, y_pred):
-    """Taux d’exemples où au moins un tag vrai est prédit."""
+    """Taux d’exemples où au moins un tag vrai est prédit.
+
+    Version vectorisée de `coverage_score_reference` : accepte des matrices
+    denses ou `scipy.sparse` (CSR), sans les densifier.
+    """
+    n_rows = y_true.shape[0] if sp.issparse(y_true) else len(y_true)
+    y_true = _as_bool_labels(y_true)
+    y_pred = _as_bool_labels(y_pred)
+    if sp.issparse(y_true) or sp.issparse(y_pred):
+        if not sp.issparse(y_true):
+            y_true, y_pred = y_pred, y_true
+        both = y_true.multiply(y_pred).tocsr()
+        both.eliminate_zeros()  # le produit avec un ndarray conserve des zéros explicites
+        hits = both.getnnz(axis=1) > 0
+    else:
+        hits = np.logical_and(y_true, y_pred).any(axis=1)
+    return int(np.count_nonzero(hits)) / n_rows
+
+
+def precision_at_k(y_true, y_pred_probs, k=5):
+    """Precision@k : proportion de vrais tags parmi les k meilleurs prédits (ou moins si moins prédits).
+
+    Version vectorisée de `precision_at_k_reference` : le top-k est obtenu par
+    `np.argpartition` (sans tri complet) et `y_true` peut être une matrice
+    `scipy.sparse` (CSR). Les scores `y_pred_probs` restent denses. En cas
+    d'égalité de scores à la k-ième place, le tag retenu peut différer de la
+    référence (dont l'ordre des ex aequo dépend déjà de `np.argsort`).
+    """
+    y_pred_probs = np.asarray(y_pred_probs)
+    n_rows, n_labels = y_pred_probs.shape
+    top = min(k, n_labels)
+    if top <= 0:
+        return np.mean(np.zeros(n_rows))
+    if top < n_labels:
+        top_k = np.argpartition(-y_pred_probs, top - 1, axis=1)[:, :top]
+    else:
+        top_k = np.broadcast_to(np.arange(n_labels), (n_rows, n_labels))
+    if sp.issparse(y_true):
+        rows = np.repeat(np.arange(n_rows), top)
+        hits = np.asarray(_as_bool_labels(y_true)[rows, top_k.ravel()]).reshape(n_rows, top)
+    else:
+        hits = np.take_along_axis(_as_bool_labels(y_true), top_k, axis=1)
+    return np.mean(hits.sum(axis=1) / top)
+
+
+def coverage_score_reference(y_true, y_pred):
+    """Taux d’exemples où au moins un tag vrai est prédit (boucle Python, référence)."""
     correct = 0
     for i in range(len(y_true)):
         true_labels = set(np.where(y_true[i])[0])
@@ -154,8 +529,8 @@ def coverage_score(y_true, y_pred):
             correct += 1
     return correct / len(y_true)
 
-def precision_at_k(y_true, y_pred_probs, k=5):
-    """Precision@k : proportion de vrais tags parmi les k meilleurs prédits (ou moins si moins prédits)."""
+def precision_at_k_reference(y_true, y_pred_probs, k=5):
+    """Precision@k en boucle Python avec tri complet (référence)."""
     precisions = []
     for i in range(len(y_true)):
         pred_top_k = np.argsort(y_pred_probs[i])[::-1][:k]
@@ -167,25 +542,201 @@ def precision_at_k(y_true, y_pred_probs, k=5):
 
 
 
-def jaccard_score_multilabel(y_true, y_pred):
-    """Calcule le Jaccard Score pour la classification multilabel."""
-    return jaccard_score(y_true, y_pred, average='macro')
-
 # =============================================================
 # Fonctions d’évaluation avec listes de tags (non binarisées)
 # Utilisées dans l’approche non supervisée (e.g. NMF, LDA)
 # =============================================================
 
 
-def coverage_score_true_pred(y_true, y_pred):
+def parse_tags(raw):
+    """Liste de tags à partir d'une liste ou de sa représentation texte (ex. "['c++', 'sse2']")."""
+    if isinstance(raw, (list, tuple, np.ndarray)):
+        return list(raw)
+    if not isinstance(raw, str):
+        return []
+    try:
+        tags = ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        tags = raw.strip("[]").replace("'", "").split(", ")
+    if isinstance(tags, str):
+        tags = [tags]
+    return [tag for tag in tags if tag]
+
+class TagVocabulary:
+    """Tags internés en identifiants entiers, pour encoder des listes de tags en matrices CSR.
+
+    Un tag inconnu rencontré à l'encodage est ajouté au vocabulaire : les
+    identifiants déjà attribués ne changent jamais.
+
+    Args:
+        tag_lists (iterable): Listes de tags à interner d'emblée (ex. `TagsList`, `FilteredTags`).
+    """
+
+    def __init__(self, *tag_lists):
+        self.index = {}
+        self.tags = []
+        self._lock = threading.Lock()
+        for lists in tag_lists:
+            self.update(chain.from_iterable(lists))
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return tag in self.index
+
+    def update(self, tags):
+        """Interne les tags absents, dans l'ordre de première apparition."""
+        with self._lock:
+            self._intern(tags)
+
+    def _intern(self, tags):
+        # Appelé verrou pris : le vocabulaire peut être partagé entre sessions (st.cache_resource)
+        for tag in dict.fromkeys(tags):
+            if tag not in self.index:
+                self.index[tag] = len(self.tags)
+                self.tags.append(tag)
+
+    def encode_rows(self, tag_lists):
+        """Identifiants des tags de chaque liste, au format CSR.
+
+        Returns:
+            tuple: (indptr, indices, lengths) ; `lengths` compte les tags de
+            chaque liste, doublons compris.
+        """
+        tag_lists = tag_lists if isinstance(tag_lists, list) else list(tag_lists)
+        lengths = np.fromiter(map(len, tag_lists), dtype=np.int64, count=len(tag_lists))
+        flat = list(chain.from_iterable(tag_lists))
+        with self._lock:
+            self._intern(flat)
+            indices = np.fromiter(map(self.index.__getitem__, flat), dtype=np.int32, count=len(flat))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        return indptr, indices, lengths
+
+    @staticmethod
+    def truncate_rows(indptr, indices, lengths, k):
+        """Garde les k premiers tags de chaque ligne encodée (comme `tags[:k]`)."""
+        positions = np.arange(len(indices)) - np.repeat(indptr[:-1], lengths)
+        lengths = np.minimum(lengths, max(k, 0))
+        return np.concatenate([[0], np.cumsum(lengths)]), indices[positions < k], lengths
+
+    def to_matrix(self, indptr, indices, n_cols=None):
+        """Matrice booléenne CSR (n_listes, n_tags), un tag répété ne comptant qu'une fois.
+
+        `n_cols` (taille du vocabulaire par défaut) fixe le nombre de colonnes :
+        les matrices à combiner doivent le recevoir identique, le vocabulaire
+        partagé pouvant grandir entre deux appels.
+        """
+        matrix = sp.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, indptr),
+            shape=(len(indptr) - 1, len(self) if n_cols is None else n_cols),
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def encode(self, tag_lists, k=None):
+        """Matrice booléenne CSR des listes de tags (tronquées à k si précisé)."""
+        rows = self.encode_rows(tag_lists)
+        if k is not None:
+            rows = self.truncate_rows(*rows, k)
+        return self.to_matrix(*rows[:2])
+
+
+def tag_list_row_scores(y_true, y_pred, k=5, vocabulary=None):
+    """Scores par ligne sur des listes de tags, calculés en une fois sur des matrices CSR.
+
+    Équivalent vectorisé de `compute_row_scores` (et de la couverture de
+    `coverage_score_true_pred_reference`) : mêmes dénominateurs, doublons compris,
+    donc mêmes valeurs à l'identique.
+
+    Args:
+        y_true (list): Listes de tags vrais.
+        y_pred (list): Listes de tags prédits, du plus au moins probable.
+        vocabulary (TagVocabulary): Vocabulaire à réutiliser (un nouveau sinon).
+
+    Returns:
+        dict: Tableaux numpy "covered" (au moins un tag vrai prédit, sans limite k),
+        "precision", "recall" et "f1" (@k).
+    """
+    vocabulary = vocabulary if vocabulary is not None else TagVocabulary()
+    true_indptr, true_indices, true_lengths = vocabulary.encode_rows(y_true)
+    pred_indptr, pred_indices, pred_lengths = vocabulary.encode_rows(y_pred)
+    top_indptr, top_indices, top_lengths = vocabulary.truncate_rows(pred_indptr, pred_indices, pred_lengths, k)
+    # Taille lue une fois après l'encodage des deux listes : un autre thread peut interner
+    # des tags entre-temps, toutes les matrices gardent le même nombre de colonnes
+    n_cols = len(vocabulary)
+    true_matrix = vocabulary.to_matrix(true_indptr, true_indices, n_cols)
+    covered = true_matrix.multiply(vocabulary.to_matrix(pred_indptr, pred_indices, n_cols)).getnnz(axis=1) > 0
+    intersect = true_matrix.multiply(vocabulary.to_matrix(top_indptr, top_indices, n_cols)).getnnz(axis=1)
+
+    precision = intersect / np.maximum(top_lengths, 1)
+    recall = np.divide(intersect, true_lengths, out=np.zeros(len(true_lengths)), where=true_lengths > 0)
+    total = precision + recall
+    f1 = np.divide(2 * precision * recall, total, out=np.zeros(len(total)), where=total > 0)
+    return {"covered": covered, "precision": precision, "recall": recall, "f1": f1}
+
+
+def tag_list_metrics(y_true, y_pred, k=5, vocabulary=None):
+    """Couverture, précision@k, rappel@k et F1@k moyens sur des listes de tags.
+
+    Les moyennes sont des sommes séquentielles (`sum`), comme les fonctions
+    de référence, pour obtenir exactement les mêmes flottants.
+    """
+    scores = tag_list_row_scores(y_true, y_pred, k=k, vocabulary=vocabulary)
+    n_rows = len(scores["covered"])
+    return {
+        "coverage": int(np.count_nonzero(scores["covered"])) / n_rows,
+        "precision": sum(scores["precision"].tolist()) / n_rows,
+        "recall": sum(scores["recall"].tolist()) / n_rows,
+        "f1": sum(scores["f1"].tolist()) / n_rows,
+    }
+
+
+def tag_list_per_tag_counts(y_true, y_pred, k=5, vocabulary=None):
+    """Comptes par tag (support, prédictions@k, vrais positifs), calculés sur des matrices CSR.
+
+    Args:
+        y_true (list): Listes de tags vrais.
+        y_pred (list): Listes de tags prédits, du plus au moins probable.
+        vocabulary (TagVocabulary): Vocabulaire à réutiliser (un nouveau sinon).
+
+    Returns:
+        dict: "tags" (noms, dans l'ordre du vocabulaire) et tableaux numpy alignés
+        "support" (lignes où le tag est vrai), "predicted" (lignes où il est
+        dans le top-k) et "true_positives".
+    """
+    vocabulary = vocabulary if vocabulary is not None else TagVocabulary()
+    true_indptr, true_indices, _ = vocabulary.encode_rows(y_true)
+    top_indptr, top_indices, _ = vocabulary.truncate_rows(*vocabulary.encode_rows(y_pred), k)
+    n_cols = len(vocabulary)  # lue une fois : le vocabulaire partagé peut grandir entre-temps
+    true_matrix = vocabulary.to_matrix(true_indptr, true_indices, n_cols)
+    top_matrix = vocabulary.to_matrix(top_indptr, top_indices, n_cols)
+    return {
+        "tags": vocabulary.tags[:n_cols],
+        "support": true_matrix.getnnz(axis=0),
+        "predicted": top_matrix.getnnz(axis=0),
+        "true_positives": true_matrix.multiply(top_matrix).getnnz(axis=0),
+    }
+
+
+def coverage_score_true_pred(y_true, y_pred, vocabulary=None):
     """Taux d’exemples où au moins un tag vrai est prédit."""
+    covered = tag_list_row_scores(y_true, y_pred, vocabulary=vocabulary)["covered"]
+    return int(np.count_nonzero(covered)) / len(y_true)
+
+def precision_at_k_true_pred(y_true, y_pred, k=5, vocabulary=None):
+    precisions = tag_list_row_scores(y_true, y_pred, k=k, vocabulary=vocabulary)["precision"]
+    return sum(precisions.tolist()) / len(precisions)
+
+def coverage_score_true_pred_reference(y_true, y_pred):
+    """Taux d’exemples où au moins un tag vrai est prédit (boucle Python, référence)."""
     correct = 0
     for true_tags, pred_tags in zip(y_true, y_pred):
         if set(true_tags) & set(pred_tags):
             correct += 1
     return correct / len(y_true)
 
-def precision_at_k_true_pred(y_true, y_pred, k=5):
+def precision_at_k_true_pred_reference(y_true, y_pred, k=5):
     precisions = []
     for true_tags, pred_tags in zip(y_true, y_pred):
         top_k = pred_tags[:k] if len(pred_tags) >= k else pred_tags
@@ -201,7 +752,8 @@ def f1_at_k(p, r):
 def compute_row_scores(true_tags, pred_tags, k=5):
     top_k = pred_tags[:k] if len(pred_tags) >= k else pred_tags
     denom = len(top_k) if top_k else 1
-    precision = len(set(top_k) & set(true_tags)) / denom
-    recall = len(set(top_k) & set(true_tags)) / len(true_tags) if true_tags else 0.0
+    intersect = len(set(top_k) & set(true_tags))
+    precision = intersect / denom
+    recall = intersect / len(true_tags) if true_tags else 0.0
     f1 = f1_at_k(precision, recall)
     return precision, recall, f1